@@ -0,0 +1,241 @@
+"""Org-wide address plan: every MX VLAN, MS L3 interface, site-to-site VPN
+local subnet and third-party peer private subnet, checked for overlaps.
+
+All entries are CIDRs, so two of them overlap only when one contains the
+other.  The org report is a sweep over the entries sorted by start address
+(O(n log n) plus the overlaps found); pre-flight checks of new subnets use a
+prefix index (ancestor lookups plus a bisect for contained prefixes), so
+checking a VLAN against thousands of networks takes well under a millisecond
+once the plan is collected.  Collected plans are cached per org for
+``PLAN_MAX_AGE`` seconds; VLANs written through this tool are folded into
+the cached plan (:func:`record_vlans`).
+
+Severity of an overlap:
+
+* conflict     - both sides are advertised over VPN (AutoVPN / third-party peers)
+* same-network - two entries of one network overlap
+* overlap      - different networks, at least one side kept out of the VPN
+"""
+import bisect
+import heapq
+import ipaddress
+import time
+
+import meraki_api
+
+PLAN_MAX_AGE = 600
+V6_OFFSET = 1 << 32
+SEVERITY_ORDER = {"conflict": 0, "same-network": 1, "overlap": 2}
+REPORT_FIELDS = ["severity", "relation", "subnet_a", "source_a", "network_a", "name_a",
+                 "subnet_b", "source_b", "network_b", "name_b"]
+
+_plans = {}
+
+
+class Entry:
+    __slots__ = ("subnet", "source", "network_id", "network_name", "name", "ref", "vpn", "start", "end")
+
+    def __init__(self, subnet, source, network_id, network_name, name, ref=None, vpn=False):
+        self.subnet = ipaddress.ip_network(subnet, strict=False)
+        self.source, self.network_id, self.network_name = source, network_id, network_name
+        self.name, self.ref, self.vpn = name, ref, vpn
+        offset = V6_OFFSET if self.subnet.version == 6 else 0
+        self.start = offset + int(self.subnet.network_address)
+        self.end = offset + int(self.subnet.broadcast_address)
+
+
+# ---------------- Collection ---------------- #
+def _network_entries(headers, net):
+    """VLANs and site-to-site subnets of one appliance network."""
+    net_id, name = net["id"], net.get("name", net["id"])
+    entries = []
+    response = meraki_api.get(f"{meraki_api.BASE_URL}/networks/{net_id}/appliance/vlans", headers=headers)
+    if response.ok:
+        for vlan in response.json():
+            if vlan.get("subnet"):
+                entries.append(Entry(vlan["subnet"], "vlan", net_id, name, vlan.get("name", ""), vlan.get("id")))
+    elif response.status_code != 400:     # 400: VLANs are disabled on this network
+        response.raise_for_status()
+
+    response = meraki_api.get(f"{meraki_api.BASE_URL}/networks/{net_id}/appliance/vpn/siteToSiteVpn",
+                              headers=headers)
+    response.raise_for_status()
+    vpn = response.json()
+    if vpn.get("mode", "none") != "none":
+        by_subnet = {e.subnet: e for e in entries}
+        for item in vpn.get("subnets", []):
+            subnet = ipaddress.ip_network(item["localSubnet"], strict=False)
+            if subnet in by_subnet:
+                by_subnet[subnet].vpn = bool(item.get("useVpn"))
+            else:
+                entries.append(Entry(subnet, "vpn_subnet", net_id, name, "site-to-site local subnet",
+                                     vpn=bool(item.get("useVpn"))))
+    return entries
+
+
+def _switch_entries(headers, device):
+    response = meraki_api.get(f"{meraki_api.BASE_URL}/devices/{device['serial']}/switch/routing/interfaces",
+                              headers=headers)
+    if response.status_code == 400:       # layer 2 switch
+        return []
+    response.raise_for_status()
+    return [Entry(i["subnet"], "l3_interface", device.get("networkId"), device.get("networkName", ""),
+                  f"{device.get('name') or device['serial']} {i.get('name', '')}".strip(), i.get("interfaceId"))
+            for i in response.json() if i.get("subnet")]
+
+
+def _third_party_entries(headers, org_id):
+    response = meraki_api.get(f"{meraki_api.BASE_URL}/organizations/{org_id}/appliance/vpn/thirdPartyVPNPeers",
+                              headers=headers)
+    response.raise_for_status()
+    return [Entry(subnet, "third_party", None, "", peer.get("name", ""), peer.get("publicIp"), vpn=True)
+            for peer in response.json().get("peers", []) for subnet in peer.get("privateSubnets", [])]
+
+
+def collect_plan(headers, org_id, max_workers=meraki_api.MAX_WORKERS):
+    """Fetch every address entry of the org in parallel; returns ``(entries, errors)``."""
+    networks = meraki_api.get_all_pages(f"{meraki_api.BASE_URL}/organizations/{org_id}/networks", headers=headers)
+    names = {n["id"]: n.get("name", n["id"]) for n in networks}
+    appliances = [n for n in networks if "appliance" in n.get("productTypes", [])]
+    switches = [d for d in meraki_api.get_all_pages(f"{meraki_api.BASE_URL}/organizations/{org_id}/devices",
+                                                    headers=headers)
+                if str(d.get("model", "")).startswith("MS")]
+    for device in switches:
+        device["networkName"] = names.get(device.get("networkId"), "")
+
+    entries, errors = _third_party_entries(headers, org_id), {}
+    jobs = [("network", n) for n in appliances] + [("switch", d) for d in switches]
+
+    def fetch(job):
+        kind, item = job
+        return _network_entries(headers, item) if kind == "network" else _switch_entries(headers, item)
+
+    for (kind, item), found, error in meraki_api.parallel_map(fetch, jobs, max_workers=max_workers):
+        if error:
+            errors[item.get("id") or item.get("serial")] = error
+        else:
+            entries.extend(found)
+    return entries, errors
+
+
+def get_plan(headers, org_id, max_age=PLAN_MAX_AGE, refresh=False):
+    """Cached :func:`collect_plan` (entries only); ``refresh`` forces a new crawl."""
+    cached = _plans.get(org_id)
+    if cached and not refresh and time.monotonic() - cached[0] < max_age:
+        return cached[1]
+    entries, errors = collect_plan(headers, org_id)
+    plan = PlanIndex(entries)
+    plan.errors = errors
+    _plans[org_id] = (time.monotonic(), plan)
+    return plan
+
+
+def record_vlans(org_id, network_id, vlans, removed=()):
+    """Fold VLANs just written to ``network_id`` into the org's cached plan, if any.
+
+    ``vlans`` are ``(vlan_id, name, subnet)`` created or re-addressed, ``removed``
+    the IDs of deleted VLANs; their old entries are dropped.  The cache age is
+    kept, so the plan is still re-crawled after ``PLAN_MAX_AGE``.
+    """
+    cached = _plans.get(org_id)
+    if not cached:
+        return
+    stamp, plan = cached
+    replaced = {str(vlan_id) for vlan_id, _, _ in vlans} | {str(vlan_id) for vlan_id in removed}
+    kept = [e for e in plan.entries
+            if not (e.network_id == network_id and e.source == "vlan" and str(e.ref) in replaced)]
+    network_name = next((e.network_name for e in plan.entries if e.network_id == network_id), network_id)
+    vpn = network_id in plan.vpn_networks
+    kept.extend(Entry(subnet, "vlan", network_id, network_name, name, vlan_id, vpn=vpn)
+                for vlan_id, name, subnet in vlans)
+    updated = PlanIndex(kept)
+    updated.errors = plan.errors
+    _plans[org_id] = (stamp, updated)
+
+
+# ---------------- Overlaps ---------------- #
+def _severity(a, b):
+    if a.network_id is not None and a.network_id == b.network_id:
+        return "same-network"
+    return "conflict" if a.vpn and b.vpn else "overlap"
+
+
+def _relation(a, b):
+    if a.subnet == b.subnet:
+        return "identical"
+    return "contains" if a.start <= b.start and b.end <= a.end else "inside"
+
+
+def _row(a, b):
+    return {"severity": _severity(a, b), "relation": _relation(a, b),
+            "subnet_a": str(a.subnet), "source_a": a.source, "network_a": a.network_name or a.network_id or "",
+            "name_a": a.name, "subnet_b": str(b.subnet), "source_b": b.source,
+            "network_b": b.network_name or b.network_id or "", "name_b": b.name}
+
+
+def find_overlaps(entries):
+    """Every overlapping pair, by a sweep over entries sorted by start (wider first on ties)."""
+    ordered = sorted(entries, key=lambda e: (e.start, -e.end))
+    active = []            # heap of (end, position) still open at the sweep point
+    rows = []
+    for position, entry in enumerate(ordered):
+        while active and active[0][0] < entry.start:
+            heapq.heappop(active)
+        for _, other in active:
+            rows.append(_row(ordered[other], entry))
+        heapq.heappush(active, (entry.end, position))
+    rows.sort(key=lambda r: (SEVERITY_ORDER[r["severity"]], r["subnet_a"], r["subnet_b"]))
+    return rows
+
+
+class PlanIndex:
+    """Entries indexed for "what overlaps this subnet?" lookups."""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.errors = {}
+        self.by_prefix = {}
+        for entry in self.entries:
+            self.by_prefix.setdefault((entry.subnet.version, entry.subnet.prefixlen,
+                                       int(entry.subnet.network_address)), []).append(entry)
+        self.sorted = sorted(self.entries, key=lambda e: e.start)
+        self.starts = [e.start for e in self.sorted]
+        self.vpn_networks = {e.network_id for e in self.entries if e.vpn and e.network_id}
+
+    def overlapping(self, subnet):
+        subnet = ipaddress.ip_network(subnet, strict=False)
+        candidate = Entry(subnet, "candidate", None, "", "")
+        found = {}
+        bits = subnet.max_prefixlen
+        addr = int(subnet.network_address)
+        for length in range(subnet.prefixlen + 1):        # prefixes containing the subnet
+            mask = ((1 << length) - 1) << (bits - length) if length else 0
+            for entry in self.by_prefix.get((subnet.version, length, addr & mask), ()):
+                found[id(entry)] = entry
+        lo = bisect.bisect_left(self.starts, candidate.start)
+        hi = bisect.bisect_right(self.starts, candidate.end)
+        for entry in self.sorted[lo:hi]:                  # prefixes inside the subnet
+            found[id(entry)] = entry
+        return list(found.values())
+
+    def check_vlans(self, network_id, vlans, vpn=None):
+        """Overlap rows for VLANs about to be created / changed on ``network_id``.
+
+        ``vlans`` are ``(vlan_id, name, subnet)``.  The VLAN's own current
+        entry (same network and VLAN ID) and its site-to-site mirror are ignored,
+        and the new VLANs are also checked against each other.  New VLANs count
+        as VPN subnets when the network already advertises subnets over VPN.
+        """
+        vpn = network_id in self.vpn_networks if vpn is None else vpn
+        rows = []
+        pending = []
+        for vlan_id, name, subnet in vlans:
+            new = Entry(subnet, "vlan", network_id, network_id, name, vlan_id, vpn=vpn)
+            for entry in self.overlapping(new.subnet) + [p for p in pending if p.start <= new.end and new.start <= p.end]:
+                if entry.network_id == network_id and (str(entry.ref) == str(vlan_id)
+                                                       or (entry.source == "vpn_subnet" and entry.subnet == new.subnet)):
+                    continue
+                rows.append(_row(new, entry))
+            pending.append(new)
+        rows.sort(key=lambda r: SEVERITY_ORDER[r["severity"]])
+        return rows
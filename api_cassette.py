@@ -0,0 +1,139 @@
+"""Record / replay of Dashboard API exchanges ("cassettes").
+
+In record mode every response that passes through ``meraki_api`` is
+appended to a gzip-compressed JSON-lines file.  In replay mode the same
+calls are answered from that file with no network I/O (and no rate-limit
+waits), so parsing, filtering and rendering can be profiled offline on
+real data:
+
+    python3 main.py --record runs/inventory.cassette.gz
+    python3 main.py --replay runs/inventory.cassette.gz
+
+Standalone scripts pick the mode up from ``MERAKI_CASSETTE`` and
+``MERAKI_CASSETTE_MODE`` (``record`` or ``replay``).  Request headers are
+never stored, so API keys do not end up in the cassette.
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+KEPT_HEADERS = ("Content-Type", "Link", "Retry-After")
+# Time windows are computed from "now", so they would never match on replay
+IGNORED_PARAMS = ("t0", "t1")
+
+mode = None   # None, "record" or "replay"
+path = None
+
+_lock = threading.Lock()
+_writer = None
+_tapes = {}
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Replay found no recorded response for a request."""
+
+
+# ---------------- Matching ---------------- #
+def _body_of(kwargs):
+    if kwargs.get("json") is not None:
+        return json.dumps(kwargs["json"], sort_keys=True)
+    data = kwargs.get("data")
+    if isinstance(data, bytes):
+        return data.decode("utf-8", "replace")
+    return data or ""
+
+
+def request_key(method, url, kwargs):
+    """Match key: method, path without the API prefix, sorted query, body digest."""
+    parts = urlsplit(url)
+    route = parts.path.split("/api/v1", 1)[-1]
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query += [(k, str(v)) for k, v in (kwargs.get("params") or {}).items() if v is not None]
+    query = [(k, v) for k, v in query if k not in IGNORED_PARAMS]
+    body = _body_of(kwargs)
+    digest = hashlib.sha1(body.encode()).hexdigest()[:16] if body else ""
+    return f"{method.upper()} {route}?{urlencode(sorted(query))} {digest}"
+
+
+# ---------------- Modes ---------------- #
+def configure(new_mode, cassette_path):
+    """Switch to ``"record"`` or ``"replay"`` (``None`` turns the cassette off)."""
+    global mode, path, _writer, _tapes
+    close()
+    mode, path = new_mode, cassette_path
+    if mode == "record":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _writer = gzip.open(path, "at", encoding="utf-8")
+    elif mode == "replay":
+        _tapes = load(path)
+    elif mode is not None:
+        raise ValueError(f"Unknown cassette mode: {mode}")
+
+
+def close():
+    global _writer
+    with _lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
+
+def load(cassette_path):
+    """Read a cassette into ``{request key: deque of responses}``."""
+    tapes = defaultdict(deque)
+    with gzip.open(cassette_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                tapes[entry["key"]].append(entry)
+    return tapes
+
+
+def record(method, url, kwargs, response):
+    entry = {
+        "key": request_key(method, url, kwargs),
+        "url": url,
+        "status": response.status_code,
+        "headers": {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers},
+        "body": response.text,
+    }
+    line = json.dumps(entry, separators=(",", ":")) + "\n"
+    with _lock:
+        if _writer is not None:
+            _writer.write(line)
+
+
+def replay(method, url, kwargs):
+    """Return the next recorded response for this request as a ``requests.Response``."""
+    key = request_key(method, url, kwargs)
+    with _lock:
+        tape = _tapes.get(key)
+        if not tape:
+            raise CassetteMiss(f"No recorded response for {key.strip()} in {path}")
+        # Calls repeat in the same order they were recorded; the last one keeps answering
+        entry = tape.popleft() if len(tape) > 1 else tape[0]
+
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["body"].encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = url
+    response.reason = "Replayed"
+    response.request = requests.Request(method, url, json=kwargs.get("json"), data=kwargs.get("data"),
+                                        params=kwargs.get("params")).prepare()
+    return response
+
+
+atexit.register(close)
+
+if os.environ.get("MERAKI_CASSETTE"):
+    configure(os.environ.get("MERAKI_CASSETTE_MODE", "replay"), os.environ["MERAKI_CASSETTE"])
@@ -0,0 +1,311 @@
+"""Per-endpoint metrics for every Dashboard API exchange.
+
+``meraki_api.request`` calls :func:`record` once per HTTP attempt.  Calls
+are grouped by method and endpoint template (``/networks/{networkId}/appliance/vlans``)
+and keep request count, status codes, retries, 429s, bytes and a latency
+histogram.  The totals can be shown in the diagnostics menu, written as a
+JSON summary at exit, or exported as a Prometheus textfile.
+"""
+import atexit
+import bisect
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlsplit
+
+OUTPUT_DIR = Path(__file__).resolve().parent / "output" / "diagnostics"
+
+# Prometheus histogram buckets (seconds)
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RESERVOIR_SIZE = 2048
+PERCENTILES = (50, 95, 99)
+
+# Collection name -> placeholder for the ID segment that follows it
+ID_SEGMENTS = {
+    "organizations": "{organizationId}",
+    "networks": "{networkId}",
+    "devices": "{serial}",
+    "vlans": "{vlanId}",
+    "policyObjects": "{policyObjectId}",
+    "groups": "{groupId}",
+    "ports": "{portId}",
+    "ssids": "{number}",
+    "interfaces": "{interfaceId}",
+    "actionBatches": "{actionBatchId}",
+    "staticRoutes": "{staticRouteId}",
+    "clients": "{clientId}",
+}
+
+
+@lru_cache(maxsize=4096)
+def endpoint_template(url):
+    """Collapse IDs in ``url`` so calls to the same endpoint share one key."""
+    path = urlsplit(url).path
+    path = re.sub(r"^.*?/api/v\d+", "", path) or "/"
+    segments = path.strip("/").split("/")
+    for i in range(1, len(segments)):
+        placeholder = ID_SEGMENTS.get(segments[i - 1])
+        if placeholder and any(ch.isdigit() for ch in segments[i]):
+            segments[i] = placeholder
+    return "/" + "/".join(segments)
+
+
+class EndpointStats:
+    __slots__ = ("count", "statuses", "retries", "throttled", "errors", "bytes_sent", "bytes_received",
+                 "latency_sum", "buckets", "samples", "_seen")
+
+    def __init__(self):
+        self.count = 0
+        self.statuses = {}
+        self.retries = 0
+        self.throttled = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.samples = []
+        self._seen = 0
+
+    def add(self, status, seconds, retry, sent, received):
+        self.count += 1
+        key = str(status) if status is not None else "error"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if retry:
+            self.retries += 1
+        if status == 429:
+            self.throttled += 1
+        if status is None or status >= 400:
+            self.errors += 1
+        self.bytes_sent += sent
+        self.bytes_received += received
+        self.latency_sum += seconds
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+        # Reservoir sampling keeps percentiles cheap for long runs
+        self._seen += 1
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(seconds)
+        else:
+            slot = random.randrange(self._seen)
+            if slot < RESERVOIR_SIZE:
+                self.samples[slot] = seconds
+
+    def percentiles(self, points=PERCENTILES):
+        if not self.samples:
+            return {f"p{p}": None for p in points}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {f"p{p}": ordered[min(last, round(p / 100 * last))] for p in points}
+
+
+_lock = threading.Lock()
+_stats = {}
+_started = time.time()
+
+
+def record(method, url, status, seconds, retry=False, sent=0, received=0):
+    """Account one HTTP attempt (``status`` is None when no response arrived)."""
+    key = (method.upper(), endpoint_template(url))
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = EndpointStats()
+        stats.add(status, seconds, retry, sent, received)
+
+
+def reset():
+    global _started
+    with _lock:
+        _stats.clear()
+        _started = time.time()
+
+
+def total_requests():
+    with _lock:
+        return sum(s.count for s in _stats.values())
+
+
+# ---------------- Export ---------------- #
+def summary():
+    """Snapshot of all endpoints, slowest (by total time) first."""
+    with _lock:
+        items = list(_stats.items())
+        started = _started
+        endpoints = []
+        for (method, template), s in items:
+            pct = s.percentiles()
+            endpoints.append({
+                "method": method,
+                "endpoint": template,
+                "count": s.count,
+                "statuses": dict(s.statuses),
+                "retries": s.retries,
+                "throttled": s.throttled,
+                "errors": s.errors,
+                "bytes_sent": s.bytes_sent,
+                "bytes_received": s.bytes_received,
+                "total_seconds": round(s.latency_sum, 4),
+                "mean_ms": round(s.latency_sum / s.count * 1000, 1) if s.count else None,
+                **{k: round(v * 1000, 1) if v is not None else None for k, v in pct.items()},
+            })
+    endpoints.sort(key=lambda e: e["total_seconds"], reverse=True)
+    return {
+        "started": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "elapsed_seconds": round(time.time() - started, 3),
+        "requests": sum(e["count"] for e in endpoints),
+        "retries": sum(e["retries"] for e in endpoints),
+        "throttled": sum(e["throttled"] for e in endpoints),
+        "errors": sum(e["errors"] for e in endpoints),
+        "api_seconds": round(sum(e["total_seconds"] for e in endpoints), 3),
+        "endpoints": endpoints,
+    }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text():
+    """Render the counters in the Prometheus text exposition format."""
+    lines = [
+        "# HELP meraki_api_requests_total Dashboard API HTTP attempts by endpoint and status.",
+        "# TYPE meraki_api_requests_total counter",
+    ]
+    with _lock:
+        items = sorted(_stats.items())
+        for (method, template), s in items:
+            for status, count in sorted(s.statuses.items()):
+                lines.append(f'meraki_api_requests_total{{method="{method}",endpoint="{_label(template)}",'
+                             f'status="{status}"}} {count}')
+
+        for name, attr, help_text in (
+            ("meraki_api_retries_total", "retries", "Retried attempts (after 429 back-off)."),
+            ("meraki_api_throttled_total", "throttled", "429 responses."),
+            ("meraki_api_sent_bytes_total", "bytes_sent", "Request body bytes."),
+            ("meraki_api_received_bytes_total", "bytes_received", "Response body bytes."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (method, template), s in items:
+                lines.append(f'{name}{{method="{method}",endpoint="{_label(template)}"}} {getattr(s, attr)}')
+
+        name = "meraki_api_request_duration_seconds"
+        lines += [f"# HELP {name} Latency of Dashboard API attempts.", f"# TYPE {name} histogram"]
+        for (method, template), s in items:
+            labels = f'method="{method}",endpoint="{_label(template)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, s.buckets):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {s.count}')
+            lines.append(f"{name}_sum{{{labels}}} {s.latency_sum:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {s.count}")
+    return "\n".join(lines) + "\n"
+
+
+def _atomic_write(path, text):
+    # node_exporter's textfile collector may read at any moment
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def write_json(path=None):
+    path = path or OUTPUT_DIR / f"api_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    return _atomic_write(path, json.dumps(summary(), indent=2))
+
+
+def write_prometheus(path=None):
+    path = path or OUTPUT_DIR / "meraki_api.prom"
+    return _atomic_write(path, prometheus_text())
+
+
+def install_exit_report(json_path=None, prom_path=None):
+    """Write the JSON summary and Prometheus textfile at interpreter exit.
+
+    Paths default to ``$MERAKI_METRICS_JSON`` / ``$MERAKI_METRICS_TEXTFILE``,
+    then ``output/diagnostics/``.  Nothing is written if no API call was made.
+    """
+    json_path = json_path or os.environ.get("MERAKI_METRICS_JSON")
+    prom_path = prom_path or os.environ.get("MERAKI_METRICS_TEXTFILE")
+
+    def report():
+        if not total_requests():
+            return
+        try:
+            write_json(json_path)
+            write_prometheus(prom_path)
+        except OSError:
+            pass
+
+    atexit.register(report)
+
+
+# ---------------- Menu ---------------- #
+def _fmt_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def show_metrics(console, top=25):
+    from rich.table import Table
+
+    data = summary()
+    if not data["requests"]:
+        console.print("[yellow]⚠️ No API calls recorded yet in this session.[/yellow]")
+        return
+
+    console.print(f"📊 {data['requests']} requests, {data['api_seconds']:.1f}s in API calls, "
+                  f"{data['retries']} retries, {data['throttled']} × 429, {data['errors']} errors "
+                  f"(since {data['started']})")
+    table = Table(title="🩺 API calls by endpoint (slowest total first)", show_header=True, header_style="bold magenta")
+    table.add_column("Method", style="cyan")
+    table.add_column("Endpoint")
+    for col in ("Calls", "Total s", "p50 ms", "p95 ms", "p99 ms", "Retries", "429s", "Errors", "Received"):
+        table.add_column(col, justify="right")
+    for e in data["endpoints"][:top]:
+        table.add_row(e["method"], e["endpoint"], str(e["count"]), f"{e['total_seconds']:.2f}",
+                      *(f"{e[p]:.0f}" if e[p] is not None else "—" for p in ("p50", "p95", "p99")),
+                      str(e["retries"]), str(e["throttled"]),
+                      f"[red]{e['errors']}[/red]" if e["errors"] else "0", _fmt_bytes(e["bytes_received"]))
+    console.print(table)
+    if len(data["endpoints"]) > top:
+        console.print(f"… {len(data['endpoints']) - top} more endpoint(s) in the JSON export.")
+
+
+def diagnostics_menu():
+    from rich.console import Console
+    from rich.prompt import Prompt
+
+    console = Console()
+    while True:
+        console.print("\n[bold yellow]🩺 API Diagnostics[/bold yellow]")
+        console.print("1. Show per-endpoint metrics")
+        console.print("2. Export JSON summary")
+        console.print("3. Export Prometheus textfile")
+        console.print("4. Reset counters")
+        console.print("5. ⬅️ Back")
+        choice = Prompt.ask("Select an option", choices=["1", "2", "3", "4", "5"])
+
+        if choice == "1":
+            show_metrics(console)
+        elif choice == "2":
+            console.print(f"[green]✅ Saved: {write_json()}[/green]")
+        elif choice == "3":
+            console.print(f"[green]✅ Saved: {write_prometheus(os.environ.get('MERAKI_METRICS_TEXTFILE'))}[/green]")
+        elif choice == "4":
+            reset()
+            console.print("[cyan]🔄 Counters reset.[/cyan]")
+        elif choice == "5":
+            break
@@ -1,9 +1,10 @@
-﻿import requests
-import yaml
+﻿import bulk_input
+import meraki_api
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from rich.table import Table
 import os
+import ipaddress
 from pathlib import Path   # ➡️ add this
 
 
@@ -19,6 +20,9 @@ def configure_vlan(base_url, headers, network_id):
     subnet = Prompt.ask("🌐 Enter Subnet (e.g., 192.168.1.0/24)")
     appliance_ip = Prompt.ask("🖥️  Enter Appliance IP (e.g., 192.168.1.1)")
 
+    if not preflight_vlans(base_url, headers, network_id, [(vlan_id, name, subnet)]):
+        return
+
     url = f"{base_url}/networks/{network_id}/appliance/vlans"
     payload = {
         "id": vlan_id,
@@ -26,36 +30,265 @@ def configure_vlan(base_url, headers, network_id):
         "subnet": subnet,
         "applianceIp": appliance_ip
     }
-    response = requests.post(url, headers=headers, json=payload)
+    response = meraki_api.post(url, headers=headers, json=payload)
     if response.ok:
         console.print(f"✅ VLAN '{name}' created successfully.", style="green")
+        record_vlans(base_url, headers, network_id, [(vlan_id, name, subnet)])
     else:
         console.print(f"❌ Failed to create VLAN: {response.text}", style="red")
 
+def show_overlaps(rows, title="Address Overlaps"):
+    table = Table(title=title, show_header=True, header_style="bold magenta")
+    for col in ("Severity", "Subnet", "Source", "Network", "Name", "Overlaps", "Source", "Network", "Name"):
+        table.add_column(col)
+    styles = {"conflict": "bold red", "same-network": "yellow", "overlap": "cyan"}
+    for r in rows:
+        style = styles[r["severity"]]
+        table.add_row(f"[{style}]{r['severity']}[/{style}]", r["subnet_a"], r["source_a"], r["network_a"],
+                      str(r["name_a"]), f"{r['subnet_b']} ({r['relation']})", r["source_b"], r["network_b"],
+                      str(r["name_b"]))
+    console.print(table)
+
+def preflight_vlans(base_url, headers, network_id, vlans):
+    """Check ``(vlan_id, name, subnet)`` against the org address plan; True if the push should go ahead."""
+    from address_plan import get_plan
+
+    try:
+        org_id = get_org_id(base_url, headers, network_id)
+        with console.status("🔎 Checking the organization's address plan..."):
+            plan = get_plan(headers, org_id)
+    except Exception as e:
+        console.print(f"⚠️ Address plan check skipped: {e}", style="yellow")
+        return True
+    try:
+        rows = plan.check_vlans(network_id, vlans)
+    except ValueError as e:
+        console.print(f"❌ Invalid subnet: {e}", style="red")
+        return False
+    if not rows:
+        console.print(f"✅ No overlap with the {len(plan.entries)} subnets in the organization.", style="green")
+        return True
+    show_overlaps(rows, title=f"⚠️ {len(rows)} overlap(s) with existing address space")
+    return Confirm.ask("Create / update these VLANs anyway?", default=False)
+
+def record_vlans(base_url, headers, network_id, vlans, removed=()):
+    """Keep the cached address plan in step with VLANs just written (see ``address_plan.record_vlans``)."""
+    import address_plan
+
+    if not (vlans or removed):
+        return
+    try:
+        address_plan.record_vlans(get_org_id(base_url, headers, network_id), network_id, vlans, removed)
+    except Exception as e:
+        console.print(f"⚠️ Address plan cache not updated: {e}", style="yellow")
+
+def address_plan_report(base_url, headers, network_id):
+    from address_plan import get_plan, find_overlaps, REPORT_FIELDS
+    from report_writer import export_rows, ask_export_formats
+
+    try:
+        org_id = get_org_id(base_url, headers, network_id)
+        with console.status("📡 Collecting VLANs, L3 interfaces and VPN subnets..."):
+            plan = get_plan(headers, org_id, refresh=True)
+    except Exception as e:
+        console.print(f"❌ Failed to collect the address plan: {e}", style="red")
+        return
+    for ref, error in plan.errors.items():
+        console.print(f"⚠️ {ref}: {error}", style="yellow")
+
+    rows = find_overlaps(plan.entries)
+    counts = {}
+    for row in rows:
+        counts[row["severity"]] = counts.get(row["severity"], 0) + 1
+    console.print(f"📊 {len(plan.entries)} subnets: " + (", ".join(f"{n} {s}" for s, n in counts.items()) or "no overlaps"))
+    if not rows:
+        return
+    show_overlaps(rows[:50], title="🗺️ Address plan overlaps" + (" (first 50)" if len(rows) > 50 else ""))
+    if Confirm.ask("📤 Export the overlaps?", default=True):
+        export_rows(rows, "address_plan_overlaps", formats=ask_export_formats(), fieldnames=REPORT_FIELDS,
+                    total=len(rows))
+
+def load_vlans_yaml(filepath=None):
+    filepath = filepath or os.path.join(BULK_DIR, "vlans.yaml")
+    return bulk_input.load_records(filepath, "vlans")
+
+# YAML keys are snake_case; the API wants camelCase
+VLAN_FIELD_MAP = {"appliance_ip": "applianceIp", "group_policy_id": "groupPolicyId",
+                  "dns_nameservers": "dnsNameservers", "dhcp_handling": "dhcpHandling",
+                  "dhcp_lease_time": "dhcpLeaseTime", "template_vlan_type": "templateVlanType"}
+
+def vlan_payload(vlan):
+    """API payload for one YAML VLAN entry (only the fields the file sets)."""
+    payload = {"id": int(vlan["id"])}
+    for key, value in vlan.items():
+        if key != "id":
+            payload[VLAN_FIELD_MAP.get(key, key)] = value
+    return payload
+
+def _same_value(field, current, desired):
+    if field == "subnet" and current and desired:
+        try:
+            return ipaddress.ip_network(current, strict=False) == ipaddress.ip_network(desired, strict=False)
+        except ValueError:
+            pass
+    return current == desired
+
+def plan_vlans(current_vlans, desired_vlans, prune=False):
+    """Diff live VLANs against the YAML: one create/update/delete/noop action per VLAN.
+
+    Updates carry only the fields that differ.  VLANs missing from the file
+    are deleted only when ``prune`` is set.
+    """
+    current = {int(v["id"]): v for v in current_vlans}
+    plan = []
+    desired_ids = set()
+
+    for vlan in desired_vlans:
+        payload = vlan_payload(vlan)
+        vlan_id = payload["id"]
+        desired_ids.add(vlan_id)
+        live = current.get(vlan_id)
+        if live is None:
+            plan.append({"action": "create", "vlanId": vlan_id, "name": payload.get("name"), "payload": payload,
+                         "changes": {k: (None, v) for k, v in payload.items() if k != "id"}})
+            continue
+        changes = {k: (live.get(k), v) for k, v in payload.items()
+                   if k != "id" and not _same_value(k, live.get(k), v)}
+        plan.append({"action": "update" if changes else "noop", "vlanId": vlan_id, "name": payload.get("name"),
+                     "payload": {k: new for k, (_, new) in changes.items()}, "changes": changes})
+
+    if prune:
+        for vlan_id, live in sorted(current.items()):
+            if vlan_id not in desired_ids:
+                plan.append({"action": "delete", "vlanId": vlan_id, "name": live.get("name"),
+                             "payload": None, "changes": {}})
+    return plan
+
+def _apply_vlan_action(base_url, headers, network_id, item):
+    url = f"{base_url}/networks/{network_id}/appliance/vlans"
+    if item["action"] == "create":
+        return meraki_api.post(url, headers=headers, json=item["payload"])
+    if item["action"] == "update":
+        return meraki_api.put(f"{url}/{item['vlanId']}", headers=headers, json=item["payload"])
+    return meraki_api.delete(f"{url}/{item['vlanId']}", headers=headers)
+
+def apply_vlan_plan(base_url, headers, network_id, plan, max_workers=meraki_api.MAX_WORKERS):
+    """Execute the non-noop actions concurrently (deletes first, so freed subnets can be reused).
+
+    Returns one result dict per plan entry.
+    """
+    results = {}
+    for item in plan:
+        if item["action"] == "noop":
+            results[item["vlanId"]] = (item, None, None)
+
+    def apply(item):
+        return _apply_vlan_action(base_url, headers, network_id, item)
+
+    deletes = [i for i in plan if i["action"] == "delete"]
+    writes = [i for i in plan if i["action"] in ("create", "update")]
+    for batch in (deletes, writes):
+        for item, response, error in meraki_api.parallel_map(apply, batch, max_workers=max_workers):
+            results[item["vlanId"]] = (item, response, error)
+
+    rows = []
+    for item in plan:
+        _, response, error = results[item["vlanId"]]
+        ok = error is None and (response is None or response.ok)
+        rows.append({
+            "networkId": network_id,
+            "vlanId": item["vlanId"],
+            "name": item["name"],
+            "action": item["action"],
+            "changes": ",".join(item["changes"]),
+            "ok": ok,
+            "status": response.status_code if response is not None else None,
+            "error": None if ok else (str(error) if error else response.text)
+        })
+    return rows
+
+def get_vlans(base_url, headers, network_id):
+    response = meraki_api.get(f"{base_url}/networks/{network_id}/appliance/vlans", headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+def push_vlans(base_url, headers, network_id, vlans, prune=False, dry_run=False):
+    """Reconcile the network's VLANs with ``vlans``: one GET, then only the needed writes.
+
+    Returns one result dict per VLAN (``action`` is create/update/delete/noop).
+    With ``dry_run`` nothing is written and every row reports ``ok`` with no status.
+    """
+    plan = plan_vlans(get_vlans(base_url, headers, network_id), vlans, prune=prune)
+    if dry_run:
+        return [{"networkId": network_id, "vlanId": i["vlanId"], "name": i["name"], "action": i["action"],
+                 "changes": ",".join(i["changes"]), "ok": True, "status": None, "error": None} for i in plan]
+    return apply_vlan_plan(base_url, headers, network_id, plan)
+
+def show_vlan_plan(plan):
+    table = Table(title="🗂️ VLAN Reconcile Plan", show_header=True, header_style="bold magenta")
+    table.add_column("VLAN", justify="right")
+    table.add_column("Name", style="cyan")
+    table.add_column("Action")
+    table.add_column("Changes")
+    styles = {"create": "green", "update": "yellow", "delete": "red", "noop": "dim"}
+    for item in plan:
+        changes = ", ".join(f"{k}: {old} → {new}" for k, (old, new) in item["changes"].items())
+        action = item["action"]
+        table.add_row(str(item["vlanId"]), str(item["name"] or ""), f"[{styles[action]}]{action}[/{styles[action]}]",
+                      changes if action == "update" else "")
+    console.print(table)
+
 def configure_vlan_bulk(base_url, headers, network_id):
-    filepath = os.path.join(BULK_DIR, "vlans.yaml")
-    with open(filepath) as file:
-        data = yaml.safe_load(file)
-
-    for vlan in data["vlans"]:
-        url = f"{base_url}/networks/{network_id}/appliance/vlans"
-        payload = {
-            "id": vlan["id"],
-            "name": vlan["name"],
-            "subnet": vlan["subnet"],
-            "applianceIp": vlan["appliance_ip"]
-        }
-        response = requests.post(url, headers=headers, json=payload)
-        if response.ok:
-            console.print(f"✅ VLAN '{vlan['name']}' created.", style="green")
+    try:
+        current = get_vlans(base_url, headers, network_id)
+    except Exception as e:
+        console.print(f"❌ Failed to fetch current VLANs: {e}", style="red")
+        return
+
+    try:
+        desired = load_vlans_yaml()
+    except (OSError, ValueError) as e:
+        console.print(f"❌ {e}", style="red")
+        return
+    desired_ids = {int(v["id"]) for v in desired}
+    prune = False
+    extra = [v for v in current if int(v["id"]) not in desired_ids]
+    if extra:
+        names = ", ".join(f"{v['id']} ({v.get('name', '')})" for v in extra)
+        prune = Confirm.ask(f"🗑️ Delete VLANs not in vlans.yaml? {names}", default=False)
+
+    plan = plan_vlans(current, desired, prune=prune)
+    show_vlan_plan(plan)
+    if all(item["action"] == "noop" for item in plan):
+        console.print("✅ VLANs already match vlans.yaml. Nothing to do.", style="green")
+        return
+    new_subnets = [(i["vlanId"], i["name"], i["payload"]["subnet"]) for i in plan
+                   if i["action"] in ("create", "update") and i["payload"].get("subnet")]
+    if new_subnets and not preflight_vlans(base_url, headers, network_id, new_subnets):
+        return
+    if not Confirm.ask("🚀 Apply this plan?", default=True):
+        return
+
+    written, removed = [], []
+    subnets = {vlan_id: (name, subnet) for vlan_id, name, subnet in new_subnets}
+    for result in apply_vlan_plan(base_url, headers, network_id, plan):
+        if result["action"] == "noop":
+            continue
+        if result["ok"]:
+            console.print(f"✅ VLAN {result['vlanId']} '{result['name']}' {result['action']}d.", style="green")
+            if result["action"] == "delete":
+                removed.append(result["vlanId"])
+            elif result["vlanId"] in subnets:
+                written.append((result["vlanId"], *subnets[result["vlanId"]]))
         else:
-            console.print(f"❌ Error adding VLAN '{vlan['name']}': {response.text}", style="red")
+            console.print(f"❌ Failed to {result['action']} VLAN {result['vlanId']} '{result['name']}': {result['error']}", style="red")
+    record_vlans(base_url, headers, network_id, written, removed)
 
 # ------------------------- DHCP Configuration ------------------------- #
 def configure_dhcp(base_url, headers, network_id):
     # First, show a list of existing VLANs
     url = f"{base_url}/networks/{network_id}/appliance/vlans"
-    response = requests.get(url, headers=headers)
+    response = meraki_api.get(url, headers=headers)
 
     if not response.ok:
         console.print(f"❌ Failed to fetch VLANs: {response.text}", style="red")
@@ -85,7 +318,7 @@ def configure_dhcp(base_url, headers, network_id):
 
     # PUT the update
     update_url = f"{base_url}/networks/{network_id}/appliance/vlans/{vlan_id}"
-    update_response = requests.put(update_url, headers=headers, json=payload)
+    update_response = meraki_api.put(update_url, headers=headers, json=payload)
 
     if update_response.ok:
         console.print(f"✅ DHCP configuration for VLAN {vlan_id} updated successfully.", style="green")
@@ -94,6 +327,136 @@ def configure_dhcp(base_url, headers, network_id):
 
 
 
+# ------------------------- Bulk DHCP Binding Engine ------------------------- #
+def _ip_in_ranges(ip, ranges):
+    for r in ranges:
+        try:
+            if ipaddress.ip_address(r["start"]) <= ip <= ipaddress.ip_address(r["end"]):
+                return r
+        except (KeyError, ValueError):
+            continue
+    return None
+
+def _validate_range(item, subnet):
+    try:
+        start, end = ipaddress.ip_address(item["start"]), ipaddress.ip_address(item["end"])
+    except (KeyError, ValueError) as e:
+        return f"invalid range {item}: {e}"
+    if start > end:
+        return f"range {start}-{end}: start is after end"
+    if subnet and (start not in subnet or end not in subnet):
+        return f"range {start}-{end} is outside {subnet}"
+    return None
+
+def plan_dhcp_bindings(current_vlans, fixed_ips=(), reserved_ranges=None):
+    """Merge fixed IP / reserved range entries into one change per VLAN.
+
+    ``fixed_ips`` entries (vlan_id, mac, ip, name) are added to the VLAN's
+    existing assignments; ``reserved_ranges`` entries (vlan_id, start, end,
+    comment) replace the ranges of the VLANs they mention.  Every IP must be
+    inside the VLAN subnet, outside the (resulting) reserved ranges and not
+    already bound to another MAC.
+
+    Returns ``(changes, errors)``: ``changes`` maps VLAN ID to the payload
+    holding only the fields that differ, ``errors`` lists (vlan_id, message).
+    """
+    vlans = {str(v["id"]): v for v in current_vlans}
+    fixed_by_vlan, ranges_by_vlan = {}, {}
+    for entry in fixed_ips:
+        fixed_by_vlan.setdefault(str(entry["vlan_id"]), []).append(entry)
+    for item in reserved_ranges or []:
+        ranges_by_vlan.setdefault(str(item["vlan_id"]), []).append(
+            {"start": item["start"], "end": item["end"], "comment": item.get("comment", "")})
+
+    changes, errors = {}, []
+    for vlan_id in sorted(set(fixed_by_vlan) | set(ranges_by_vlan), key=lambda v: int(v) if v.isdigit() else v):
+        vlan = vlans.get(vlan_id)
+        if vlan is None:
+            errors.append((vlan_id, "VLAN does not exist on this network"))
+            continue
+        try:
+            subnet = ipaddress.ip_network(vlan.get("subnet"), strict=False)
+        except (TypeError, ValueError):
+            subnet = None
+        payload = {}
+
+        current_ranges = vlan.get("reservedIpRanges") or []
+        ranges = current_ranges
+        if vlan_id in ranges_by_vlan:
+            ranges = []
+            for item in ranges_by_vlan[vlan_id]:
+                problem = _validate_range(item, subnet)
+                if problem:
+                    errors.append((vlan_id, problem))
+                else:
+                    ranges.append(item)
+            if ranges != current_ranges:
+                payload["reservedIpRanges"] = ranges
+
+        if vlan_id in fixed_by_vlan:
+            current_fixed = vlan.get("fixedIpAssignments") or {}
+            merged = {mac.lower(): dict(binding) for mac, binding in current_fixed.items()}
+            ip_owner = {binding.get("ip"): mac for mac, binding in merged.items()}
+            appliance_ip = vlan.get("applianceIp")
+            for entry in fixed_by_vlan[vlan_id]:
+                mac, name = str(entry["mac"]).lower(), entry.get("name", "")
+                try:
+                    ip = ipaddress.ip_address(str(entry["ip"]))
+                except ValueError as e:
+                    errors.append((vlan_id, f"{mac}: {e}"))
+                    continue
+                in_range = _ip_in_ranges(ip, ranges)
+                if subnet and ip not in subnet:
+                    errors.append((vlan_id, f"{mac}: {ip} is outside {subnet}"))
+                elif in_range:
+                    errors.append((vlan_id, f"{mac}: {ip} is inside reserved range {in_range['start']}-{in_range['end']}"))
+                elif str(ip) == appliance_ip:
+                    errors.append((vlan_id, f"{mac}: {ip} is the appliance IP"))
+                elif ip_owner.get(str(ip), mac) != mac:
+                    errors.append((vlan_id, f"{mac}: {ip} is already bound to {ip_owner[str(ip)]}"))
+                else:
+                    old = merged.get(mac)
+                    if old and old.get("ip") in ip_owner:
+                        ip_owner.pop(old["ip"])
+                    merged[mac] = {"ip": str(ip), "name": name}
+                    ip_owner[str(ip)] = mac
+            if merged != {mac.lower(): b for mac, b in current_fixed.items()}:
+                payload["fixedIpAssignments"] = merged
+
+        if payload:
+            changes[vlan_id] = payload
+    return changes, errors
+
+def apply_dhcp_bindings(base_url, headers, network_id, changes, max_workers=meraki_api.MAX_WORKERS):
+    """One PUT per changed VLAN, VLANs in parallel; yields ``(vlan_id, ok, detail)``."""
+    def put(vlan_id):
+        url = f"{base_url}/networks/{network_id}/appliance/vlans/{vlan_id}"
+        return meraki_api.put(url, headers=headers, json=changes[vlan_id])
+
+    for vlan_id, response, error in meraki_api.parallel_map(put, list(changes), max_workers=max_workers):
+        if error:
+            yield vlan_id, False, str(error)
+        else:
+            yield vlan_id, response.ok, None if response.ok else response.text
+
+def run_dhcp_bindings(base_url, headers, network_id, fixed_ips=(), reserved_ranges=None):
+    """Fetch the VLANs once, validate and merge, show problems, then apply."""
+    current = get_vlans(base_url, headers, network_id)
+    changes, errors = plan_dhcp_bindings(current, fixed_ips, reserved_ranges)
+
+    for vlan_id, message in errors:
+        console.print(f"[yellow]⚠️ VLAN {vlan_id}: {message} (skipped)[/yellow]")
+    if not changes:
+        console.print("[green]✅ Nothing to change.[/green]")
+        return
+
+    for vlan_id, ok, detail in apply_dhcp_bindings(base_url, headers, network_id, changes):
+        fields = " and ".join("fixed IPs" if k == "fixedIpAssignments" else "reserved ranges" for k in changes[vlan_id])
+        if ok:
+            console.print(f"[green]✅ VLAN {vlan_id}: {fields} updated[/green]")
+        else:
+            console.print(f"[red]❌ VLAN {vlan_id}: failed to update {fields}: {detail}[/red]")
+
 # ------------------------- Fixed IP or MAC Binding bulk Configuration ------------------------- #
 def configure_fixed_ip_bulk(base_url, headers, network_id):
     yaml_path = os.path.join(BULK_DIR, "fixed_ips.yaml")
@@ -102,73 +465,56 @@ def configure_fixed_ip_bulk(base_url, headers, network_id):
         return
 
     try:
-        with open(yaml_path, 'r') as file:
-            data = yaml.safe_load(file)
-
-        fixed_ips = data.get("fixed_ips", [])
-        if not fixed_ips:
-            console.print("[red]❌ No fixed IP entries found in YAML.[/red]")
-            return
-
-        for entry in fixed_ips:
-            vlan_id = str(entry["vlan_id"])
-            mac = entry["mac"]
-            ip = entry["ip"]
-            name = entry["name"]
-
-            # Fetch current VLAN config
-            url = f"{base_url}/networks/{network_id}/appliance/vlans/{vlan_id}"
-            get_response = requests.get(url, headers=headers)
-            if not get_response.ok:
-                console.print(f"[red]❌ Failed to retrieve VLAN {vlan_id}: {get_response.text}[/red]")
-                continue
-
-            vlan_config = get_response.json()
-            fixed_assignments = vlan_config.get("fixedIpAssignments", {})
-            fixed_assignments[mac] = {"ip": ip, "name": name}
-
-            vlan_config["fixedIpAssignments"] = fixed_assignments
-
-            put_response = requests.put(url, headers=headers, json=vlan_config)
-            if put_response.ok:
-                console.print(f"[green]✅ Reserved {ip} for {mac} in VLAN {vlan_id}[/green]")
-            else:
-                console.print(f"[red]❌ Failed to reserve IP {ip} for MAC {mac}: {put_response.text}[/red]")
+        # streamed: the plan reads every entry (and raises on invalid ones) before anything is pushed
+        fixed_ips = bulk_input.iter_records(yaml_path, "fixed_ips")
+        run_dhcp_bindings(base_url, headers, network_id, fixed_ips=fixed_ips)
 
     except Exception as e:
         console.print(f"[red]❌ Error in bulk Fixed IP config: {str(e)}[/red]")
 
 # ------------------------- DHCP bulk Configuration ------------------------- #
+def plan_dhcp_settings(current_vlans, dhcp_settings):
+    """Changed fields per VLAN for ``dhcp.yaml`` entries; returns ``(changes, errors)`` like plan_dhcp_bindings."""
+    vlans = {str(v["id"]): v for v in current_vlans}
+    changes, errors = {}, []
+    for entry in dhcp_settings:
+        settings = {k: v for k, v in entry.items() if k != "vlan_id"}
+        vlan_id = str(entry.get("vlan_id", ""))
+        live = vlans.get(vlan_id)
+        if live is None:
+            errors.append((vlan_id, "VLAN does not exist on this network"))
+            continue
+        payload = {k: v for k, v in settings.items() if not _same_value(k, live.get(k), v)}
+        if payload:
+            changes[vlan_id] = payload
+    return changes, errors
+
 def configure_dhcp_bulk(base_url, headers, network_id):
     console.print("\n[bold yellow]Bulk DHCP Configuration[/bold yellow]")
 
-    yaml_path = "bulk_configs/dhcp.yaml"
+    yaml_path = os.path.join(BULK_DIR, "dhcp.yaml")
     if not os.path.exists(yaml_path):
         console.print(f"[red]❌ YAML file not found at {yaml_path}[/red]")
         return
 
     try:
-        with open(yaml_path, "r") as file:
-            data = yaml.safe_load(file)
-
-        dhcp_configs = data.get("dhcp_settings", [])
+        dhcp_configs = bulk_input.load_records(yaml_path, "dhcp")
         if not dhcp_configs:
             console.print("[red]❌ No DHCP settings found in YAML.[/red]")
             return
 
-        for config in dhcp_configs:
-            vlan_id = config.pop("vlan_id", None)
-            if not vlan_id:
-                console.print("[red]❌ Missing 'vlan_id' in one DHCP config entry.[/red]")
-                continue
-
-            url = f"{base_url}/networks/{network_id}/appliance/vlans/{vlan_id}"
-            response = requests.put(url, headers=headers, json=config)
+        changes, errors = plan_dhcp_settings(get_vlans(base_url, headers, network_id), dhcp_configs)
+        for vlan_id, message in errors:
+            console.print(f"[yellow]⚠️ VLAN {vlan_id}: {message} (skipped)[/yellow]")
+        if not changes:
+            console.print("[green]✅ DHCP settings already match dhcp.yaml.[/green]")
+            return
 
-            if response.ok:
+        for vlan_id, ok, detail in apply_dhcp_bindings(base_url, headers, network_id, changes):
+            if ok:
                 console.print(f"[green]✅ DHCP settings updated for VLAN {vlan_id}[/green]")
             else:
-                console.print(f"[red]❌ Error in bulk DHCP config for VLAN {vlan_id}:[/red] {response.text}")
+                console.print(f"[red]❌ Error in bulk DHCP config for VLAN {vlan_id}:[/red] {detail}")
 
     except Exception as e:
         console.print(f"[red]❌ Exception during bulk DHCP config:[/red] {e}")
@@ -177,33 +523,8 @@ def configure_dhcp_bulk(base_url, headers, network_id):
 def configure_reserved_range_bulk(base_url, headers, network_id):
     file_path = os.path.join(BULK_DIR, "reserved_ranges.yaml")
     try:
-        with open(file_path, 'r') as file:
-            data = yaml.safe_load(file)
-
-        reserved_ranges = data.get("reserved_ranges", [])
-        vlan_range_map = {}
-
-        for item in reserved_ranges:
-            vlan_id = str(item["vlan_id"])
-            vlan_range_map.setdefault(vlan_id, []).append({
-                "start": item["start"],
-                "end": item["end"],
-                "comment": item.get("comment", "")
-            })
-
-        for vlan_id, ranges in vlan_range_map.items():
-            url = f"{base_url}/networks/{network_id}/appliance/vlans/{vlan_id}"
-            get_response = requests.get(url, headers=headers)
-            if get_response.ok:
-                vlan_data = get_response.json()
-                vlan_data["reservedIpRanges"] = ranges
-                put_response = requests.put(url, headers=headers, json=vlan_data)
-                if put_response.ok:
-                    console.print(f"✅ Reserved IP ranges configured for VLAN {vlan_id}", style="bold green")
-                else:
-                    console.print(f"❌ Failed to configure reserved range for VLAN {vlan_id}: {put_response.text}", style="bold red")
-            else:
-                console.print(f"❌ VLAN {vlan_id} not found: {get_response.text}", style="bold red")
+        reserved_ranges = bulk_input.load_records(file_path, "reserved_ranges")
+        run_dhcp_bindings(base_url, headers, network_id, reserved_ranges=reserved_ranges)
     except Exception as e:
         console.print(f"❌ Error reading YAML file or applying reserved ranges: {e}", style="bold red")
 
@@ -216,8 +537,10 @@ def configure_firewall_menu(base_url, headers, network_id):
         console.print("2. Configure [bold]Inbound[/bold] Firewall Rules (Manual/YAML)")
         console.print("3. Bulk Configure [bold green]L3 Outbound[/bold green] from YAML")
         console.print("4. Bulk Configure [bold green]Inbound[/bold green] from YAML")
-        console.print("5. [bold]Return[/bold] to Appliance Menu")
-        choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5"], default="5")
+        console.print("5. Analyze rules (shadowed / redundant / conflicting) across networks")
+        console.print("6. Simulate flows (would this traffic be allowed?)")
+        console.print("7. [bold]Return[/bold] to Appliance Menu")
+        choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5", "6", "7"], default="7")
 
         if choice == "1":
             configure_l3_firewall_rules(base_url, headers, network_id)
@@ -227,6 +550,10 @@ def configure_firewall_menu(base_url, headers, network_id):
             configure_l3_firewall_bulk(base_url, headers, network_id)
         elif choice == "4":
             configure_inbound_firewall_bulk(base_url, headers, network_id)
+        elif choice == "5":
+            firewall_analysis_report(base_url, headers, network_id)
+        elif choice == "6":
+            firewall_simulation(base_url, headers, network_id)
         else:
             break
 
@@ -255,15 +582,232 @@ def display_rules(rules):
     console.print(table)
 
 
+def display_findings(findings, title="Firewall Rule Analysis"):
+    table = Table(title=title, show_lines=False)
+    table.add_column("Rule", justify="center")
+    table.add_column("Finding")
+    table.add_column("Vs.", justify="center")
+    table.add_column("Comment")
+    table.add_column("Detail")
+    styles = {"shadowed": "bold red", "conflicting": "yellow", "redundant": "cyan"}
+    for f in findings:
+        style = styles.get(f["type"], "red")
+        table.add_row("" if f["rule"] is None else str(f["rule"]), f"[{style}]{f['type']}[/{style}]",
+                      "" if f["other"] is None else str(f["other"]), str(f["comment"]), f["detail"])
+    console.print(table)
+
+
+def review_firewall_rules(rules):
+    """Analyze ``rules`` before a PUT; returns True if the push should go ahead."""
+    from firewall_analyzer import analyze_rules
+
+    findings = analyze_rules(rules)
+    if not findings:
+        console.print(f"✅ {len(rules)} rules analyzed: no shadowed, redundant or conflicting rules.", style="green")
+        return True
+    display_findings(findings, title=f"⚠️ {len(findings)} finding(s) in the rules about to be pushed")
+    return Confirm.ask("Push these rules anyway?", default=False)
+
+
+def get_org_id(base_url, headers, network_id):
+    response = meraki_api.get(f"{base_url}/networks/{network_id}", headers=headers)
+    response.raise_for_status()
+    return response.json()["organizationId"]
+
+
+def get_org_appliance_networks(base_url, headers, org_id):
+    return [n for n in meraki_api.get_all_pages(f"{base_url}/organizations/{org_id}/networks", headers=headers)
+            if "appliance" in n.get("productTypes", [])]
+
+
+def firewall_analysis_report(base_url, headers, network_id):
+    from firewall_analyzer import analyze_networks, REPORT_FIELDS
+    from report_writer import export_rows, ask_export_formats
+
+    scope = Prompt.ask("Analyze [1] this network, [2] listed network IDs, [3] every appliance network in the org",
+                       choices=["1", "2", "3"], default="1")
+    if scope == "1":
+        networks = [{"id": network_id, "name": network_id}]
+    elif scope == "2":
+        ids = [n.strip() for n in Prompt.ask("Network IDs (comma-separated)").split(",") if n.strip()]
+        networks = [{"id": n, "name": n} for n in ids]
+    else:
+        try:
+            networks = get_org_appliance_networks(base_url, headers, get_org_id(base_url, headers, network_id))
+        except Exception as e:
+            console.print(f"❌ Failed to list the organization's networks: {e}", style="bold red")
+            return
+
+    rule_type = Prompt.ask("Rule set", choices=["l3", "inbound", "both"], default="l3")
+    rule_types = ("l3", "inbound") if rule_type == "both" else (rule_type,)
+
+    with console.status(f"Analyzing {len(networks)} network(s)..."):
+        rows, errors = analyze_networks(headers, networks, rule_types)
+
+    for (net_id, kind), error in errors.items():
+        console.print(f"❌ {net_id} ({kind}): {error}", style="bold red")
+    if not rows:
+        console.print(f"✅ No findings in {len(networks)} network(s).", style="green")
+        return
+
+    summary = Table(title="🔍 Firewall Findings by Network")
+    summary.add_column("Network", style="cyan")
+    for kind in ("shadowed", "redundant", "conflicting"):
+        summary.add_column(kind.capitalize(), justify="right")
+    per_net = {}
+    for row in rows:
+        counts = per_net.setdefault((row["network_name"], row["rule_type"]), {})
+        counts[row["type"]] = counts.get(row["type"], 0) + 1
+    for (name, kind), counts in sorted(per_net.items()):
+        summary.add_row(f"{name} ({kind})", *(str(counts.get(k, 0)) for k in ("shadowed", "redundant", "conflicting")))
+    console.print(summary)
+
+    if len(networks) == 1:
+        display_findings(rows)
+    if Confirm.ask("📤 Export the findings?", default=True):
+        export_rows(rows, "firewall_analysis", formats=ask_export_formats(), fieldnames=REPORT_FIELDS, total=len(rows))
+
+
+def _load_rule_file(prompt, default):
+    return bulk_input.load_records(Prompt.ask(prompt, default=default), "firewall")
+
+
+def _show_flow_decisions(ruleset, matches):
+    allowed = int(ruleset.allowed(matches).sum())
+    console.print(f"📊 {len(matches):,} flows: [green]{allowed:,} allowed[/green], "
+                  f"[red]{len(matches) - allowed:,} denied[/red]")
+    table = Table(title="Flows per matching rule (top 15)")
+    table.add_column("Rule", justify="center")
+    table.add_column("Policy")
+    table.add_column("Comment")
+    table.add_column("Flows", justify="right")
+    for index, count in sorted(ruleset.hit_counts(matches).items(), key=lambda kv: -kv[1])[:15]:
+        rule = ruleset.rules[index] if index >= 0 else {
+            "policy": ruleset.default_policy, "comment": f"(no match: default {ruleset.default_policy})"}
+        table.add_row("" if index < 0 else str(index), rule.get("policy", ""), rule.get("comment", ""), f"{count:,}")
+    console.print(table)
+
+
+def firewall_simulation(base_url, headers, network_id):
+    from firewall_simulator import (compile_rules, load_flows, flows_from_events, compare, policy_object_aliases,
+                                    simulate_networks, SIMULATION_FIELDS)
+    from report_writer import export_rows, ask_export_formats
+
+    rule_type = Prompt.ask("Rule set", choices=["l3", "inbound"], default="l3")
+    try:
+        if Prompt.ask("Rules from [1] this network, [2] a YAML file", choices=["1", "2"], default="1") == "1":
+            from firewall_analyzer import get_rules
+            rules = get_rules(headers, network_id, rule_type)
+        else:
+            rules = _load_rule_file("YAML rule file", str(BULK_DIR / f"{rule_type}_firewall_rules.yaml"))
+        org_id = get_org_id(base_url, headers, network_id)
+        aliases = None
+        ruleset = compile_rules(rules)
+        if ruleset.unresolved:
+            aliases = policy_object_aliases(headers, org_id)
+            ruleset = compile_rules(rules, aliases)
+    except Exception as e:
+        console.print(f"❌ Failed to load rules: {e}", style="bold red")
+        return
+
+    console.print(f"⚙️ Compiled {len(ruleset)} rules.")
+    for index, tokens in ruleset.unresolved.items():
+        console.print(f"⚠️ Rule {index}: {', '.join(tokens)} cannot be resolved and never matches.", style="yellow")
+    for index, error in ruleset.skipped.items():
+        console.print(f"⚠️ Rule {index} skipped: {error}", style="yellow")
+
+    mode = Prompt.ask("[1] Check single flows, [2] replay a flow CSV, [3] replay this network's flow events",
+                      choices=["1", "2", "3"], default="1")
+    if mode == "1":
+        while True:
+            try:
+                index, rule, decision = ruleset.check(Prompt.ask("Source IP"), Prompt.ask("Destination IP"),
+                                                      Prompt.ask("Protocol", default="tcp"),
+                                                      Prompt.ask("Destination port", default="443"))
+            except ValueError as e:
+                console.print(f"❌ {e}", style="bold red")
+            else:
+                style = "bold green" if decision == "allow" else "bold red"
+                matched = f"rule {index} ({rule.get('comment', '')})" if rule else f"no rule (default {decision})"
+                console.print(f"[{style}]{decision.upper()}[/{style}] by {matched}")
+            if not Confirm.ask("Check another flow?", default=True):
+                return
+
+    try:
+        if mode == "2":
+            flows = load_flows(Prompt.ask("Flow CSV (src,dst,protocol,dport[,sport])"))
+        else:
+            from troubleshooting import fetch_events
+            days = Prompt.ask("Days of events", default="1")
+            events, _, _ = fetch_events(base_url, headers, network_id, days, "appliance", verbose=False)
+            flows = flows_from_events(events)
+    except Exception as e:
+        console.print(f"❌ Failed to load flows: {e}", style="bold red")
+        return
+    if not len(flows):
+        console.print("⚠️ No flows to replay.", style="yellow")
+        return
+
+    with console.status(f"Evaluating {len(flows):,} flows..."):
+        matches = ruleset.evaluate(flows)
+    _show_flow_decisions(ruleset, matches)
+
+    if not Confirm.ask("Compare with a proposed rule file?", default=False):
+        return
+    try:
+        proposed_rules = _load_rule_file("Proposed YAML rule file", str(BULK_DIR / f"{rule_type}_firewall_rules.yaml"))
+        proposed = compile_rules(proposed_rules, aliases)
+        if proposed.unresolved and aliases is None:     # OBJ()/GRP() only in the proposed rules
+            aliases = policy_object_aliases(headers, org_id)
+            proposed = compile_rules(proposed_rules, aliases)
+    except Exception as e:
+        console.print(f"❌ {e}", style="bold red")
+        return
+    result = compare(ruleset, proposed, flows)
+    console.print(f"🔁 {result['changed']:,} of {result['flows']:,} flows change: "
+                  f"[red]{result['newly_denied']:,} newly denied[/red], "
+                  f"[green]{result['newly_allowed']:,} newly allowed[/green]")
+    if result["transitions"]:
+        table = Table(title="Changed decisions (top 15)")
+        for col in ("Current rule", "Proposed rule", "Current", "Proposed", "Flows"):
+            table.add_column(col, justify="center")
+        for t in result["transitions"][:15]:
+            table.add_row(str(t["current_rule"]), str(t["proposed_rule"]), t["current"], t["proposed"], f"{t['flows']:,}")
+        console.print(table)
+
+    if not Confirm.ask("Check the proposed rules against every appliance network in the org?", default=False):
+        return
+    networks = get_org_appliance_networks(base_url, headers, org_id)
+    if aliases is None:         # other networks' live rules may use objects / groups
+        try:
+            aliases = policy_object_aliases(headers, org_id)
+        except Exception as e:
+            console.print(f"⚠️ Policy objects unavailable, OBJ()/GRP() rules will not match: {e}", style="yellow")
+    with console.status(f"Replaying {len(flows):,} flows in {len(networks)} network(s)..."):
+        rows, errors = simulate_networks(headers, networks, flows, rule_type, proposed_rules, aliases)
+    for net_id, error in errors.items():
+        console.print(f"❌ {net_id}: {error}", style="bold red")
+    table = Table(title="🔁 Proposed rules vs. live rules by network")
+    table.add_column("Network", style="cyan")
+    for col in ("Rules", "Changed", "Newly denied", "Newly allowed"):
+        table.add_column(col, justify="right")
+    for row in rows:
+        table.add_row(row["network_name"], str(row["rules"]), f"{row['changed']:,}",
+                      f"{row['newly_denied']:,}", f"{row['newly_allowed']:,}")
+    console.print(table)
+    if rows and Confirm.ask("📤 Export the results?", default=False):
+        export_rows(rows, "firewall_simulation", formats=ask_export_formats(), fieldnames=SIMULATION_FIELDS,
+                    total=len(rows))
+
+
 def load_yaml_rules():
     yaml_path = Prompt.ask("Enter path to YAML file")
-    with open(yaml_path, 'r') as f:
-        return yaml.safe_load(f)
+    return bulk_input.load_records(yaml_path, "firewall")
 
 
 def configure_firewall_rules(base_url, headers, network_id, rule_type):
     endpoint = f"{base_url}/networks/{network_id}/appliance/firewall/{rule_type}FirewallRules"
-    response = requests.get(endpoint, headers=headers)
+    response = meraki_api.get(endpoint, headers=headers)
     if response.status_code != 200:
         console.print(f"❌ Failed to get existing rules: {response.text}", style="bold red")
         return
@@ -275,7 +819,11 @@ def configure_firewall_rules(base_url, headers, network_id, rule_type):
     action = Prompt.ask("Would you like to overwrite or append?", choices=["overwrite", "append"], default="append")
 
     if mode == "yaml":
-        new_rules = load_yaml_rules()
+        try:
+            new_rules = load_yaml_rules()
+        except (OSError, ValueError) as e:
+            console.print(f"❌ {e}", style="bold red")
+            return
     else:
         new_rules = []
         while True:
@@ -293,9 +841,11 @@ def configure_firewall_rules(base_url, headers, network_id, rule_type):
                 break
 
     final_rules = new_rules if action == "overwrite" else existing_rules + new_rules
+    if not review_firewall_rules(final_rules):
+        return
 
     payload = {"rules": final_rules}
-    put_response = requests.put(endpoint, headers=headers, json=payload)
+    put_response = meraki_api.put(endpoint, headers=headers, json=payload)
     if put_response.status_code == 200:
         console.print("✅ Firewall rules updated successfully!", style="bold green")
     else:
@@ -318,15 +868,12 @@ def configure_l3_firewall_bulk(base_url, headers, network_id):
         return
 
     try:
-        with open(yaml_path, 'r') as file:
-            rules = yaml.safe_load(file)
-
-        if not isinstance(rules, list):
-            console.print(f"[red]❌ Invalid format. Expected a list of rules.[/red]")
+        rules = bulk_input.load_records(yaml_path, "firewall")
+        if not review_firewall_rules(rules):
             return
 
         url = f"{base_url}/networks/{network_id}/appliance/firewall/l3FirewallRules"
-        response = requests.put(url, headers=headers, json={"rules": rules})
+        response = meraki_api.put(url, headers=headers, json={"rules": rules})
 
         if response.ok:
             console.print(f"[green]✅ L3 Firewall rules updated from l3_firewall.yaml[/green]")
@@ -344,15 +891,12 @@ def configure_inbound_firewall_bulk(base_url, headers, network_id):
         return
 
     try:
-        with open(yaml_path, 'r') as file:
-            rules = yaml.safe_load(file)
-
-        if not isinstance(rules, list):
-            console.print(f"[red]❌ Invalid format. Expected a list of rules.[/red]")
+        rules = bulk_input.load_records(yaml_path, "firewall")
+        if not review_firewall_rules(rules):
             return
 
         url = f"{base_url}/networks/{network_id}/appliance/firewall/inboundFirewallRules"
-        response = requests.put(url, headers=headers, json={"rules": rules})
+        response = meraki_api.put(url, headers=headers, json={"rules": rules})
 
         if response.ok:
             console.print(f"[green]✅ Inbound Firewall rules updated from inbound_firewall.yaml[/green]")
@@ -366,7 +910,7 @@ def configure_inbound_firewall_bulk(base_url, headers, network_id):
 
 # ------------------------- Appliance Config Menu ------------------------- #
 def appliance_config_menu(network_id, headers):
-    base_url = "https://api.meraki.com/api/v1"
+    base_url = meraki_api.BASE_URL
     while True:
         console.print("\n[bold yellow]🔧 Appliance Configuration Menu[/bold yellow]", style="cyan")
         console.print("1. Configure VLAN")
@@ -376,11 +920,13 @@ def appliance_config_menu(network_id, headers):
         console.print("5. Bulk Configure Fixed IP")
         console.print("6. Bulk Configure Reserved Ranges")
         console.print("7. Configure L3 Firewall Rules")
-        console.print("8. Back to Main Menu")
+        console.print("8. Fan out to many networks (VLANs, DHCP, bindings, firewall)")
+        console.print("9. Org address plan overlap report")
+        console.print("10. Back to Main Menu")
 
 
 
-        choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5", "6", "7", "8"])
+        choice = Prompt.ask("Choose an option", choices=[str(i) for i in range(1, 11)])
 
         if choice == "1":
             configure_vlan(base_url, headers, network_id)
@@ -397,6 +943,11 @@ def appliance_config_menu(network_id, headers):
         elif choice == "7":
             configure_firewall_menu(base_url, headers, network_id)
         elif choice == "8":
+            from appliance_fanout import fanout_menu
+            fanout_menu(base_url, headers, network_id)
+        elif choice == "9":
+            address_plan_report(base_url, headers, network_id)
+        elif choice == "10":
             break
 
 
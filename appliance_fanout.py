@@ -0,0 +1,347 @@
+"""Apply one appliance bundle (VLANs, DHCP, fixed IPs / reserved ranges,
+L3 and inbound firewall rules) to many networks at once.
+
+Networks run concurrently through ``meraki_api`` (so the shared rate
+limiter paces them); the steps of one network run in order.  Every step
+is idempotent: it reads the live config and writes only what differs.
+Per-network, per-step state is saved to ``output/fanout/<run>.json`` after
+each network, so a run can be resumed later and a retry re-runs only the
+steps that did not finish.
+"""
+import json
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+from rich.console import Console
+from rich.prompt import Prompt, Confirm
+from rich.table import Table
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+
+import bulk_input
+import meraki_api
+import tracing
+from appliance_config import (BULK_DIR, get_vlans, push_vlans, plan_dhcp_settings, plan_dhcp_bindings,
+                              apply_dhcp_bindings, get_org_id, get_org_appliance_networks)
+
+console = Console()
+
+STATE_DIR = Path(__file__).resolve().parent / "output" / "fanout"
+
+STEPS = ("vlans", "dhcp", "bindings", "l3_firewall", "inbound_firewall")
+# Steps that make no sense until the listed ones succeeded
+DEPENDS = {"dhcp": ("vlans",), "bindings": ("vlans", "dhcp")}
+# Template file and bulk_input record kind
+BUNDLE_FILES = {
+    "vlans": ("vlans.yaml", "vlans"),
+    "dhcp": ("dhcp.yaml", "dhcp"),
+    "fixed_ips": ("fixed_ips.yaml", "fixed_ips"),
+    "reserved_ranges": ("reserved_ranges.yaml", "reserved_ranges"),
+    "l3_firewall": ("l3_firewall_rules.yaml", "firewall"),
+    "inbound_firewall": ("inbound_firewall_rules.yaml", "firewall"),
+}
+DONE = ("ok", "skipped")
+
+
+class StepError(Exception):
+    pass
+
+
+# ---------------- Bundle ---------------- #
+def _read(directory, name, kind):
+    path = Path(directory) / name
+    return bulk_input.load_records(path, kind) if path.exists() else None
+
+
+def load_bundle(directory=BULK_DIR, steps=STEPS):
+    """Read and validate the template files of ``steps`` from ``directory`` (missing files leave a step empty).
+
+    Raises ``bulk_input.ValidationError`` listing every bad record before anything is pushed.
+    """
+    bundle = {}
+    for step in steps:
+        if step == "bindings":
+            bundle[step] = {"fixed_ips": _read(directory, *BUNDLE_FILES["fixed_ips"]) or [],
+                            "reserved_ranges": _read(directory, *BUNDLE_FILES["reserved_ranges"])}
+        else:
+            bundle[step] = _read(directory, *BUNDLE_FILES[step])
+    return bundle
+
+
+# ---------------- Steps ---------------- #
+def _failures(results):
+    return [f"VLAN {vlan_id}: {detail}" for vlan_id, ok, detail in results if not ok]
+
+
+def step_vlans(headers, network_id, vlans):
+    rows = push_vlans(meraki_api.BASE_URL, headers, network_id, vlans)
+    failed = [f"VLAN {r['vlanId']} {r['action']}: {r['error']}" for r in rows if not r["ok"]]
+    if failed:
+        raise StepError("; ".join(failed))
+    counts = {}
+    for r in rows:
+        counts[r["action"]] = counts.get(r["action"], 0) + 1
+    return ", ".join(f"{n} {action}" for action, n in sorted(counts.items()))
+
+
+def _apply_vlan_changes(headers, network_id, changes, errors):
+    failed = [f"VLAN {vlan_id}: {message}" for vlan_id, message in errors]
+    if changes:
+        failed += _failures(apply_dhcp_bindings(meraki_api.BASE_URL, headers, network_id, changes))
+    if failed:
+        raise StepError("; ".join(failed))
+    return f"{len(changes)} VLAN(s) updated" if changes else "no change"
+
+
+def step_dhcp(headers, network_id, settings):
+    changes, errors = plan_dhcp_settings(get_vlans(meraki_api.BASE_URL, headers, network_id), settings)
+    return _apply_vlan_changes(headers, network_id, changes, errors)
+
+
+def step_bindings(headers, network_id, bindings):
+    changes, errors = plan_dhcp_bindings(get_vlans(meraki_api.BASE_URL, headers, network_id),
+                                         bindings["fixed_ips"], bindings["reserved_ranges"])
+    return _apply_vlan_changes(headers, network_id, changes, errors)
+
+
+def _same_rules(live, desired):
+    from firewall_analyzer import is_default_rule
+
+    live = [r for r in live if not is_default_rule(r)]
+    return len(live) == len(desired) and all(
+        str(l.get(k, "")).lower() == str(v).lower() for l, d in zip(live, desired) for k, v in d.items())
+
+
+def _step_firewall(rule_type):
+    def step(headers, network_id, rules):
+        from firewall_analyzer import get_rules
+
+        if _same_rules(get_rules(headers, network_id, rule_type), rules):
+            return "no change"
+        url = f"{meraki_api.BASE_URL}/networks/{network_id}/appliance/firewall/{rule_type}FirewallRules"
+        response = meraki_api.put(url, headers=headers, json={"rules": rules})
+        if not response.ok:
+            raise StepError(f"{response.status_code}: {response.text}")
+        return f"{len(rules)} rule(s) pushed"
+    return step
+
+
+STEP_FUNCTIONS = {
+    "vlans": step_vlans,
+    "dhcp": step_dhcp,
+    "bindings": step_bindings,
+    "l3_firewall": _step_firewall("l3"),
+    "inbound_firewall": _step_firewall("inbound"),
+}
+
+
+def _is_empty(step, data):
+    if step == "bindings":
+        return not data["fixed_ips"] and not data["reserved_ranges"]
+    return not data
+
+
+# ---------------- Targets ---------------- #
+def select_networks(networks, ids=(), tags=(), name_regex=None):
+    """Networks matching any of the IDs, tags or the name regex."""
+    pattern = re.compile(name_regex, re.IGNORECASE) if name_regex else None
+    ids, tags = set(ids), set(tags)
+    return [n for n in networks
+            if n["id"] in ids or tags.intersection(n.get("tags") or [])
+            or (pattern and pattern.search(n.get("name", "")))]
+
+
+# ---------------- State ---------------- #
+def new_state(networks, bundle_dir=BULK_DIR, steps=STEPS, path=None):
+    path = path or STATE_DIR / f"fanout_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    return {
+        "path": str(path),
+        "bundle": str(bundle_dir),
+        "steps": list(steps),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "networks": {n["id"]: {"name": n.get("name", n["id"]),
+                               "steps": {s: {"status": "pending", "detail": "", "attempts": 0, "seconds": 0}
+                                         for s in steps}}
+                     for n in networks},
+    }
+
+
+def save_state(state):
+    path = Path(state["path"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def load_state(path):
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    state["path"] = str(path)
+    return state
+
+
+def latest_state():
+    files = sorted(STATE_DIR.glob("fanout_*.json"))
+    return files[-1] if files else None
+
+
+def pending_steps(state):
+    return sum(1 for net in state["networks"].values() for s in net["steps"].values() if s["status"] not in DONE)
+
+
+# ---------------- Run ---------------- #
+def _run_network(headers, network_id, net_state, bundle):
+    steps = net_state["steps"]
+    with tracing.span("fanout network", cat="push", network=net_state["name"]):
+        for step, info in steps.items():
+            if info["status"] in DONE:
+                continue
+            blocked = [d for d in DEPENDS.get(step, ()) if d in steps and steps[d]["status"] not in DONE]
+            if blocked:
+                info.update(status="blocked", detail=f"waiting for {', '.join(blocked)}")
+                continue
+            data = bundle.get(step)
+            if _is_empty(step, data):
+                info.update(status="skipped", detail="nothing in the bundle")
+                continue
+            info["attempts"] += 1
+            started = time.perf_counter()
+            try:
+                with tracing.span(step, cat="push"):
+                    detail = STEP_FUNCTIONS[step](headers, network_id, data)
+                info.update(status="ok", detail=detail)
+            except Exception as e:
+                info.update(status="failed", detail=str(e))
+            info["seconds"] = round(time.perf_counter() - started, 3)
+    return net_state
+
+
+def run_fanout(headers, state, bundle=None, max_workers=meraki_api.MAX_WORKERS, on_result=None):
+    """Run every unfinished step of every network in ``state``; saves the state after each network.
+
+    Calling it again on the same state retries only the failed / blocked steps.
+    """
+    bundle = bundle if bundle is not None else load_bundle(state["bundle"], state["steps"])
+    todo = [net_id for net_id, net in state["networks"].items()
+            if any(s["status"] not in DONE for s in net["steps"].values())]
+    def run(net_id):
+        return _run_network(headers, net_id, state["networks"][net_id], bundle)
+
+    for net_id, _, error in meraki_api.parallel_map(run, todo, max_workers=max_workers):
+        net = state["networks"][net_id]
+        if error:
+            for info in net["steps"].values():
+                if info["status"] not in DONE:
+                    info.update(status="failed", detail=str(error))
+        save_state(state)
+        if on_result:
+            on_result(net_id, net)
+    return state
+
+
+def state_rows(state):
+    return [{"networkId": net_id, "networkName": net["name"], "step": step, "status": info["status"],
+             "ok": info["status"] in DONE, "attempts": info["attempts"], "detail": info["detail"]}
+            for net_id, net in state["networks"].items() for step, info in net["steps"].items()]
+
+
+# ---------------- Menu ---------------- #
+STATUS_STYLES = {"ok": "green", "skipped": "dim", "failed": "bold red", "blocked": "yellow", "pending": "cyan"}
+
+
+def show_state(state):
+    table = Table(title="🚀 Fan-out status", show_header=True, header_style="bold magenta")
+    table.add_column("Network", style="cyan")
+    for step in state["steps"]:
+        table.add_column(step)
+    for net_id, net in sorted(state["networks"].items(), key=lambda kv: kv[1]["name"]):
+        cells = []
+        for step in state["steps"]:
+            status = net["steps"][step]["status"]
+            cells.append(f"[{STATUS_STYLES[status]}]{status}[/{STATUS_STYLES[status]}]")
+        table.add_row(net["name"], *cells)
+    console.print(table)
+    for net_id, net in state["networks"].items():
+        for step, info in net["steps"].items():
+            if info["status"] == "failed":
+                console.print(f"❌ {net['name']} / {step}: {info['detail']}", style="red")
+
+
+def _run_with_progress(headers, state):
+    try:
+        bundle = load_bundle(state["bundle"], state["steps"])
+    except (OSError, ValueError) as e:
+        console.print(f"❌ {e}", style="bold red")
+        return False
+    todo = sum(1 for net in state["networks"].values() if any(s["status"] not in DONE for s in net["steps"].values()))
+    with Progress(SpinnerColumn(), TextColumn("[bold blue]{task.description}"), BarColumn(),
+                  TextColumn("{task.completed}/{task.total} networks"), TimeElapsedColumn(), console=console) as progress:
+        task = progress.add_task("Applying bundle", total=todo)
+        run_fanout(headers, state, bundle, on_result=lambda net_id, net: progress.advance(task))
+    show_state(state)
+    console.print(f"💾 State saved: {state['path']}")
+    return True
+
+
+def fanout_menu(base_url, headers, network_id):
+    console.print("\n[bold yellow]🚀 Multi-network fan-out[/bold yellow]")
+    mode = Prompt.ask("[1] New run, [2] resume / retry a saved run", choices=["1", "2"], default="1")
+
+    if mode == "2":
+        default = latest_state()
+        path = Prompt.ask("State file", default=str(default) if default else None)
+        try:
+            state = load_state(path)
+        except (OSError, ValueError) as e:
+            console.print(f"❌ Cannot read {path}: {e}", style="bold red")
+            return
+    else:
+        try:
+            networks = get_org_appliance_networks(base_url, headers, get_org_id(base_url, headers, network_id))
+        except Exception as e:
+            console.print(f"❌ Failed to list the organization's networks: {e}", style="bold red")
+            return
+        ids = [n.strip() for n in Prompt.ask("Network IDs (comma-separated, blank for none)", default="").split(",")
+               if n.strip()]
+        tags = [t.strip() for t in Prompt.ask("Tags (comma-separated, blank for none)", default="").split(",") if t.strip()]
+        name_regex = Prompt.ask("Network name regex (blank for none)", default="") or None
+        try:
+            targets = select_networks(networks, ids, tags, name_regex)
+        except re.error as e:
+            console.print(f"❌ Invalid regex: {e}", style="bold red")
+            return
+        if not targets:
+            console.print("⚠️ No networks matched.", style="yellow")
+            return
+
+        steps = Prompt.ask(f"Steps ({', '.join(STEPS)})", default=",".join(STEPS))
+        steps = [s.strip() for s in steps.split(",") if s.strip()]
+        unknown = set(steps) - set(STEPS)
+        if unknown:
+            console.print(f"❌ Unknown step(s): {', '.join(sorted(unknown))}", style="bold red")
+            return
+        bundle_dir = Prompt.ask("Bundle directory", default=str(BULK_DIR))
+        try:
+            load_bundle(bundle_dir, steps)
+        except (OSError, ValueError) as e:
+            console.print(f"❌ {e}", style="bold red")
+            return
+        console.print(f"🎯 {len(targets)} network(s): {', '.join(n['name'] for n in targets[:10])}"
+                      f"{' …' if len(targets) > 10 else ''}")
+        if not Confirm.ask(f"Apply {', '.join(steps)} to {len(targets)} network(s)?", default=False):
+            return
+        state = new_state(targets, bundle_dir, [s for s in STEPS if s in steps])
+
+    while pending_steps(state):
+        if not _run_with_progress(headers, state):
+            break
+        remaining = pending_steps(state)
+        if not remaining or not Confirm.ask(f"🔁 Retry the {remaining} unfinished step(s)?", default=True):
+            break
+    else:
+        show_state(state)
+        console.print("✅ Every step has already completed.", style="green")
@@ -0,0 +1,101 @@
+"""Cold-start benchmark for main.py.
+
+Imports ``main`` in fresh interpreters with ``-X importtime`` and reports
+the best wall time, the heaviest modules, and any heavy dependency that
+was pulled in eagerly.  Exits non-zero when the target is missed, so it
+can gate CI:
+
+    python3 benchmarks/bench_import_time.py --target-ms 350 --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_TARGET_MS = 350
+DEFAULT_MODULE = "main"
+
+# These must only be imported once a menu that needs them is opened.
+LAZY_MODULES = ("pandas", "numpy", "openai", "azure.identity", "azure.keyvault.secrets",
+                "pyfiglet", "dateutil", "openpyxl", "pyarrow")
+
+PROBE = (
+    "import sys, json, time; t = time.perf_counter(); import {module}; "
+    "print(json.dumps({{'seconds': time.perf_counter() - t, "
+    "'eager': [m for m in {lazy!r} if m in sys.modules]}}))"
+)
+
+
+def run_once(module):
+    """Import ``module`` in a fresh interpreter; returns (wall_s, in-process_s, eager, importtime lines)."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    code = PROBE.format(module=module, lazy=LAZY_MODULES)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_ROOT, env=env,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip()[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return wall, result["seconds"], result["eager"], proc.stderr.splitlines()
+
+
+def heaviest_modules(importtime_lines, top):
+    """Parse ``-X importtime`` output into the ``top`` modules by cumulative microseconds."""
+    rows = []
+    for line in importtime_lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|", 2))
+        rows.append((int(cumulative_us), int(self_us), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=DEFAULT_MODULE, help="Module to import (default: main)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start (best run is reported)")
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_MS, help="Fail if the best import exceeds this")
+    parser.add_argument("--top", type=int, default=15, help="Heaviest modules to list")
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable summary")
+    args = parser.parse_args(argv)
+
+    runs = [run_once(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r[1])
+    wall_s, import_s, eager, lines = best
+    heavy = heaviest_modules(lines, args.top)
+    passed = import_s * 1000 <= args.target_ms and not eager
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "runs": args.runs,
+            "best_import_ms": round(import_s * 1000, 1),
+            "best_process_ms": round(wall_s * 1000, 1),
+            "target_ms": args.target_ms,
+            "eager_heavy_modules": eager,
+            "heaviest": [{"module": n, "cumulative_ms": round(c / 1000, 1), "self_ms": round(s / 1000, 1)}
+                         for c, s, n in heavy],
+            "passed": passed,
+        }, indent=2))
+    else:
+        print(f"import {args.module}: best {import_s * 1000:.1f} ms "
+              f"(process incl. interpreter start {wall_s * 1000:.1f} ms) over {args.runs} runs; "
+              f"target {args.target_ms:.0f} ms")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for cumulative, self_us, name in heavy:
+            print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+        if eager:
+            print(f"❌ Heavy modules imported eagerly: {', '.join(eager)}")
+        print("✅ PASS" if passed else "❌ FAIL")
+
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
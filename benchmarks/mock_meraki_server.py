@@ -0,0 +1,945 @@
+"""Local stand-in for the Meraki Dashboard API, for benchmarks and offline testing.
+
+Serves deterministic synthetic organizations at a configurable scale with
+the behaviour that matters for throughput work:
+
+* ``perPage`` / ``startingAfter`` pagination with ``Link: rel=next`` headers
+* per-organization token-bucket rate limiting answered with ``429`` + ``Retry-After``
+* configurable per-request latency and jitter
+* in-memory writes (VLANs, policy objects, VPN exclusions, firewall rules, ports, SSIDs)
+* org-wide switch port config / status (``configurationUpdatedAfter``) and network clients
+* asynchronous action batches of device updates (all-or-nothing, done shortly after submission)
+
+Run standalone and point the tool at it:
+
+    python3 benchmarks/mock_meraki_server.py --port 8765 --orgs 2 --networks 50
+    MERAKI_BASE_URL=http://127.0.0.1:8765/api/v1 python3 main.py inventory --org 100000
+
+``GET /_mock/stats`` returns request counters, ``POST /_mock/reset`` clears them.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+API_PREFIX = "/api/v1"
+ORG_ID_BASE = 100000
+
+DEFAULT_CONFIG = {
+    "orgs": 1,
+    "networks": 20,            # per org
+    "devices": 10,             # per network
+    "vlans": 8,                # per MX network
+    "events": 2000,            # per network
+    "policy_objects": 200,     # per org
+    "ports": 48,               # per switch
+    "rate_limit": 10.0,        # requests/second per org (0 disables)
+    "latency_ms": 0.0,
+    "jitter_ms": 0.0,
+    "max_per_page": 1000,
+    "seed": 42,
+}
+
+
+# ---------------- Synthetic data ---------------- #
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class OrgData:
+    """All synthetic state for one organization, generated on first access."""
+
+    def __init__(self, index, config):
+        self.index = index
+        self.id = str(ORG_ID_BASE + index)
+        self.name = f"Mock Org {index:03d}"
+        self.config = config
+        self.lock = threading.Lock()
+        rng = random.Random(config["seed"] * 1000 + index)
+        now = datetime.now(timezone.utc)
+
+        self.networks = []
+        self.devices = {}           # serial -> device
+        self.net_devices = {}       # network id -> [serial]
+        self.vlans = {}             # network id -> {vlan id: vlan}
+        self.firewall = {}          # (network id, "l3"|"inbound") -> rules
+        self.vpn_exclusions = {}    # network id -> {"custom": [], "majorApplications": []}
+        self.ssids = {}             # network id -> [ssid]
+        self.ports = {}             # serial -> [port]
+        self.ports_updated = {}     # serial -> ISO time of the last port change
+        self.created = _iso(now)
+        self.l3_interfaces = {}     # serial -> [interface]
+        self.statuses = {}          # serial -> status
+        self._events = {}           # network id -> [event] (lazy)
+
+        for n in range(config["networks"]):
+            net_id = f"L_{self.id}_{n}"
+            network = {
+                "id": net_id,
+                "organizationId": self.id,
+                "name": f"Branch-{index:03d}-{n:04d}",
+                "productTypes": ["appliance", "switch", "wireless"],
+                "timeZone": "Asia/Kolkata",
+                "tags": [f"region-{n % 4}", "branch" if n % 10 else "hub"],
+            }
+            self.networks.append(network)
+            self.net_devices[net_id] = []
+            self.vlans[net_id] = {}
+            self.firewall[(net_id, "l3")] = [self._rule(rng, i) for i in range(rng.randint(2, 12))]
+            self.firewall[(net_id, "inbound")] = []
+            self.vpn_exclusions[net_id] = {
+                "custom": [{"protocol": "any", "destination": f"203.0.113.{i}", "port": "any"} for i in range(3)],
+                "majorApplications": [],
+            }
+            self.ssids[net_id] = [self._ssid(i) for i in range(15)]
+
+            for d in range(config["devices"]):
+                model = "MX68" if d == 0 else ("MS225-48LP" if d % 3 == 1 else "MR46")
+                serial = f"Q2MK-{index:04d}-{n:04d}{d:03d}"
+                device = {
+                    "serial": serial,
+                    "name": f"{model[:2]}-{n:04d}-{d:02d}",
+                    "model": model,
+                    "networkId": net_id,
+                    "mac": "00:18:0a:%02x:%02x:%02x" % (index % 256, n % 256, d % 256),
+                    "lanIp": f"10.{index % 256}.{n % 256}.{d + 10}",
+                    "wan1Ip": f"198.51.{n % 256}.{d + 1}" if model.startswith("MX") else None,
+                    "firmware": {"MX": "MX 18.211", "MS": "MS 16.8", "MR": "MR 30.7"}[model[:2]],
+                    "productType": {"MX": "appliance", "MS": "switch", "MR": "wireless"}[model[:2]],
+                    "tags": [],
+                    "address": "",
+                }
+                self.devices[serial] = device
+                self.net_devices[net_id].append(serial)
+                status = "online" if rng.random() > 0.05 else "offline"
+                self.statuses[serial] = {
+                    "serial": serial, "name": device["name"], "model": model, "networkId": net_id,
+                    "status": status, "productType": device["productType"],
+                    "lastReportedAt": _iso(now - timedelta(minutes=rng.randint(0, 5) if status == "online"
+                                                           else rng.randint(60, 5000))),
+                    "lanIp": device["lanIp"], "publicIp": f"198.51.{n % 256}.{d + 1}",
+                }
+                if model.startswith("MX"):
+                    for v in range(config["vlans"]):
+                        vlan_id = 10 * (v + 1)
+                        self.vlans[net_id][vlan_id] = {
+                            "id": vlan_id, "networkId": net_id, "name": f"VLAN{vlan_id}",
+                            "subnet": f"10.{(index * 7 + n) % 256}.{vlan_id}.0/24",
+                            "applianceIp": f"10.{(index * 7 + n) % 256}.{vlan_id}.1",
+                            "fixedIpAssignments": {}, "reservedIpRanges": [],
+                            "dnsNameservers": "upstream_dns", "dhcpHandling": "Run a DHCP server",
+                        }
+                elif model.startswith("MS"):
+                    self.ports[serial] = [self._port(p) for p in range(1, config["ports"] + 1)]
+                    self.l3_interfaces[serial] = [{
+                        "interfaceId": f"{serial}-{v}", "name": f"SVI{v}", "vlanId": 100 + v,
+                        "subnet": f"172.{16 + index % 16}.{(n * 4 + v) % 256}.0/24",
+                        "interfaceIp": f"172.{16 + index % 16}.{(n * 4 + v) % 256}.1",
+                    } for v in range(2)]
+
+        self.policy_objects = {}
+        for i in range(config["policy_objects"]):
+            obj_id = str(900000 + index * 100000 + i)
+            self.policy_objects[obj_id] = {
+                "id": obj_id, "name": f"Existing-{i}", "category": "network", "type": "cidr",
+                "cidr": f"192.0.{i // 256 % 256}.{i % 256}/32", "groupIds": [],
+            }
+        self.policy_groups = {}
+        self.action_batches = {}
+        self._next_id = 1
+
+    @staticmethod
+    def _rule(rng, i):
+        return {
+            "comment": f"Rule {i}", "policy": rng.choice(["allow", "deny"]),
+            "protocol": rng.choice(["tcp", "udp", "any"]), "srcPort": "Any",
+            "srcCidr": f"10.{rng.randint(0, 255)}.0.0/16", "destPort": str(rng.choice([22, 53, 80, 443, 3389])),
+            "destCidr": "Any", "syslogEnabled": False,
+        }
+
+    @staticmethod
+    def _port(port_id):
+        return {
+            "portId": str(port_id), "name": None, "tags": [], "enabled": True, "poeEnabled": True,
+            "type": "access", "vlan": 1, "voiceVlan": None, "allowedVlans": "1,3-1000",
+            "isolationEnabled": False, "rstpEnabled": True, "stpGuard": "disabled",
+            "linkNegotiation": "Auto negotiate", "accessPolicyType": "Open",
+        }
+
+    @staticmethod
+    def _ssid(number):
+        return {
+            "number": number, "name": f"Unconfigured SSID {number + 1}", "enabled": False,
+            "splashPage": "None", "ssidAdminAccessible": False, "authMode": "open",
+            "ipAssignmentMode": "NAT mode", "minBitrate": 11, "bandSelection": "Dual band operation",
+            "perClientBandwidthLimitUp": 0, "perClientBandwidthLimitDown": 0, "visible": True,
+            "availableOnAllAps": True,
+        }
+
+    def next_id(self):
+        with self.lock:
+            self._next_id += 1
+            return str(ORG_ID_BASE * 100 + self.index * 1000000 + self._next_id)
+
+    def events(self, net_id):
+        if net_id not in self._events:
+            rng = random.Random(zlib.crc32(f"{self.config['seed']}:{net_id}".encode()))
+            now = datetime.now(timezone.utc)
+            types = ["dhcp_lease", "dhcp_release", "cf_block", "dhcp_problem", "non_meraki_vpn", "martian_vlan"]
+            events = []
+            for i in range(self.config["events"]):
+                etype = rng.choice(types)
+                events.append({
+                    "occurredAt": _iso(now - timedelta(seconds=i * 30)),
+                    "networkId": net_id, "type": etype, "description": etype.replace("_", " "),
+                    "clientId": f"k{rng.randint(1000, 9999)}", "clientDescription": f"client-{rng.randint(1, 500)}",
+                    "deviceSerial": self.net_devices[net_id][0] if self.net_devices[net_id] else None,
+                    "deviceName": "MX", "category": "dhcp",
+                    "eventData": {"vlan": str(rng.choice([10, 20, 30])), "ip": f"10.0.0.{rng.randint(2, 250)}",
+                                  "url": "http://example.com", "extra": "", "msg": "", "duration": "1 day"},
+                })
+            self._events[net_id] = events
+        return self._events[net_id]
+
+
+class MockState:
+    def __init__(self, config):
+        self.config = {**DEFAULT_CONFIG, **config}
+        self._orgs = {}
+        self._orgs_lock = threading.Lock()
+        self._buckets = {}
+        self._bucket_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats = {"requests": 0, "rate_limited": 0, "bytes_out": 0, "by_route": {}, "started": time.time()}
+
+    def org(self, org_id):
+        try:
+            index = int(org_id) - ORG_ID_BASE
+        except (TypeError, ValueError):
+            return None
+        if not 0 <= index < self.config["orgs"]:
+            return None
+        with self._orgs_lock:
+            if index not in self._orgs:
+                self._orgs[index] = OrgData(index, self.config)
+            return self._orgs[index]
+
+    def org_for_network(self, net_id):
+        parts = net_id.split("_")
+        return self.org(parts[1]) if len(parts) == 3 else None
+
+    def org_for_serial(self, serial):
+        try:
+            return self.org(ORG_ID_BASE + int(serial.split("-")[1]))
+        except (IndexError, ValueError):
+            return None
+
+    def take_token(self, org_id):
+        """Token bucket per org; returns seconds to wait (0 when allowed)."""
+        rate = self.config["rate_limit"]
+        if not rate or org_id is None:
+            return 0
+        with self._bucket_lock:
+            tokens, updated = self._buckets.get(org_id, (rate, time.monotonic()))
+            now = time.monotonic()
+            tokens = min(rate, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[org_id] = (tokens - 1, now)
+                return 0
+            self._buckets[org_id] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def record(self, route, status, size):
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_out"] += size
+            if status == 429:
+                self.stats["rate_limited"] += 1
+            by_route = self.stats["by_route"].setdefault(route, {"count": 0, "statuses": {}})
+            by_route["count"] += 1
+            by_route["statuses"][str(status)] = by_route["statuses"].get(str(status), 0) + 1
+
+
+# ---------------- Routing ---------------- #
+class NotFound(Exception):
+    pass
+
+
+class ApiError(Exception):
+    def __init__(self, status, errors):
+        super().__init__(errors)
+        self.status = status
+        self.errors = errors if isinstance(errors, list) else [errors]
+
+
+ROUTES = []
+
+
+def route(method, pattern):
+    regex = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", pattern) + "$")
+
+    def decorator(fn):
+        ROUTES.append((method, regex, pattern, fn))
+        return fn
+    return decorator
+
+
+def _org(state, org_id):
+    org = state.org(org_id)
+    if org is None:
+        raise NotFound()
+    return org
+
+
+def _net(state, net_id):
+    org = state.org_for_network(net_id)
+    if org is None or net_id not in org.net_devices:
+        raise NotFound()
+    return org
+
+
+def _dev(state, serial):
+    org = state.org_for_serial(serial)
+    if org is None or serial not in org.devices:
+        raise NotFound()
+    return org
+
+
+class Paged(list):
+    """Marker: the handler paginates this list."""
+
+
+@route("GET", "/organizations")
+def list_orgs(state, req):
+    return Paged({"id": state.org(ORG_ID_BASE + i).id, "name": state.org(ORG_ID_BASE + i).name,
+                  "url": "", "api": {"enabled": True}} for i in range(state.config["orgs"]))
+
+
+@route("GET", "/organizations/{org_id}")
+def get_org(state, req, org_id):
+    org = _org(state, org_id)
+    return {"id": org.id, "name": org.name}
+
+
+@route("GET", "/organizations/{org_id}/networks")
+def org_networks(state, req, org_id):
+    return Paged(_org(state, org_id).networks)
+
+
+@route("POST", "/organizations/{org_id}/networks")
+def create_network(state, req, org_id):
+    org = _org(state, org_id)
+    body = req.body or {}
+    with org.lock:
+        net_id = f"L_{org.id}_{len(org.networks)}"
+        network = {"id": net_id, "organizationId": org.id, "name": body.get("name", net_id),
+                   "productTypes": body.get("productTypes", []), "tags": body.get("tags", []),
+                   "timeZone": body.get("timeZone", "UTC")}
+        org.networks.append(network)
+        org.net_devices[net_id] = []
+        org.vlans[net_id] = {}
+        org.firewall[(net_id, "l3")] = []
+        org.firewall[(net_id, "inbound")] = []
+        org.vpn_exclusions[net_id] = {"custom": [], "majorApplications": []}
+        org.ssids[net_id] = [OrgData._ssid(i) for i in range(15)]
+    return 201, network
+
+
+@route("GET", "/organizations/{org_id}/devices")
+def org_devices(state, req, org_id):
+    return Paged(_org(state, org_id).devices.values())
+
+
+@route("GET", "/organizations/{org_id}/devices/statuses")
+def org_statuses(state, req, org_id):
+    return Paged(_org(state, org_id).statuses.values())
+
+
+@route("GET", "/organizations/{org_id}/firmware/upgrades")
+def firmware_upgrades(state, req, org_id):
+    org = _org(state, org_id)
+    return [{"network": {"id": n["id"], "name": n["name"]}, "productTypes": pt,
+             "toVersion": {"shortName": v}} for n in org.networks
+            for pt, v in (("appliance", "MX 18.211"), ("switch", "MS 16.8"), ("wireless", "MR 30.7"))]
+
+
+@route("GET", "/networks/{net_id}")
+def get_network(state, req, net_id):
+    org = _net(state, net_id)
+    return next(n for n in org.networks if n["id"] == net_id)
+
+
+@route("GET", "/networks/{net_id}/devices")
+def network_devices(state, req, net_id):
+    org = _net(state, net_id)
+    return [org.devices[s] for s in org.net_devices[net_id]]
+
+
+@route("GET", "/devices/{serial}")
+def get_device(state, req, serial):
+    return _dev(state, serial).devices[serial]
+
+
+DEVICE_NAME_MAX = 64
+
+
+def _device_update(device, body):
+    if len(str((body or {}).get("name", ""))) > DEVICE_NAME_MAX:
+        raise ApiError(400, f"Name must be at most {DEVICE_NAME_MAX} characters")
+    device.update({k: v for k, v in (body or {}).items() if k in ("name", "tags", "address", "notes")})
+
+
+@route("PUT", "/devices/{serial}")
+def update_device(state, req, serial):
+    org = _dev(state, serial)
+    device = org.devices[serial]
+    _device_update(device, req.body)
+    return device
+
+
+BATCH_DELAY = 0.5          # seconds before a submitted batch has run
+BATCH_DEVICE = re.compile(r"^/devices/([^/]+)$")
+
+
+@route("POST", "/organizations/{org_id}/actionBatches")
+def create_action_batch(state, req, org_id):
+    org = _org(state, org_id)
+    body = req.body or {}
+    actions = body.get("actions") or []
+    if not actions or len(actions) > (20 if body.get("synchronous") else 100):
+        raise ApiError(400, "A batch holds 1-100 actions (1-20 when synchronous)")
+    with org.lock:
+        running = sum(1 for b in org.action_batches.values() if b["confirmed"] and time.time() < b["_run_at"])
+    if running >= 5:
+        raise ApiError(429, "Too many concurrently executing batches")
+    batch_id = org.next_id()
+    batch = {"id": batch_id, "organizationId": org.id, "confirmed": bool(body.get("confirmed")),
+             "synchronous": bool(body.get("synchronous")), "actions": actions,
+             "status": {"completed": False, "failed": False, "errors": [], "createdResources": []},
+             "_run_at": time.time() + (0 if body.get("synchronous") else BATCH_DELAY)}
+    with org.lock:
+        org.action_batches[batch_id] = batch
+    if batch["synchronous"]:
+        _run_batch(org, batch)
+    return 201, _batch_view(org, batch)
+
+
+def _run_batch(org, batch):
+    """Apply every action or none of them."""
+    errors, updates = [], []
+    for n, action in enumerate(batch["actions"]):
+        match = BATCH_DEVICE.match(str(action.get("resource", "")))
+        if action.get("operation") != "update" or not match or match.group(1) not in org.devices:
+            errors.append(f"Action {n}: unsupported or unknown resource {action.get('resource')!r}")
+            continue
+        device = dict(org.devices[match.group(1)])
+        try:
+            _device_update(device, action.get("body"))
+        except ApiError as e:
+            errors.extend(f"Action {n}: {msg}" for msg in e.errors)
+            continue
+        updates.append((match.group(1), device))
+    with org.lock:
+        if not errors:
+            for serial, device in updates:
+                org.devices[serial].update(device)
+        batch["status"].update(completed=not errors, failed=bool(errors), errors=errors)
+
+
+def _batch_view(org, batch):
+    if batch["confirmed"] and not batch["status"]["completed"] and not batch["status"]["failed"] \
+            and time.time() >= batch["_run_at"]:
+        _run_batch(org, batch)
+    return {k: v for k, v in batch.items() if not k.startswith("_")}
+
+
+@route("GET", "/organizations/{org_id}/actionBatches/{batch_id}")
+def get_action_batch(state, req, org_id, batch_id):
+    org = _org(state, org_id)
+    batch = org.action_batches.get(batch_id)
+    if batch is None:
+        raise NotFound()
+    return _batch_view(org, batch)
+
+
+@route("GET", "/networks/{net_id}/appliance/vlans")
+def list_vlans(state, req, net_id):
+    return list(_net(state, net_id).vlans[net_id].values())
+
+
+@route("POST", "/networks/{net_id}/appliance/vlans")
+def create_vlan(state, req, net_id):
+    org = _net(state, net_id)
+    body = req.body or {}
+    vlan_id = int(body.get("id", 0))
+    with org.lock:
+        if vlan_id in org.vlans[net_id]:
+            raise ApiError(400, f"VLAN {vlan_id} already exists")
+        vlan = {"id": vlan_id, "networkId": net_id, "fixedIpAssignments": {}, "reservedIpRanges": [],
+                "dnsNameservers": "upstream_dns", "dhcpHandling": "Run a DHCP server", **body}
+        vlan["id"] = vlan_id
+        org.vlans[net_id][vlan_id] = vlan
+    return 201, vlan
+
+
+def _vlan(org, net_id, vlan_id):
+    try:
+        return org.vlans[net_id][int(vlan_id)]
+    except (KeyError, ValueError):
+        raise NotFound()
+
+
+@route("GET", "/networks/{net_id}/appliance/vlans/{vlan_id}")
+def get_vlan(state, req, net_id, vlan_id):
+    return _vlan(_net(state, net_id), net_id, vlan_id)
+
+
+@route("PUT", "/networks/{net_id}/appliance/vlans/{vlan_id}")
+def update_vlan(state, req, net_id, vlan_id):
+    org = _net(state, net_id)
+    with org.lock:
+        vlan = _vlan(org, net_id, vlan_id)
+        vlan.update({k: v for k, v in (req.body or {}).items() if k != "id"})
+    return vlan
+
+
+@route("DELETE", "/networks/{net_id}/appliance/vlans/{vlan_id}")
+def delete_vlan(state, req, net_id, vlan_id):
+    org = _net(state, net_id)
+    with org.lock:
+        _vlan(org, net_id, vlan_id)
+        del org.vlans[net_id][int(vlan_id)]
+    return 204, None
+
+
+@route("GET", "/devices/{serial}/switch/routing/interfaces")
+def l3_interfaces(state, req, serial):
+    return _dev(state, serial).l3_interfaces.get(serial, [])
+
+
+@route("GET", "/devices/{serial}/switch/ports")
+def switch_ports(state, req, serial):
+    org = _dev(state, serial)
+    if serial not in org.ports:
+        raise NotFound()
+    return org.ports[serial]
+
+
+@route("GET", "/devices/{serial}/switch/ports/{port_id}")
+def switch_port(state, req, serial, port_id):
+    org = _dev(state, serial)
+    for port in org.ports.get(serial, []):
+        if port["portId"] == port_id:
+            return port
+    raise NotFound()
+
+
+@route("PUT", "/devices/{serial}/switch/ports/{port_id}")
+def update_switch_port(state, req, serial, port_id):
+    port = switch_port(state, req, serial, port_id)
+    port.update({k: v for k, v in (req.body or {}).items() if k != "portId"})
+    _dev(state, serial).ports_updated[serial] = _iso(datetime.now(timezone.utc))
+    return port
+
+
+def _switch_summary(org, serial):
+    device = org.devices[serial]
+    network = next(n for n in org.networks if n["id"] == device["networkId"])
+    return {"serial": serial, "name": device["name"], "model": device["model"], "mac": device["mac"],
+            "network": {"id": network["id"], "name": network["name"]}}
+
+
+@route("GET", "/organizations/{org_id}/switch/ports/bySwitch")
+def ports_by_switch(state, req, org_id):
+    org = _org(state, org_id)
+    after = req.query.get("configurationUpdatedAfter")
+    return Paged({**_switch_summary(org, serial), "ports": deepcopy(ports)}
+                 for serial, ports in org.ports.items()
+                 if not after or org.ports_updated.get(serial, org.created) > after)
+
+
+@route("GET", "/organizations/{org_id}/switch/ports/statuses/bySwitch")
+def port_statuses_by_switch(state, req, org_id):
+    org = _org(state, org_id)
+    items = []
+    for serial, ports in org.ports.items():
+        statuses = []
+        for port in ports:
+            number = int(port["portId"])
+            connected = number <= 20 or number == len(ports)
+            status = {"portId": port["portId"], "enabled": port["enabled"],
+                      "status": "Connected" if connected else "Disconnected",
+                      "speed": "1 Gbps" if connected else "", "duplex": "full" if connected else "",
+                      "clientCount": 1 if number <= 10 else 0}
+            if number == len(ports):
+                status["lldp"] = {"systemName": f"MX-{org.devices[serial]['networkId'].split('_')[-1]}-uplink",
+                                  "portId": "Port 3", "managementAddress": org.devices[serial]["lanIp"]}
+            statuses.append(status)
+        items.append({**_switch_summary(org, serial), "ports": statuses})
+    return {"items": items, "meta": {"counts": {"items": {"total": len(items), "remaining": 0}}}}
+
+
+@route("GET", "/networks/{net_id}/clients")
+def network_clients(state, req, net_id):
+    org = _net(state, net_id)
+    clients = []
+    for serial in org.net_devices[net_id]:
+        for port in org.ports.get(serial, [])[:10]:
+            number = int(port["portId"])
+            clients.append({"id": f"k{serial[-7:]}{number:02d}", "description": f"host-{serial[-3:]}-{number}",
+                            "mac": "02:%02x:%s:%s:%02x" % (org.index % 256, serial[-7:-5], serial[-5:-3],
+                                                            number) + ":%s" % serial[-2:],
+                            "ip": f"10.200.{int(serial[-7:-3]) % 256}.{number}", "vlan": port["vlan"],
+                            "recentDeviceSerial": serial, "switchport": port["portId"],
+                            "lastSeen": _iso(datetime.now(timezone.utc))})
+    return Paged(clients)
+
+
+@route("GET", "/networks/{net_id}/events")
+def network_events(state, req, net_id):
+    org = _net(state, net_id)
+    events = org.events(net_id)
+    product = req.query.get("productType")
+    if product and product != "appliance":
+        events = []
+    per_page = min(int(req.query.get("perPage", 10)), 1000)
+    start = int(req.query.get("startingAfter", 0) or 0)
+    page = events[start:start + per_page]
+    next_params = None
+    if start + per_page < len(events):
+        next_params = {"startingAfter": start + per_page, "perPage": per_page}
+    body = {"message": None, "pageStartAt": page[-1]["occurredAt"] if page else None,
+            "pageEndAt": page[0]["occurredAt"] if page else None, "events": page}
+    return 200, body, next_params
+
+
+@route("GET", "/organizations/{org_id}/policyObjects")
+def list_policy_objects(state, req, org_id):
+    return Paged(_org(state, org_id).policy_objects.values())
+
+
+@route("POST", "/organizations/{org_id}/policyObjects")
+def create_policy_object(state, req, org_id):
+    org = _org(state, org_id)
+    body = req.body or {}
+    if not body.get("name") or not body.get("cidr"):
+        raise ApiError(400, "name and cidr are required")
+    with org.lock:
+        if any(o["name"] == body["name"] for o in org.policy_objects.values()):
+            raise ApiError(400, "Name has already been taken")
+    obj_id = org.next_id()
+    obj = {"id": obj_id, "groupIds": [], **body}
+    with org.lock:
+        org.policy_objects[obj_id] = obj
+    return 201, obj
+
+
+@route("DELETE", "/organizations/{org_id}/policyObjects/{obj_id}")
+def delete_policy_object(state, req, org_id, obj_id):
+    org = _org(state, org_id)
+    with org.lock:
+        if org.policy_objects.pop(obj_id, None) is None:
+            raise NotFound()
+    return 204, None
+
+
+@route("GET", "/organizations/{org_id}/policyObjects/groups")
+def list_policy_groups(state, req, org_id):
+    return Paged(_org(state, org_id).policy_groups.values())
+
+
+@route("POST", "/organizations/{org_id}/policyObjects/groups")
+def create_policy_group(state, req, org_id):
+    org = _org(state, org_id)
+    body = req.body or {}
+    if len(body.get("objectIds", [])) > 150:
+        raise ApiError(400, "A group may contain at most 150 objects")
+    group_id = org.next_id()
+    group = {"id": group_id, "name": body.get("name"), "category": "NetworkObjectGroup",
+             "objectIds": list(body.get("objectIds", []))}
+    with org.lock:
+        org.policy_groups[group_id] = group
+    return 201, group
+
+
+@route("PUT", "/organizations/{org_id}/policyObjects/groups/{group_id}")
+def update_policy_group(state, req, org_id, group_id):
+    org = _org(state, org_id)
+    with org.lock:
+        group = org.policy_groups.get(group_id)
+        if group is None:
+            raise NotFound()
+        group.update({k: v for k, v in (req.body or {}).items() if k in ("name", "objectIds")})
+    return group
+
+
+@route("DELETE", "/organizations/{org_id}/policyObjects/groups/{group_id}")
+def delete_policy_group(state, req, org_id, group_id):
+    org = _org(state, org_id)
+    with org.lock:
+        if org.policy_groups.pop(group_id, None) is None:
+            raise NotFound()
+    return 204, None
+
+
+@route("GET", "/organizations/{org_id}/appliance/trafficShaping/vpnExclusions/byNetwork")
+def vpn_exclusions_by_network(state, req, org_id):
+    org = _org(state, org_id)
+    items = [{"networkId": n["id"], "networkName": n["name"], **deepcopy(org.vpn_exclusions[n["id"]])}
+             for n in org.networks]
+    return {"items": items, "meta": {"counts": {"items": {"total": len(items), "remaining": 0}}}}
+
+
+@route("PUT", "/networks/{net_id}/appliance/trafficShaping/vpnExclusions")
+def update_vpn_exclusions(state, req, net_id):
+    org = _net(state, net_id)
+    body = req.body or {}
+    with org.lock:
+        org.vpn_exclusions[net_id] = {"custom": body.get("custom", []),
+                                      "majorApplications": body.get("majorApplications", [])}
+    return {"networkId": net_id, **org.vpn_exclusions[net_id]}
+
+
+@route("GET", "/networks/{net_id}/appliance/firewall/{kind}FirewallRules")
+def get_firewall(state, req, net_id, kind):
+    org = _net(state, net_id)
+    if (net_id, kind) not in org.firewall:
+        raise NotFound()
+    default = {"comment": "Default rule", "policy": "allow", "protocol": "Any", "srcPort": "Any",
+               "srcCidr": "Any", "destPort": "Any", "destCidr": "Any", "syslogEnabled": False}
+    return {"rules": org.firewall[(net_id, kind)] + [default]}
+
+
+@route("PUT", "/networks/{net_id}/appliance/firewall/{kind}FirewallRules")
+def put_firewall(state, req, net_id, kind):
+    org = _net(state, net_id)
+    if (net_id, kind) not in org.firewall:
+        raise NotFound()
+    rules = [r for r in (req.body or {}).get("rules", []) if r.get("comment") != "Default rule"]
+    if len(rules) > 1000:
+        raise ApiError(400, "Too many rules")
+    org.firewall[(net_id, kind)] = rules
+    return get_firewall(state, req, net_id, kind)
+
+
+@route("GET", "/networks/{net_id}/wireless/ssids")
+def list_ssids(state, req, net_id):
+    return _net(state, net_id).ssids[net_id]
+
+
+@route("GET", "/networks/{net_id}/wireless/ssids/{number}")
+def get_ssid(state, req, net_id, number):
+    try:
+        return _net(state, net_id).ssids[net_id][int(number)]
+    except (IndexError, ValueError):
+        raise NotFound()
+
+
+@route("PUT", "/networks/{net_id}/wireless/ssids/{number}")
+def update_ssid(state, req, net_id, number):
+    ssid = get_ssid(state, req, net_id, number)
+    ssid.update({k: v for k, v in (req.body or {}).items() if k != "number"})
+    return ssid
+
+
+@route("GET", "/networks/{net_id}/appliance/vpn/siteToSiteVpn")
+def site_to_site(state, req, net_id):
+    org = _net(state, net_id)
+    return {"mode": "spoke", "hubs": [],
+            "subnets": [{"localSubnet": v["subnet"], "useVpn": True} for v in org.vlans[net_id].values()]}
+
+
+@route("GET", "/organizations/{org_id}/appliance/vpn/thirdPartyVPNPeers")
+def third_party_peers(state, req, org_id):
+    _org(state, org_id)
+    return {"peers": [{"name": "DC-Peer", "publicIp": "192.0.2.10", "ikeVersion": "2", "secret": "s3cr3tvalue",
+                       "privateSubnets": ["172.31.0.0/16"], "priorityInGroup": 1}]}
+
+
+# ---------------- HTTP handler ---------------- #
+class Request:
+    def __init__(self, query, body):
+        self.query = query
+        self.body = body
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockMeraki/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _send(self, status, body, extra_headers=None, route_name="?"):
+        payload = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+        self.server.state.record(route_name, status, len(payload))
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        raw = self.rfile.read(length)
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def _dispatch(self, method):
+        state = self.server.state
+        parts = urlsplit(self.path)
+        path = parts.path
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        body = self._read_body()
+
+        if path == "/_mock/stats":
+            with state.stats_lock:
+                stats = deepcopy(state.stats)
+            stats["elapsed"] = time.time() - stats.pop("started")
+            return self._send(200, stats, route_name="_mock")
+        if path == "/_mock/reset":
+            state.reset_stats()
+            return self._send(204, None, route_name="_mock")
+
+        if not path.startswith(API_PREFIX):
+            return self._send(404, {"errors": ["Not found"]})
+        path = path[len(API_PREFIX):].rstrip("/") or "/"
+
+        for route_method, regex, pattern, fn in ROUTES:
+            match = regex.match(path)
+            if route_method != method or not match:
+                continue
+
+            params = match.groupdict()
+            org_id = params.get("org_id")
+            if org_id is None and "net_id" in params:
+                org = state.org_for_network(params["net_id"])
+                org_id = org.id if org else None
+            if org_id is None and "serial" in params:
+                org = state.org_for_serial(params["serial"])
+                org_id = org.id if org else None
+
+            wait = state.take_token(org_id)
+            if wait:
+                return self._send(429, {"errors": ["API rate limit exceeded for organization"]},
+                                  {"Retry-After": str(max(1, round(wait)))}, route_name=pattern)
+
+            latency = state.config["latency_ms"] + random.uniform(0, state.config["jitter_ms"])
+            if latency:
+                time.sleep(latency / 1000)
+
+            try:
+                result = fn(state, Request(query, body), **params)
+            except NotFound:
+                return self._send(404, {"errors": ["Not found"]}, route_name=pattern)
+            except ApiError as e:
+                return self._send(e.status, {"errors": e.errors}, route_name=pattern)
+
+            status, next_params = 200, None
+            if isinstance(result, tuple):
+                status, result, next_params = (result + (None,))[:3]
+            link = None
+            if isinstance(result, Paged):
+                result, link = self._paginate(list(result), query, path)
+            elif next_params:
+                link = f'<{self._url(path, {**query, **next_params})}>; rel=next'
+            return self._send(status, result, {"Link": link} if link else None, route_name=pattern)
+
+        return self._send(404, {"errors": ["Not found"]}, route_name="unmatched")
+
+    def _url(self, path, params):
+        return f"{self.server.base_url}{path}?{urlencode(params)}"
+
+    def _paginate(self, items, query, path):
+        per_page = max(1, min(int(query.get("perPage", self.server.state.config["max_per_page"])),
+                              self.server.state.config["max_per_page"]))
+        start = int(query.get("startingAfter", 0) or 0)
+        page = items[start:start + per_page]
+        link = None
+        if start + per_page < len(items):
+            link = f'<{self._url(path, {"perPage": per_page, "startingAfter": start + per_page})}>; rel=next'
+        return page, link
+
+
+class MockMerakiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, verbose=False, **config):
+        super().__init__((host, port), Handler)
+        self.state = MockState(config)
+        self.verbose = verbose
+        self.base_url = f"http://{host}:{self.server_address[1]}{API_PREFIX}"
+
+
+def serve_in_thread(host="127.0.0.1", port=0, **config):
+    """Start a server on a daemon thread; returns ``(server, base_url)``."""
+    server = MockMerakiServer(host, port, **config)
+    threading.Thread(target=server.serve_forever, name="mock-meraki", daemon=True).start()
+    return server, server.base_url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--orgs", type=int, default=DEFAULT_CONFIG["orgs"])
+    parser.add_argument("--networks", type=int, default=DEFAULT_CONFIG["networks"], help="Networks per org")
+    parser.add_argument("--devices", type=int, default=DEFAULT_CONFIG["devices"], help="Devices per network")
+    parser.add_argument("--vlans", type=int, default=DEFAULT_CONFIG["vlans"], help="VLANs per MX network")
+    parser.add_argument("--events", type=int, default=DEFAULT_CONFIG["events"], help="Events per network")
+    parser.add_argument("--policy-objects", type=int, default=DEFAULT_CONFIG["policy_objects"], help="Per org")
+    parser.add_argument("--ports", type=int, default=DEFAULT_CONFIG["ports"], help="Ports per switch")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_CONFIG["rate_limit"],
+                        help="Requests/second per org before 429s (0 disables)")
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_CONFIG["latency_ms"])
+    parser.add_argument("--jitter-ms", type=float, default=DEFAULT_CONFIG["jitter_ms"])
+    parser.add_argument("--seed", type=int, default=DEFAULT_CONFIG["seed"])
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    config = {k: v for k, v in vars(args).items() if k in DEFAULT_CONFIG}
+    server = MockMerakiServer(args.host, args.port, verbose=args.verbose, **config)
+    print(f"Mock Meraki API listening on {server.base_url} (orgs start at {ORG_ID_BASE})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Throughput benchmarks against the local mock Dashboard API.
+
+Starts ``mock_meraki_server.py`` in a subprocess, points ``MERAKI_BASE_URL``
+at it and drives the real code paths:
+
+* ``inventory``      – ``inventory_view.collect_inventory`` over one org
+* ``events``         – ``troubleshooting.fetch_events`` for every network
+* ``push_vlans``     – ``appliance_config.push_vlans`` (the VLAN bulk path) for every network
+* ``policy_objects`` – ``policy_objects.create_policy_objects`` + grouping
+* ``vpn_exclusions`` – ``vpn_exclusion_push.push_exclusions`` across the org
+
+Each scenario reports wall time, API requests (counted by the server),
+requests/second, 429 responses and peak Python memory:
+
+    python3 benchmarks/run_benchmarks.py --scale small
+    python3 benchmarks/run_benchmarks.py --scale large --latency-ms 40 --json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SERVER = Path(__file__).resolve().parent / "mock_meraki_server.py"
+ORG_ID = "100000"
+HEADERS = {"X-Cisco-Meraki-API-Key": "mock-key", "Content-Type": "application/json"}
+
+SCALES = {
+    "small": {"networks": 10, "devices": 6, "vlans": 4, "events": 500, "policy_objects": 100, "new_objects": 50},
+    "medium": {"networks": 50, "devices": 10, "vlans": 8, "events": 2000, "policy_objects": 1000, "new_objects": 300},
+    "large": {"networks": 200, "devices": 20, "vlans": 16, "events": 5000, "policy_objects": 5000, "new_objects": 1000},
+}
+SCENARIOS = ("inventory", "events", "push_vlans", "policy_objects", "vpn_exclusions")
+
+
+# ---------------- Mock server ---------------- #
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(scale, rate_limit, latency_ms, jitter_ms):
+    port = free_port()
+    cmd = [sys.executable, str(SERVER), "--port", str(port), "--orgs", "1",
+           "--networks", str(scale["networks"]), "--devices", str(scale["devices"]),
+           "--vlans", str(scale["vlans"]), "--events", str(scale["events"]),
+           "--policy-objects", str(scale["policy_objects"]), "--rate-limit", str(rate_limit),
+           "--latency-ms", str(latency_ms), "--jitter-ms", str(jitter_ms)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    base_url = f"http://127.0.0.1:{port}/api/v1"
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/_mock/stats", timeout=1)
+            return proc, base_url
+        except requests.ConnectionError:
+            if proc.poll() is not None:
+                raise RuntimeError(f"mock server exited:\n{proc.stderr.read()}")
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("mock server did not start within 10s")
+
+
+def server_stats(base_url):
+    return requests.get(base_url.replace("/api/v1", "/_mock/stats"), timeout=5).json()
+
+
+def reset_stats(base_url):
+    requests.post(base_url.replace("/api/v1", "/_mock/reset"), timeout=5)
+
+
+# ---------------- Scenarios ---------------- #
+def org_networks(base_url):
+    import meraki_api
+    return meraki_api.get_all_pages(f"{base_url}/organizations/{ORG_ID}/networks", headers=HEADERS)
+
+
+def scenario_inventory(base_url, scale):
+    from inventory_view import collect_inventory
+    rows = 0
+    for _, matched in collect_inventory(HEADERS, ORG_ID, show_spinner=False):
+        rows += len(matched)
+    return {"rows": rows}
+
+
+def scenario_events(base_url, scale):
+    from troubleshooting import fetch_events
+    events = 0
+    for net in org_networks(base_url):
+        fetched, _, _ = fetch_events(base_url, HEADERS, net["id"], 1, "appliance", verbose=False)
+        events += len(fetched)
+    return {"events": events}
+
+
+def scenario_push_vlans(base_url, scale):
+    from appliance_config import push_vlans
+    vlans = [{"id": 500 + i, "name": f"Bench{i}", "subnet": f"10.250.{i}.0/24", "appliance_ip": f"10.250.{i}.1"}
+             for i in range(scale["vlans"])]
+    ok = failed = 0
+    for net in org_networks(base_url):
+        for result in push_vlans(base_url, HEADERS, net["id"], vlans):
+            ok += result["ok"]
+            failed += not result["ok"]
+    return {"created": ok, "failed": failed}
+
+
+def scenario_policy_objects(base_url, scale):
+    from policy_objects import create_policy_objects, create_policy_object_groups
+    ips = [f"198.18.{i // 256}.{i % 256}" for i in range(scale["new_objects"])]
+    created = create_policy_objects(base_url, HEADERS, ORG_ID, ips, f"Bench{int(time.time())}")
+    create_policy_object_groups(base_url, HEADERS, ORG_ID, created, "Bench")
+    return {"created": len(created)}
+
+
+def scenario_vpn_exclusions(base_url, scale):
+    from vpn_exclusion_push import push_exclusions, build_custom_rules
+    rules = build_custom_rules(f"198.19.0.{i}" for i in range(1, 21))
+    results = push_exclusions(ORG_ID, "mock-key", rules)
+    return {"networks": len(results), "failed": sum(not r["ok"] for r in results)}
+
+
+# ---------------- Runner ---------------- #
+def run_scenario(name, base_url, scale):
+    fn = globals()[f"scenario_{name}"]
+    reset_stats(base_url)
+    tracemalloc.start()
+    start = time.perf_counter()
+    error = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            detail = fn(base_url, scale)
+    except Exception as e:
+        detail, error = {}, f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = server_stats(base_url)
+    return {
+        "scenario": name,
+        "wall_s": round(wall, 3),
+        "requests": stats["requests"],
+        "requests_per_s": round(stats["requests"] / wall, 1) if wall else 0,
+        "rate_limited": stats["rate_limited"],
+        "peak_mem_mb": round(peak / 2**20, 2),
+        "detail": detail,
+        "error": error,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Run only these (repeatable)")
+    parser.add_argument("--rate-limit", type=float, default=10.0, help="Mock per-org requests/second (0 disables)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mock per-request latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency up to this")
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable summary")
+    args = parser.parse_args(argv)
+
+    scale = SCALES[args.scale]
+    proc, base_url = start_server(scale, args.rate_limit, args.latency_ms, args.jitter_ms)
+    os.environ["MERAKI_BASE_URL"] = base_url
+    sys.path.insert(0, str(REPO_ROOT))
+    workdir = tempfile.TemporaryDirectory(prefix="meraki-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir.name)  # backups/logs written by the tools stay out of the repo
+
+    results = []
+    try:
+        for name in args.scenario or SCENARIOS:
+            results.append(run_scenario(name, base_url, scale))
+            if not args.json:
+                r = results[-1]
+                status = f"❌ {r['error']}" if r["error"] else "✅"
+                print(f"{name:<16} {r['wall_s']:>8.2f}s {r['requests']:>7} req {r['requests_per_s']:>8.1f} req/s "
+                      f"{r['rate_limited']:>5} x429 {r['peak_mem_mb']:>8.2f} MB  {status} {r['detail']}", flush=True)
+    finally:
+        os.chdir(cwd)
+        workdir.cleanup()
+        proc.terminate()
+        proc.wait(timeout=5)
+
+    if args.json:
+        print(json.dumps({"scale": args.scale, "config": scale, "rate_limit": args.rate_limit,
+                          "latency_ms": args.latency_ms, "results": results}, indent=2))
+    return 1 if any(r["error"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
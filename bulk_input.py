@@ -0,0 +1,534 @@
+"""One input layer for the bulk YAML / Excel files.
+
+* YAML is read with libyaml (``CSafeLoader``) when PyYAML was built with
+  it.  The record list of a file is streamed from parser events one record
+  at a time, so a file with 100k fixed IPs never exists as a node tree.
+* Excel sheets are read with python-calamine when installed, otherwise
+  with openpyxl in read-only mode, row by row.  Sheet kinds also accept a
+  ``.csv`` file with the same columns.
+* Every record is checked against the schema of its file kind before
+  anything is pushed.  All problems are reported together with the file
+  line (or sheet row) they come from:
+
+      data/fixed_ips.yaml:14: fixed_ips[3].ip: '10.0.0.300' is not a valid IP address
+
+* Valid results are pickled under ``output/cache/inputs`` keyed by the
+  SHA-1 of the file, so an unchanged file is parsed and validated once.
+
+    vlans = bulk_input.load_records("data/vlans.yaml", "vlans")
+    for fixed_ip in bulk_input.iter_records("big_fixed_ips.yaml", "fixed_ips"):
+        ...
+"""
+import csv
+import hashlib
+import ipaddress
+import os
+import pickle
+import re
+from pathlib import Path
+
+import yaml
+
+CACHE_DIR = Path(__file__).resolve().parent / "output" / "cache" / "inputs"
+CACHE_VERSION = 1
+MAX_REPORTED = 25
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class ValidationError(ValueError):
+    """Invalid records in an input file; ``errors`` holds ``(location, field, message)``."""
+
+    def __init__(self, path, errors):
+        self.path, self.errors = str(path), errors
+        lines = [f"{location}: {field}: {message}" if field else f"{location}: {message}"
+                 for location, field, message in errors[:MAX_REPORTED]]
+        if len(errors) > MAX_REPORTED:
+            lines.append(f"... and {len(errors) - MAX_REPORTED} more")
+        super().__init__(f"{len(errors)} problem(s) in {self.path}:\n" + "\n".join(lines))
+
+
+# ---------------- Field checks ---------------- #
+# Each check returns the value to keep or raises ValueError.
+def _int_between(low, high):
+    def check(value):
+        if isinstance(value, bool) or not re.fullmatch(r"\s*\d+\s*", str(value)):
+            raise ValueError(f"expected an integer {low}-{high}, got {value!r}")
+        number = int(value)
+        if not low <= number <= high:
+            raise ValueError(f"{number} is outside {low}-{high}")
+        return number
+    return check
+
+
+VLAN_ID = _int_between(1, 4094)
+
+
+def _text(value):
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool) or not str(value).strip():
+        raise ValueError(f"expected text, got {value!r}")
+    return value
+
+
+def _identifier(value):
+    # Excel readers (python-calamine) return numeric cells as floats: 123456.0 -> "123456"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    if not text:
+        raise ValueError("is empty")
+    return text
+
+
+def _ip(value):
+    try:
+        return str(ipaddress.ip_address(str(value).strip()))
+    except ValueError:
+        raise ValueError(f"{value!r} is not a valid IP address") from None
+
+
+def _cidr(value):
+    try:
+        ipaddress.ip_network(str(value).strip(), strict=False)
+    except ValueError:
+        raise ValueError(f"{value!r} is not a valid CIDR") from None
+    return str(value).strip()
+
+
+def _mac(value):
+    if not re.fullmatch(r"([0-9a-fA-F]{2}[:-]){5}[0-9a-fA-F]{2}", str(value).strip()):
+        raise ValueError(f"{value!r} is not a MAC address")
+    return str(value).strip()
+
+
+def _choice(*options):
+    lowered = {o.lower() for o in options}
+
+    def check(value):
+        if str(value).lower() not in lowered:
+            raise ValueError(f"{value!r} is not one of {', '.join(options)}")
+        return value
+    return check
+
+
+def _ports(value):
+    from firewall_analyzer import parse_ports
+
+    try:
+        for start, end in parse_ports(value):
+            if not 0 <= start <= end <= 65535:
+                raise ValueError
+    except ValueError:
+        raise ValueError(f"{value!r} is not 'any', a port, a range or a list of them") from None
+    return value
+
+
+def _addresses(value):
+    # CIDRs / IPs are checked; VLAN(...), OBJ(...), GRP(...) and FQDNs pass through
+    for part in str(value).split(","):
+        part = part.strip()
+        if not part:
+            raise ValueError(f"empty entry in {value!r}")
+        if part[0].isdigit() and not re.fullmatch(r"[\d.]+[a-zA-Z][\w.-]*", part):
+            _cidr(part)
+    return value.strip() if isinstance(value, str) else value
+
+
+def _ranges(value):
+    if not isinstance(value, list):
+        raise ValueError("expected a list of {start, end} ranges")
+    for item in value:
+        if not isinstance(item, dict) or "start" not in item or "end" not in item:
+            raise ValueError(f"range {item!r} needs start and end")
+        if ipaddress.ip_address(_ip(item["start"])) > ipaddress.ip_address(_ip(item["end"])):
+            raise ValueError(f"range {item['start']}-{item['end']}: start is after end")
+    return value
+
+
+def _port_spec(value):
+    from switch_config import parse_port_spec
+
+    if not parse_port_spec(str(value)):
+        raise ValueError(f"{value!r} names no ports (e.g. '1-24,48')")
+    return str(value)
+
+
+def _serial(value):
+    text = str(value).strip().upper()
+    if not re.fullmatch(r"[A-Z0-9]+(-[A-Z0-9]+)+", text):
+        raise ValueError(f"{value!r} is not a device serial (e.g. Q2XX-XXXX-XXXX)")
+    return text
+
+
+def _vlan_ranges(value):
+    text = str(value).replace(" ", "")
+    if text.lower() == "all":
+        return text
+    for part in text.split(","):
+        for vlan in part.split("-", 1):
+            VLAN_ID(vlan)
+    return text
+
+
+# ---------------- Record checks ---------------- #
+def _check_vlan(record):
+    if "subnet" in record and "appliance_ip" in record:
+        if ipaddress.ip_address(record["appliance_ip"]) not in ipaddress.ip_network(record["subnet"], strict=False):
+            yield "appliance_ip", f"{record['appliance_ip']} is outside {record['subnet']}"
+
+
+def _check_range(record):
+    if ipaddress.ip_address(record["start"]) > ipaddress.ip_address(record["end"]):
+        yield "start", f"{record['start']} is after {record['end']}"
+
+
+def _check_port_profile(record):
+    if str(record["type"]).lower() == "trunk" and record.get("voice_vlan") is not None:
+        yield "voice_vlan", "only access ports carry a voice VLAN"
+    if str(record["type"]).lower() == "access" and record.get("allowed") is not None:
+        yield "allowed", "allowed VLANs only apply to trunk ports"
+
+
+def _check_ssid(record):
+    from ssid_deploy import literal_secrets
+    from wireless_config import WPA3_MODES
+
+    for path in literal_secrets(record):
+        yield path, "secrets must be a {vault_secret: NAME} or {env: VAR} reference, not a literal"
+    if str(record.get("authMode", "")).lower() == "psk" and record.get("psk") is None:
+        yield "psk", "is required for authMode psk"
+    dot11w = record.get("dot11w")
+    if record.get("wpaEncryptionMode") in WPA3_MODES and isinstance(dot11w, dict) and not dot11w.get("enabled"):
+        yield "dot11w", f"{record['wpaEncryptionMode']} needs dot11w (802.11w) enabled"
+
+
+def _check_rule(record):
+    protocol = str(record.get("protocol", "any")).lower()
+    if protocol not in ("tcp", "udp", "any"):
+        for field in ("srcPort", "destPort"):
+            if str(record.get(field, "any")).lower() not in ("any", ""):
+                yield field, f"ports need protocol tcp or udp (not {protocol})"
+
+
+class Schema:
+    """Fields (``name: (check, required)``) of one record kind and where its records live.
+
+    ``root`` is the key holding the record list (None: the document is the
+    list); ``item`` checks scalar records; ``sheet`` marks an Excel sheet.
+    """
+
+    def __init__(self, fields=None, root=None, item=None, check=None, sheet=None, optional_sheet=False):
+        self.fields, self.root, self.item, self.check = fields or {}, root, item, check
+        self.sheet, self.optional_sheet = sheet, optional_sheet
+
+    def validate(self, record):
+        """Return ``(record, [(field, message)])``."""
+        if self.item:
+            try:
+                return self.item(record), []
+            except ValueError as e:
+                return record, [("", str(e))]
+        if not isinstance(record, dict):
+            return record, [("", f"expected a mapping, got {type(record).__name__}")]
+        problems = []
+        for name, (check, required) in self.fields.items():
+            value = record.get(name)
+            if value is None or (isinstance(value, str) and not value.strip()):
+                if required:
+                    problems.append((name, "is required"))
+                continue
+            try:
+                record[name] = check(value)
+            except ValueError as e:
+                problems.append((name, str(e)))
+        if not problems and self.check:
+            problems.extend(self.check(record))
+        return record, problems
+
+
+FIREWALL_RULE = Schema({
+    "policy": (_choice("allow", "deny"), True),
+    "protocol": (_choice("tcp", "udp", "icmp", "icmp6", "any"), True),
+    "srcCidr": (_addresses, True),
+    "destCidr": (_addresses, True),
+    "srcPort": (_ports, False),
+    "destPort": (_ports, False),
+    "comment": (_text, False),
+}, check=_check_rule)
+
+SCHEMAS = {
+    "vlans": Schema({
+        "id": (VLAN_ID, True),
+        "name": (_text, True),
+        "subnet": (_cidr, False),
+        "appliance_ip": (_ip, False),
+    }, root="vlans", check=_check_vlan),
+    "dhcp": Schema({
+        "vlan_id": (VLAN_ID, True),
+        "dhcpHandling": (_choice("Run a DHCP server", "Relay DHCP to another server",
+                                 "Do not respond to DHCP requests"), False),
+        "applianceIp": (_ip, False),
+        "subnet": (_cidr, False),
+        "dhcpLeaseTime": (_choice("30 minutes", "1 hour", "4 hours", "12 hours", "1 day", "1 week"), False),
+        "reservedIpRanges": (_ranges, False),
+    }, root="dhcp_settings"),
+    "fixed_ips": Schema({
+        "vlan_id": (VLAN_ID, True),
+        "mac": (_mac, True),
+        "ip": (_ip, True),
+        "name": (_text, False),
+    }, root="fixed_ips"),
+    "reserved_ranges": Schema({
+        "vlan_id": (VLAN_ID, True),
+        "start": (_ip, True),
+        "end": (_ip, True),
+        "comment": (_text, False),
+    }, root="reserved_ranges", check=_check_range),
+    "firewall": FIREWALL_RULE,
+    "port_profiles": Schema({
+        "profile": (_text, True),
+        "ports": (_port_spec, True),
+        "type": (_choice("access", "trunk"), True),
+        "vlan": (VLAN_ID, True),
+        "voice_vlan": (VLAN_ID, False),
+        "allowed": (_vlan_ranges, False),
+        "name": (_text, False),
+    }, root="port_profiles", check=_check_port_profile),
+    "ssids": Schema({
+        "number": (_int_between(0, 14), True),
+        "name": (_text, True),
+        "authMode": (_choice("open", "psk", "open-with-radius", "8021x-meraki", "8021x-radius", "8021x-google",
+                             "8021x-localradius", "ipsk-with-radius", "ipsk-without-radius"), False),
+        "wpaEncryptionMode": (_choice("WPA1 only", "WPA1 and WPA2", "WPA2 only", "WPA3 Transition Mode",
+                                      "WPA3 only", "WPA3 192-bit Security"), False),
+        "ipAssignmentMode": (_choice("NAT mode", "Bridge mode", "Layer 3 roaming",
+                                     "Layer 3 roaming with a concentrator", "VPN"), False),
+        "bandSelection": (_choice("Dual band operation", "5 GHz band only",
+                                  "Dual band operation with Band Steering"), False),
+        "defaultVlanId": (VLAN_ID, False),
+    }, root="ssids", check=_check_ssid),
+    "policy_objects": Schema(root="ips", item=_ip),
+    "device_names": Schema({"serial": (_serial, True), "name": (_text, True)}, sheet="Names"),
+    "vpn_orgs": Schema({"OrganizationId": (_identifier, True)}, sheet="Organizations"),
+    "vpn_ips": Schema({"IP": (_addresses, True)}, sheet="IPList"),
+    "vpn_removals": Schema({"destination": (_text, True)}, sheet="IPList"),
+    "vpn_apps": Schema({"id": (_identifier, True)}, sheet="AppList", optional_sheet=True),
+}
+
+
+# ---------------- YAML streaming ---------------- #
+def _compose(loader, anchors):
+    """Build the node of the next value from parser events."""
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        return anchors[event.anchor]
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag if event.tag not in (None, "!") else loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag if event.tag not in (None, "!") else loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(_compose(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+    elif isinstance(event, yaml.MappingStartEvent):
+        tag = event.tag if event.tag not in (None, "!") else loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _compose(loader, anchors)
+            node.value.append((key, _compose(loader, anchors)))
+        node.end_mark = loader.get_event().end_mark
+    else:
+        raise yaml.YAMLError(f"unexpected {type(event).__name__} at line {event.start_mark.line + 1}")
+    if getattr(event, "anchor", None):
+        anchors[event.anchor] = node
+    return node
+
+
+def _iter_yaml_items(path, root):
+    """Yield ``(line, {field: line}, value)`` per item of the document's list (or of ``root``'s list)."""
+    with open(path, "rb") as stream:
+        loader = Loader(stream)
+        try:
+            loader.get_event()                                   # stream start
+            if loader.check_event(yaml.StreamEndEvent):
+                return
+            loader.get_event()                                   # document start
+            anchors = {}
+            if root is not None:
+                if not loader.check_event(yaml.MappingStartEvent):
+                    raise yaml.YAMLError(f"expected a mapping with a '{root}' list")
+                loader.get_event()
+                while True:
+                    if loader.check_event(yaml.MappingEndEvent):
+                        return                                   # root key missing: no records
+                    key = _compose(loader, anchors)
+                    if getattr(key, "value", None) == root:
+                        break
+                    _compose(loader, anchors)                    # skip this value
+            if loader.check_event(yaml.ScalarEvent) and loader.peek_event().value in ("", "~", "null"):
+                return
+            if not loader.check_event(yaml.SequenceStartEvent):
+                raise yaml.YAMLError(f"line {loader.peek_event().start_mark.line + 1}: expected a list")
+            loader.get_event()
+            while not loader.check_event(yaml.SequenceEndEvent):
+                node = _compose(loader, anchors)
+                lines = {}
+                if isinstance(node, yaml.MappingNode):
+                    lines = {k.value: k.start_mark.line + 1 for k, _ in node.value if isinstance(k, yaml.ScalarNode)}
+                yield node.start_mark.line + 1, lines, loader.construct_document(node)
+        finally:
+            loader.dispose()
+
+
+# ---------------- Excel ---------------- #
+def _iter_sheet_rows(path, sheet, optional=False):
+    """Yield ``(row number, {header: value})`` for the non-empty rows of ``sheet``."""
+    try:
+        from python_calamine import CalamineWorkbook
+    except ImportError:
+        CalamineWorkbook = None
+
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_path(str(path))
+        if sheet not in workbook.sheet_names:
+            if optional:
+                return
+            raise ValueError(f"{path}: no sheet named '{sheet}'")
+        rows = iter(workbook.get_sheet_by_name(sheet).to_python(skip_empty_area=False))
+        close = None
+    else:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        if sheet not in workbook.sheetnames:
+            workbook.close()
+            if optional:
+                return
+            raise ValueError(f"{path}: no sheet named '{sheet}'")
+        rows = workbook[sheet].iter_rows(values_only=True)
+        close = workbook.close
+    try:
+        header = [str(h).strip() if h not in (None, "") else None for h in next(rows, ())]
+        for number, row in enumerate(rows, start=2):
+            if all(v in (None, "") for v in row):
+                continue
+            yield number, {h: v for h, v in zip(header, row) if h}
+    finally:
+        if close:
+            close()
+
+
+def _iter_csv_rows(path):
+    """Yield ``(line number, {header: value})`` for the non-empty rows of a CSV file."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [(h or "").strip() for h in reader.fieldnames or []]
+        for row in reader:
+            if all(v in (None, "") for v in row.values()):
+                continue
+            yield reader.line_num, {h: v for h, v in row.items() if h}
+
+
+# ---------------- Loading ---------------- #
+def _raw_records(path, schema):
+    """``(location, {field: location}, record)`` in file order."""
+    if schema.sheet and str(path).lower().endswith(".csv"):
+        for line, record in _iter_csv_rows(path):
+            yield f"{path}:{line}", {}, record
+    elif schema.sheet:
+        for row, record in _iter_sheet_rows(path, schema.sheet, schema.optional_sheet):
+            location = f"{path}[{schema.sheet}] row {row}"
+            yield location, {}, record
+    else:
+        for line, lines, record in _iter_yaml_items(path, schema.root):
+            yield f"{path}:{line}", {k: f"{path}:{n}" for k, n in lines.items()}, record
+
+
+def _label(schema, index, field):
+    prefix = f"{schema.root}[{index}]" if schema.root else f"[{index}]"
+    return f"{prefix}.{field}" if field else prefix
+
+
+def iter_records(path, kind):
+    """Stream validated records (no cache, no list of them).
+
+    Invalid records are skipped and every problem is raised together as a
+    :class:`ValidationError` once the file has been read, so a consumer that
+    reads all records before writing anything never acts on a bad file.
+    """
+    schema = SCHEMAS[kind]
+    errors = []
+    try:
+        for index, (location, field_locations, record) in enumerate(_raw_records(path, schema)):
+            record, problems = schema.validate(record)
+            if problems:
+                errors.extend((field_locations.get(f, location), _label(schema, index, f), m) for f, m in problems)
+            else:
+                yield record
+    except yaml.YAMLError as e:
+        errors.append((str(path), "", f"YAML syntax: {e}"))
+    if errors:
+        raise ValidationError(path, errors)
+
+
+def validate_file(path, kind):
+    """All problems of a file as ``(location, field, message)`` (records are not kept)."""
+    schema = SCHEMAS[kind]
+    errors = []
+    try:
+        for index, (location, field_locations, record) in enumerate(_raw_records(path, schema)):
+            _, problems = schema.validate(record)
+            errors.extend((field_locations.get(f, location), _label(schema, index, f), m) for f, m in problems)
+    except yaml.YAMLError as e:
+        errors.append((str(path), "", f"YAML syntax: {e}"))
+    return errors
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_records(path, kind):
+    """Validated records of ``path`` as a list; every problem is reported at once.
+
+    Results are cached by file content, so repeated loads of an unchanged
+    file only unpickle.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Input file not found: {path}")
+    cache = CACHE_DIR / f"{kind}-v{CACHE_VERSION}-{file_digest(path)}.pickle"
+    try:
+        with open(cache, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        pass
+
+    schema = SCHEMAS[kind]
+    records, errors = [], []
+    try:
+        for index, (location, field_locations, record) in enumerate(_raw_records(path, schema)):
+            record, problems = schema.validate(record)
+            if problems:
+                errors.extend((field_locations.get(f, location), _label(schema, index, f), m) for f, m in problems)
+            else:
+                records.append(record)
+    except yaml.YAMLError as e:
+        errors.append((str(path), "", f"YAML syntax: {e}"))
+    if errors:
+        raise ValidationError(path, errors)
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(cache.name + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+    return records
@@ -0,0 +1,600 @@
+"""Headless subcommands for cron / CI runs.
+
+    python3 main.py inventory --org 123456 --tag branch --format csv -o inventory.csv
+    python3 main.py status --org 123456 --format jsonl
+    python3 main.py push-vlans --org 123456 --tag new-site --file data/vlans.yaml
+
+No banner, no integrity prompt and no interactive selection: the API key
+comes from ``$MERAKI_DASHBOARD_API_KEY`` (or ``--api-key-env``) or from
+Azure Key Vault via ``--vault/--secret``.  Results are written to stdout
+(or ``--output``) as JSON, JSON lines or CSV; progress messages go to
+stderr.  The exit code is non-zero if any write failed.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import api_cassette
+import meraki_api
+import tracing
+
+API_KEY_ENV = "MERAKI_DASHBOARD_API_KEY"
+OUTPUT_FORMATS = ("json", "jsonl", "csv")
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE = 0, 1, 2
+
+
+class UsageError(Exception):
+    pass
+
+
+# ---------------- Parser ---------------- #
+def add_headless_commands(parser):
+    common = argparse.ArgumentParser(add_help=False)
+    auth = common.add_argument_group("authentication")
+    auth.add_argument("--api-key-env", default=API_KEY_ENV, metavar="VAR",
+                      help=f"Environment variable holding the API key (default: {API_KEY_ENV})")
+    auth.add_argument("--vault", metavar="NAME", help="Azure Key Vault name (used if the env var is unset)")
+    auth.add_argument("--secret", metavar="NAME", help="Key Vault secret holding the API key")
+    out = common.add_argument_group("output")
+    out.add_argument("--format", choices=OUTPUT_FORMATS, help="Output format (default: from --output suffix, else json)")
+    out.add_argument("--output", "-o", metavar="FILE", help="Write results to FILE instead of stdout")
+
+    targets = argparse.ArgumentParser(add_help=False)
+    targets.add_argument("--org", required=True, help="Organization ID")
+    targets.add_argument("--network", action="append", default=[], metavar="ID", help="Network ID (repeatable)")
+    targets.add_argument("--tag", action="append", default=[], help="Select networks carrying this tag (repeatable)")
+
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND",
+                                title="headless commands (non-interactive)")
+
+    sub.add_parser("orgs", parents=[common], help="List organizations")
+
+    sub.add_parser("networks", parents=[common, targets], help="List networks of an organization")
+
+    p = sub.add_parser("inventory", parents=[common, targets], help="Advanced inventory (VLANs, L3 interfaces, firmware)")
+    p.add_argument("--search", default="", help="Only rows containing this text")
+
+    p = sub.add_parser("status", parents=[common, targets], help="Device status / last reported report")
+    p.add_argument("--no-history", action="store_true", help="Do not append this poll to the availability store")
+
+    p = sub.add_parser("availability", parents=[common], help="Availability %%, MTBF and offline percentiles from stored polls")
+    p.add_argument("--org", required=True, help="Organization ID")
+    p.add_argument("--days", type=float, default=30, help="Window length in days (default: 30)")
+    p.add_argument("--group-by", choices=["device", "model", "network"], default="device")
+
+    p = sub.add_parser("events", parents=[common, targets], help="Network event log")
+    p.add_argument("--days", type=int, default=1)
+    p.add_argument("--product-type", choices=["appliance", "switch", "wireless"], default="appliance")
+    p.add_argument("--type", dest="event_type", help="Only this event type")
+    p.add_argument("--keyword", default="", help="Comma-separated keywords (requires --type)")
+
+    p = sub.add_parser("push-vlans", parents=[common, targets], help="Reconcile VLANs with a YAML file")
+    p.add_argument("--file", help="VLAN YAML (default: data/vlans.yaml)")
+    p.add_argument("--prune", action="store_true", help="Delete VLANs that are not in the file")
+    p.add_argument("--dry-run", action="store_true", help="Only report the create/update/delete plan")
+    p.add_argument("--allow-overlaps", action="store_true",
+                   help="Push even if subnets overlap existing address space in the org")
+
+    p = sub.add_parser("provision-ports", parents=[common, targets],
+                       help="Apply a switch port profile to the switches of the selected networks")
+    p.add_argument("--profile", required=True, help="Profile name from the profile file")
+    p.add_argument("--file", help="Port profile YAML (default: data/port_profiles.yaml)")
+    p.add_argument("--switch", action="append", default=[], metavar="SEL",
+                   help="Only these switches: serial, name or stack name (repeatable)")
+
+    p = sub.add_parser("push-ssids", parents=[common, targets],
+                       help="Bring the SSIDs of the selected networks in line with an SSID YAML file")
+    p.add_argument("--file", help="SSID YAML (default: data/ssids.yaml); secrets come from --vault or its 'vault:'")
+
+    sub.add_parser("ssid-report", parents=[common, targets],
+                   help="SSID compliance of every wireless network (or the selected ones) against the baseline")
+
+    p = sub.add_parser("rename-devices", parents=[common, targets],
+                       help="Rename devices from a naming template or a serial,name mapping in action batches")
+    names = p.add_mutually_exclusive_group(required=True)
+    names.add_argument("--template", help="Naming template, e.g. '{site}-{floor}-{type}{index:02d}'")
+    names.add_argument("--file", help="CSV / Excel mapping with serial and name columns")
+    p.add_argument("--type", dest="types", action="append", default=[], metavar="TYPE",
+                   help="Only these device types, e.g. MS or MR (repeatable)")
+    p.add_argument("--all-networks", action="store_true", help="Every network in the org")
+    p.add_argument("--plan", action="store_true", help="Only compute and report the new names")
+
+    p = sub.add_parser("port-lookup", parents=[common], help="Find switch ports org-wide from the port index")
+    p.add_argument("--org", required=True, help="Organization ID")
+    query = p.add_mutually_exclusive_group(required=True)
+    query.add_argument("--vlan", type=int, help="Ports carrying this VLAN (access, voice, native or allowed)")
+    query.add_argument("--allowed", metavar="LIST", help="Trunks with exactly this allowed VLAN list")
+    query.add_argument("--mode", choices=["access", "trunk"], help="Ports in this mode")
+    query.add_argument("--neighbor", metavar="TEXT", help="LLDP/CDP neighbor name contains TEXT")
+    query.add_argument("--mac", help="Where this client MAC was last seen")
+    p.add_argument("--full-refresh", action="store_true", help="Rebuild the index instead of an incremental sync")
+
+    p = sub.add_parser("address-plan", parents=[common],
+                       help="Overlapping VLANs, L3 interfaces and VPN subnets across an organization")
+    p.add_argument("--org", required=True, help="Organization ID")
+
+    p = sub.add_parser("firewall-report", parents=[common, targets],
+                       help="Shadowed / redundant / conflicting firewall rules per network")
+    p.add_argument("--all-networks", action="store_true", help="Analyze every appliance network in the org")
+    p.add_argument("--rule-type", choices=["l3", "inbound", "both"], default="l3")
+
+    p = sub.add_parser("firewall-simulate", parents=[common, targets],
+                       help="Replay flows against live (and proposed) firewall rules per network")
+    p.add_argument("--flows", required=True, metavar="CSV", help="Flows: src,dst,protocol,dport[,sport]")
+    p.add_argument("--proposed", metavar="YAML", help="Proposed rule list to compare with the live rules")
+    p.add_argument("--all-networks", action="store_true", help="Every appliance network in the org")
+    p.add_argument("--rule-type", choices=["l3", "inbound"], default="l3")
+    p.add_argument("--resolve-objects", action="store_true",
+                   help="Fetch the org's policy objects up front (default: only when rules use OBJ()/GRP())")
+
+    p = sub.add_parser("fanout", parents=[common, targets],
+                       help="Apply the appliance bundle (VLANs, DHCP, bindings, firewall) to many networks")
+    p.add_argument("--name-regex", metavar="REGEX", help="Also select networks whose name matches")
+    p.add_argument("--steps", default="all", help="Comma-separated steps (default: all)")
+    p.add_argument("--bundle", metavar="DIR", help="Directory with the YAML templates (default: data/)")
+    p.add_argument("--resume", metavar="STATE", help="Retry the unfinished steps of a saved run")
+
+    p = sub.add_parser("vpn-exclusions", help="Push or remove VPN exclusion rules")
+    vpn = p.add_subparsers(dest="vpn_action", metavar="ACTION", required=True)
+    vpn_targets = argparse.ArgumentParser(add_help=False)
+    vpn_targets.add_argument("--org", action="append", required=True, help="Organization ID (repeatable)")
+    vpn_targets.add_argument("--network", action="append", default=[], metavar="ID",
+                             help="Only these network IDs (repeatable)")
+    vpn_targets.add_argument("--all-networks", action="store_true", help="Apply to every network in the org(s)")
+
+    p = vpn.add_parser("push", parents=[common, vpn_targets], help="Add custom exclusion destinations")
+    p.add_argument("--ip", action="append", default=[], help="Destination IP/CIDR (repeatable)")
+    p.add_argument("--input", metavar="XLSX", help="Read destinations from the 'IPList' sheet (column 'IP')")
+    p.add_argument("--overwrite-duplicates", action="store_true")
+
+    p = vpn.add_parser("remove", parents=[common, vpn_targets], help="Remove destinations / major applications")
+    p.add_argument("--destination", action="append", default=[], help="Destination to remove (repeatable)")
+    p.add_argument("--app-id", action="append", default=[], help="Major application ID to remove (repeatable)")
+
+    p = sub.add_parser("snapshot", parents=[common],
+                       help="Snapshot the org's configuration and list what changed since the last one")
+    p.add_argument("--org", required=True, help="Organization ID")
+    p.add_argument("--keep", type=int, metavar="N", help="Then keep only the newest N snapshots")
+
+    p = sub.add_parser("multi-org", parents=[common], help="Consolidated inventory/status across organizations")
+    p.add_argument("--orgs", default="all", help="'all', org IDs or name filters (comma-separated)")
+    p.add_argument("--no-status", action="store_true", help="Skip device statuses")
+    p.add_argument("--rate", type=float, default=meraki_api.ORG_RATE_LIMIT, help="Requests/second per org")
+    p.add_argument("--workers", type=int, default=meraki_api.MAX_WORKERS, help="Orgs crawled in parallel")
+
+    return sub
+
+
+# ---------------- Helpers ---------------- #
+def resolve_api_key(args):
+    if api_cassette.mode == "replay":
+        return os.environ.get(args.api_key_env) or "replay"
+    api_key = os.environ.get(args.api_key_env)
+    if api_key:
+        return api_key
+    if args.vault and args.secret:
+        from azure.identity import DefaultAzureCredential
+        from azure.keyvault.secrets import SecretClient
+
+        client = SecretClient(vault_url=f"https://{args.vault}.vault.azure.net", credential=DefaultAzureCredential())
+        return client.get_secret(args.secret).value
+    raise UsageError(f"No API key: set ${args.api_key_env} or pass --vault and --secret")
+
+
+def headers_for(api_key):
+    return {"Authorization": f"Bearer {api_key}",
+            "Accept": "application/json",
+            "Content-Type": "application/json"}
+
+
+def resolve_networks(headers, org_id, network_ids=(), tags=(), all_networks=False):
+    """Return the org's networks selected by ID and/or tag; IDs outside the org are a usage error."""
+    networks = meraki_api.get_all_pages(f"/organizations/{org_id}/networks", headers=headers)
+    if not network_ids and not tags:
+        if all_networks:
+            return networks
+        raise UsageError("Select networks with --network and/or --tag")
+    unknown = set(network_ids) - {n["id"] for n in networks}
+    if unknown:
+        raise UsageError(f"Network(s) not in org {org_id}: {', '.join(sorted(unknown))}")
+    wanted_tags = set(tags)
+    return [n for n in networks
+            if n["id"] in network_ids or wanted_tags.intersection(n.get("tags") or [])]
+
+
+def emit(rows, fmt=None, output=None, stream=None):
+    if fmt is None:
+        suffix = os.path.splitext(output or "")[1].lstrip(".").lower()
+        fmt = suffix if suffix in OUTPUT_FORMATS else "json"
+    rows = list(rows)
+
+    with (open(output, "w", newline="", encoding="utf-8") if output else contextlib.nullcontext(stream)) as fh:
+        if fmt == "json":
+            json.dump(rows, fh, indent=2, default=str)
+            fh.write("\n")
+        elif fmt == "jsonl":
+            for row in rows:
+                fh.write(json.dumps(row, default=str))
+                fh.write("\n")
+        else:
+            fieldnames = []
+            for row in rows:
+                fieldnames.extend(k for k in row if k not in fieldnames)
+            writer = csv.DictWriter(fh, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def _failed(rows):
+    return any(row.get("ok") is False for row in rows)
+
+
+# ---------------- Commands ---------------- #
+def cmd_orgs(args, headers):
+    return meraki_api.get_all_pages("/organizations", headers=headers)
+
+
+def cmd_networks(args, headers):
+    return resolve_networks(headers, args.org, args.network, args.tag, all_networks=True)
+
+
+def _selected_ids(headers, args):
+    network_ids = {n["id"] for n in resolve_networks(headers, args.org, args.network, args.tag)}
+    if not network_ids:
+        raise UsageError("No networks match the --network / --tag selection")
+    return network_ids
+
+
+def cmd_inventory(args, headers):
+    from inventory_view import collect_inventory
+
+    network_ids = None
+    if args.network or args.tag:
+        network_ids = _selected_ids(headers, args)
+    rows = []
+    for net, matched in collect_inventory(headers, args.org, args.search, network_ids=network_ids, show_spinner=False):
+        for row in matched:
+            rows.append({"network_id": net["id"], **row})
+    return rows
+
+
+def cmd_status(args, headers):
+    from device_status import enrich_device
+    from availability_store import record_status_snapshot
+
+    devices = meraki_api.get_all_pages(f"/organizations/{args.org}/devices/statuses", headers=headers)
+    if not args.no_history:
+        record_status_snapshot(args.org, devices)
+
+    network_ids = None
+    if args.network or args.tag:
+        network_ids = _selected_ids(headers, args)
+
+    rows = []
+    for device in devices:
+        if network_ids is not None and device.get("networkId") not in network_ids:
+            continue
+        row, hours = enrich_device(device)
+        rows.append({**row, "networkId": device.get("networkId"), "productType": device.get("productType"),
+                     "hoursSinceReport": hours})
+    return rows
+
+
+def cmd_availability(args, headers):
+    from availability_store import store_for_org
+
+    end = datetime.now(timezone.utc)
+    return store_for_org(args.org).availability(end - timedelta(days=args.days), end, group_by=args.group_by)
+
+
+def cmd_events(args, headers):
+    from troubleshooting import fetch_events, filter_events
+
+    rows = []
+    for net in resolve_networks(headers, args.org, args.network, args.tag):
+        events, _, _ = fetch_events(meraki_api.BASE_URL, headers, net["id"], args.days, args.product_type, verbose=False)
+        if args.event_type:
+            events = filter_events(events, args.event_type, args.keyword)
+        rows.extend({"networkId": net["id"], **event} for event in events)
+    return rows
+
+
+def cmd_push_vlans(args, headers):
+    from appliance_config import load_vlans_yaml, push_vlans
+
+    vlans = load_vlans_yaml(args.file)
+    networks = resolve_networks(headers, args.org, args.network, args.tag)
+    if not args.allow_overlaps:
+        from address_plan import get_plan
+
+        plan = get_plan(headers, args.org)
+        subnets = [(v["id"], v.get("name", ""), v["subnet"]) for v in vlans if v.get("subnet")]
+        overlaps = [(net, row) for net in networks for row in plan.check_vlans(net["id"], subnets)]
+        for net, row in overlaps:
+            print(f"⚠️ {net.get('name', net['id'])}: {row['subnet_a']} {row['severity']} with {row['subnet_b']} "
+                  f"({row['source_b']} {row['network_b']} {row['name_b']})", file=sys.stderr)
+        if overlaps and not args.dry_run:
+            raise UsageError(f"{len(overlaps)} overlap(s) with existing address space; pass --allow-overlaps to push anyway")
+    rows = []
+    for net in networks:
+        rows.extend(push_vlans(meraki_api.BASE_URL, headers, net["id"], vlans, prune=args.prune, dry_run=args.dry_run))
+    return rows
+
+
+def cmd_provision_ports(args, headers):
+    from switch_provisioning import (PROFILE_FILE, load_profiles, compile_profile, get_switches, get_stacks,
+                                     select_switches, provision)
+
+    profiles = load_profiles(args.file or PROFILE_FILE)
+    if args.profile not in profiles:
+        raise UsageError(f"unknown profile {args.profile!r} (have: {', '.join(profiles)})")
+    table = compile_profile(profiles[args.profile])
+    switches = []
+    for net in resolve_networks(headers, args.org, args.network, args.tag):
+        found = get_switches(headers, net["id"])
+        if args.switch:
+            found = select_switches(found, get_stacks(headers, net["id"]), ",".join(args.switch))
+        switches.extend(found)
+    rows = provision(headers, switches, table, org_id=args.org)
+    for row in rows:
+        row["ok"] = not (row["failed"] or row["error"])
+    return rows
+
+
+def cmd_push_ssids(args, headers):
+    from ssid_deploy import SSID_FILE, load_ssids, deploy, show_summary
+
+    try:
+        payloads = load_ssids(args.file or SSID_FILE, vault=args.vault)
+    except (OSError, ValueError) as e:
+        raise UsageError(str(e)) from None
+    networks = resolve_networks(headers, args.org, args.network, args.tag)
+    if args.tag:
+        networks = [n for n in networks if "wireless" in n.get("productTypes", [])]
+    rows = deploy(headers, networks, payloads, org_id=args.org)
+    show_summary(rows)
+    for row in rows:
+        row["ok"] = row["status"] != "failed"
+    return rows
+
+
+def cmd_ssid_report(args, headers):
+    from wireless_report import SEVERITY_ORDER, wireless_networks, compliance_rows, show_summary
+
+    if args.network or args.tag:
+        networks = resolve_networks(headers, args.org, args.network, args.tag)
+    else:
+        networks = wireless_networks(headers, args.org)
+    errors = {}
+    rows = sorted(compliance_rows(headers, args.org, networks, errors=errors),
+                  key=lambda r: (SEVERITY_ORDER[r["severity"]], r["network"], r["number"]))
+    show_summary(rows, errors)
+    rows.extend({"network_id": network_id, "severity": "error", "findings": f"not readable: {error}", "ok": False}
+                for network_id, error in errors.items())
+    return rows
+
+
+def cmd_rename_devices(args, headers):
+    from device_rename import collect_devices, template_names, load_mapping, plan_renames, apply_renames
+
+    if not (args.network or args.tag or args.all_networks):
+        raise UsageError("Select networks with --network, --tag or --all-networks")
+    network_ids = None
+    if args.network or args.tag:
+        network_ids = [n["id"] for n in resolve_networks(headers, args.org, args.network, args.tag)]
+        if not network_ids:
+            raise UsageError("No networks match the --network / --tag selection")
+    devices, networks = collect_devices(headers, args.org, network_ids, args.types)
+    try:
+        names = template_names(devices, networks, args.template) if args.template else load_mapping(args.file)
+    except (OSError, ValueError) as e:
+        raise UsageError(str(e)) from None
+    rows = plan_renames(devices, networks, names)
+    if not args.plan:
+        apply_renames(headers, args.org, rows)
+    for row in rows:
+        row["ok"] = row["status"] != "failed"
+    return rows
+
+
+def cmd_port_lookup(args, headers):
+    from port_index import PortIndex, lookup
+
+    index = PortIndex.load(args.org)
+    index.refresh(headers, full=args.full_refresh, clients=args.mac is not None)
+    kind = next(k for k in ("vlan", "allowed", "mode", "neighbor", "mac") if getattr(args, k) is not None)
+    rows, ms = lookup(index, kind, getattr(args, kind))
+    print(f"🔎 {len(rows)} port(s) in {ms:.2f} ms")
+    return rows
+
+
+def cmd_address_plan(args, headers):
+    from address_plan import collect_plan, find_overlaps
+
+    entries, errors = collect_plan(headers, args.org)
+    for ref, error in errors.items():
+        print(f"❌ {ref}: {error}", file=sys.stderr)
+    return find_overlaps(entries) + [{"severity": "error", "network_a": ref, "name_a": f"not readable: {error}",
+                                      "ok": False} for ref, error in errors.items()]
+
+
+def cmd_firewall_report(args, headers):
+    from firewall_analyzer import analyze_networks
+
+    networks = resolve_networks(headers, args.org, args.network, args.tag, all_networks=args.all_networks)
+    if args.all_networks and not args.network and not args.tag:
+        networks = [n for n in networks if "appliance" in n.get("productTypes", [])]
+    rule_types = ("l3", "inbound") if args.rule_type == "both" else (args.rule_type,)
+    rows, errors = analyze_networks(headers, networks, rule_types)
+    for (net_id, kind), error in errors.items():
+        print(f"❌ {net_id} ({kind}): {error}", file=sys.stderr)
+    rows.extend({"network_id": net_id, "rule_type": kind, "type": "error", "detail": f"not readable: {error}",
+                 "ok": False} for (net_id, kind), error in errors.items())
+    return rows
+
+
+def cmd_firewall_simulate(args, headers):
+    import bulk_input
+    from firewall_simulator import load_flows, policy_object_aliases, simulate_networks, compile_rules
+
+    networks = resolve_networks(headers, args.org, args.network, args.tag, all_networks=args.all_networks)
+    if args.all_networks and not args.network and not args.tag:
+        networks = [n for n in networks if "appliance" in n.get("productTypes", [])]
+    proposed = bulk_input.load_records(args.proposed, "firewall") if args.proposed else None
+    flows = load_flows(args.flows)
+    aliases = None
+    if args.resolve_objects or (proposed and compile_rules(proposed).unresolved):
+        aliases = policy_object_aliases(headers, args.org)
+    rows, errors = simulate_networks(headers, networks, flows, args.rule_type, proposed, aliases)
+    unresolved = {r["network_id"] for r in rows if r["unresolved_rules"]}
+    if unresolved and aliases is None:     # live rules use OBJ()/GRP(): replay those networks with them resolved
+        aliases = policy_object_aliases(headers, args.org)
+        rerun, errors_rerun = simulate_networks(headers, [n for n in networks if n["id"] in unresolved], flows,
+                                                args.rule_type, proposed, aliases)
+        rows = sorted([r for r in rows if r["network_id"] not in unresolved] + rerun,
+                      key=lambda r: (r["network_name"], r["network_id"]))
+        errors.update(errors_rerun)
+    for row in rows:
+        if row["unresolved_rules"]:
+            print(f"⚠️ {row['network_id']}: {row['unresolved_rules']} rule(s) reference objects that cannot be "
+                  f"resolved and never match", file=sys.stderr)
+    for net_id, error in errors.items():
+        print(f"❌ {net_id}: {error}", file=sys.stderr)
+    rows.extend({"network_id": net_id, "rule_type": args.rule_type, "error": str(error), "ok": False}
+                for net_id, error in errors.items())
+    return rows
+
+
+def cmd_fanout(args, headers):
+    import appliance_fanout
+
+    if args.resume:
+        state = appliance_fanout.load_state(args.resume)
+    else:
+        if not args.network and not args.tag and not args.name_regex:
+            raise UsageError("Select networks with --network, --tag and/or --name-regex")
+        steps = appliance_fanout.STEPS if args.steps == "all" else [s.strip() for s in args.steps.split(",")]
+        unknown = set(steps) - set(appliance_fanout.STEPS)
+        if unknown:
+            raise UsageError(f"Unknown step(s): {', '.join(sorted(unknown))}")
+        networks = meraki_api.get_all_pages(f"/organizations/{args.org}/networks", headers=headers)
+        targets = appliance_fanout.select_networks(networks, args.network, args.tag, args.name_regex)
+        state = appliance_fanout.new_state(targets, args.bundle or appliance_fanout.BULK_DIR,
+                                           [s for s in appliance_fanout.STEPS if s in steps])
+    appliance_fanout.run_fanout(headers, state)
+    print(f"State saved: {state['path']} ({appliance_fanout.pending_steps(state)} unfinished step(s))",
+          file=sys.stderr)
+    return appliance_fanout.state_rows(state)
+
+
+def _vpn_network_filter(args):
+    if not args.network and not args.all_networks:
+        raise UsageError("Pass --network ID (repeatable) or --all-networks")
+    return set(args.network) or None
+
+
+def cmd_vpn_exclusions(args, headers):
+    api_key = headers["Authorization"].split(" ", 1)[1]
+    network_ids = _vpn_network_filter(args)
+    rows = []
+
+    if args.vpn_action == "push":
+        from vpn_exclusion_push import push_exclusions, build_custom_rules, read_excel_data
+
+        ips = list(args.ip)
+        if args.input:
+            _, ips_df = read_excel_data(args.input)
+            ips.extend(ips_df["IP"])
+        if not ips:
+            raise UsageError("Nothing to push: pass --ip and/or --input")
+        rules = build_custom_rules(ips)
+        for org_id in args.org:
+            rows.extend(push_exclusions(org_id, api_key, rules, network_ids, args.overwrite_duplicates))
+    else:
+        from vpn_exclusion_remove import remove_exclusions
+
+        if not args.destination and not args.app_id:
+            raise UsageError("Nothing to remove: pass --destination and/or --app-id")
+        for org_id in args.org:
+            rows.extend(remove_exclusions(org_id, api_key, args.destination, args.app_id, network_ids))
+    return rows
+
+
+def cmd_snapshot(args, headers):
+    from config_snapshot import SnapshotStore, take_snapshot, diff_manifests
+
+    store = SnapshotStore()
+    previous = store.manifests(args.org)
+    manifest, path, stats = take_snapshot(headers, args.org, store)
+    print(f"📸 {path}: {stats['sections']} sections, {stats['new_objects']} new objects, "
+          f"{stats['bytes_written']} bytes written")
+    rows = diff_manifests(store.load_manifest(previous[-1]), manifest) if previous else []
+    rows += [{"scope": "error", "section": ref, "change": error, "ok": False}
+             for ref, error in manifest["errors"].items()]
+    if args.keep:
+        removed, freed = store.prune(args.org, args.keep)
+        print(f"🧹 Pruned {removed} objects ({freed} bytes)")
+    return rows
+
+
+def cmd_multi_org(args, headers):
+    from multi_org import list_organizations, select_organizations, crawl_organizations
+
+    if args.rate <= 0 or args.workers < 1:
+        raise UsageError("--rate must be positive and --workers at least 1")
+    orgs = select_organizations(list_organizations(headers), args.orgs)
+    rows, errors = crawl_organizations(headers, orgs, include_status=not args.no_status,
+                                       rate=args.rate, max_workers=args.workers)
+    for org_id, error in errors.items():
+        print(f"❌ Org {org_id} failed: {error}", file=sys.stderr)
+    rows.extend({"org_id": org_id, "error": str(error), "ok": False} for org_id, error in errors.items())
+    return rows
+
+
+COMMANDS = {
+    "orgs": cmd_orgs,
+    "networks": cmd_networks,
+    "inventory": cmd_inventory,
+    "status": cmd_status,
+    "availability": cmd_availability,
+    "events": cmd_events,
+    "push-vlans": cmd_push_vlans,
+    "provision-ports": cmd_provision_ports,
+    "port-lookup": cmd_port_lookup,
+    "push-ssids": cmd_push_ssids,
+    "ssid-report": cmd_ssid_report,
+    "rename-devices": cmd_rename_devices,
+    "address-plan": cmd_address_plan,
+    "firewall-report": cmd_firewall_report,
+    "firewall-simulate": cmd_firewall_simulate,
+    "fanout": cmd_fanout,
+    "vpn-exclusions": cmd_vpn_exclusions,
+    "snapshot": cmd_snapshot,
+    "multi-org": cmd_multi_org,
+}
+
+
+def run_headless(args):
+    """Run one headless command; returns the process exit code."""
+    out = sys.stdout
+    try:
+        # Anything the shared modules print is progress chatter: keep stdout machine-readable.
+        with contextlib.redirect_stdout(sys.stderr):
+            headers = headers_for(resolve_api_key(args))
+            with tracing.span(args.command, cat="command"):
+                rows = COMMANDS[args.command](args, headers)
+    except UsageError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except Exception as e:
+        print(f"error: {args.command} failed: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+    with tracing.span("emit", cat="export", format=args.format or "auto"):
+        emit(rows, args.format, args.output, stream=out)
+    return EXIT_FAILED if _failed(rows) else EXIT_OK
@@ -0,0 +1,371 @@
+"""Org-wide configuration snapshots in a content-addressed store.
+
+A snapshot captures, for every network of an org, the sections below
+(fetched concurrently under the org's rate budget) plus the org-level
+policy objects, groups and third-party VPN peers.  DHCP settings, fixed IP
+assignments and reserved ranges are part of each VLAN, so they live in the
+``vlans`` section.
+
+Every section is serialised to canonical JSON, hashed (SHA-256) and stored
+zlib-compressed once under ``objects/``; a snapshot is only a small manifest
+of ``network -> section -> digest``.  Sections that did not change since the
+last snapshot (or that are identical across networks) cost nothing more on
+disk, so daily org-wide snapshots mostly write a manifest.
+
+    <store>/objects/ab/abcdef....json.z
+    <store>/manifests/<org_id>/<YYYYmmdd_HHMMSS>[_<n>].json
+
+Secrets (PSKs, VPN / RADIUS shared secrets) are replaced by a keyed hash
+(HMAC-SHA256) of their value so that rotations still show up in diffs.  The
+random key of each store lives outside it (under ``KEY_DIR``, created on
+first use and readable only by its owner), so stored digests cannot be checked against a
+dictionary of likely PSKs without it.
+"""
+import hashlib
+import hmac
+import json
+import os
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from rich.console import Console
+from rich.prompt import Prompt, Confirm
+from rich.table import Table
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+
+import meraki_api
+import tracing
+
+console = Console()
+
+STORE_ROOT = Path(__file__).resolve().parent / "output" / "snapshots"
+KEY_DIR = Path.home() / ".meraki_deploy" / "snapshot_keys"
+SECRET_FIELDS = {"psk", "secret", "sharedSecret", "password", "radiusSecret"}
+DIFF_FIELDS = ["scope", "network_id", "network_name", "section", "change", "old", "new"]
+
+# section -> (product type, path under /networks/{id}); a 400 / 404 means the
+# feature is not enabled on that network and the section is left out.
+NETWORK_SECTIONS = {
+    "vlans": ("appliance", "/appliance/vlans"),
+    "l3_firewall": ("appliance", "/appliance/firewall/l3FirewallRules"),
+    "inbound_firewall": ("appliance", "/appliance/firewall/inboundFirewallRules"),
+    "site_to_site_vpn": ("appliance", "/appliance/vpn/siteToSiteVpn"),
+    "ssids": ("wireless", "/wireless/ssids"),
+}
+ORG_SECTIONS = {
+    "policy_objects": "/policyObjects",
+    "policy_object_groups": "/policyObjects/groups",
+    "third_party_vpn_peers": "/appliance/vpn/thirdPartyVPNPeers",
+}
+
+
+def _redact(value, key):
+    if isinstance(value, dict):
+        return {k: (f"<redacted:{hmac.new(key, str(v).encode(), hashlib.sha256).hexdigest()[:16]}>"
+                    if k in SECRET_FIELDS and v else _redact(v, key)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(v, key) for v in value]
+    return value
+
+
+def load_key(path):
+    """The HMAC key for secrets, created (32 random bytes, mode 0600) on first use."""
+    path = Path(path)
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    key = os.urandom(32)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:            # created by a concurrent run
+        return path.read_bytes()
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+# ---------------- Store ---------------- #
+class SnapshotStore:
+    def __init__(self, path=STORE_ROOT, key_file=None):
+        self.path = Path(path)
+        if key_file is None:
+            store_id = hashlib.sha256(str(self.path.resolve()).encode()).hexdigest()[:16]
+            key_file = KEY_DIR / f"{store_id}.key"
+        self.key_file = Path(key_file)
+        self._key = None
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = load_key(self.key_file)
+        return self._key
+
+    def _object_file(self, digest):
+        return self.path / "objects" / digest[:2] / f"{digest}.json.z"
+
+    def put(self, data):
+        """Store one section; returns ``(digest, bytes written)`` (0 when already stored)."""
+        raw = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+        digest = hashlib.sha256(raw).hexdigest()
+        target = self._object_file(digest)
+        if target.exists():
+            return digest, 0
+        target.parent.mkdir(parents=True, exist_ok=True)
+        packed = zlib.compress(raw, 6)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(packed)
+        os.replace(tmp, target)
+        return digest, len(packed)
+
+    def get(self, digest):
+        return json.loads(zlib.decompress(self._object_file(digest).read_bytes()))
+
+    def save_manifest(self, manifest):
+        folder = self.path / "manifests" / str(manifest["org_id"])
+        folder.mkdir(parents=True, exist_ok=True)
+        stem = manifest["taken"].replace("-", "").replace(":", "").replace("T", "_")
+        target, n = folder / f"{stem}.json", 0
+        while target.exists():            # two snapshots within the same second
+            n += 1
+            target = folder / f"{stem}_{n}.json"
+        tmp = target.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, target)
+        return target
+
+    def manifests(self, org_id=None):
+        """Manifest files, oldest first (all orgs unless ``org_id`` is given)."""
+        root = self.path / "manifests"
+        pattern = f"{org_id}/*.json" if org_id else "*/*.json"
+        return sorted(root.glob(pattern), key=lambda p: p.name) if root.exists() else []
+
+    @staticmethod
+    def load_manifest(path):
+        with open(path) as f:
+            return json.load(f)
+
+    def prune(self, org_id, keep):
+        """Drop all but the newest ``keep`` snapshots of an org, then unreferenced objects."""
+        paths = self.manifests(org_id)
+        for path in paths[:-keep] if keep else paths:
+            path.unlink()
+        return self.gc()
+
+    def gc(self):
+        """Delete objects no manifest refers to; returns ``(objects removed, bytes freed)``."""
+        live = set()
+        for path in self.manifests():
+            manifest = self.load_manifest(path)
+            live.update(manifest["org"].values())
+            for net in manifest["networks"].values():
+                live.update(net["sections"].values())
+        removed = freed = 0
+        for obj in (self.path / "objects").glob("*/*.json.z"):
+            if obj.name.split(".", 1)[0] not in live:
+                freed += obj.stat().st_size
+                obj.unlink()
+                removed += 1
+        return removed, freed
+
+
+# ---------------- Capture ---------------- #
+def _fetch_section(headers, url, budget):
+    response = meraki_api.get(url, headers=headers, budget=budget)
+    if response.status_code in (400, 404):
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def _network_jobs(networks, switches):
+    jobs = []
+    for net in networks:
+        for section, (product, path) in NETWORK_SECTIONS.items():
+            if product in net.get("productTypes", []):
+                jobs.append((net["id"], section, f"/networks/{net['id']}{path}"))
+    for device in switches:
+        jobs.append((device["networkId"], f"switch_ports:{device['serial']}",
+                     f"/devices/{device['serial']}/switch/ports"))
+    return jobs
+
+
+def take_snapshot(headers, org_id, store=None, max_workers=meraki_api.MAX_WORKERS, on_progress=None):
+    """Capture the org's configuration; returns ``(manifest, manifest path, stats)``.
+
+    ``on_progress(done, total)`` is called as sections arrive.  Sections that
+    failed are listed in ``manifest["errors"]`` and left out of the snapshot;
+    :func:`diff_manifests` does not report them as changed.
+    """
+    store = store or SnapshotStore()
+    budget = meraki_api.rate_budget(str(org_id))
+    stats = {"sections": 0, "new_objects": 0, "bytes_written": 0, "errors": 0}
+    manifest = {"org_id": str(org_id), "taken": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+                "org": {}, "networks": {}, "errors": {}}
+
+    with tracing.span("snapshot", cat="fetch", org=str(org_id)):
+        networks = meraki_api.get_all_pages(f"/organizations/{org_id}/networks", headers=headers, budget=budget)
+        devices = meraki_api.get_all_pages(f"/organizations/{org_id}/devices", headers=headers, budget=budget)
+        for net in networks:
+            manifest["networks"][net["id"]] = {"name": net.get("name", ""), "sections": {}}
+        switches = [d for d in devices
+                    if str(d.get("model", "")).startswith("MS") and d.get("networkId") in manifest["networks"]]
+
+        def store_section(net_id, section, data):
+            digest, written = store.put(_redact(data, store.key))
+            target = manifest["org"] if net_id is None else manifest["networks"][net_id]["sections"]
+            target[section] = digest
+            stats["sections"] += 1
+            stats["new_objects"] += bool(written)
+            stats["bytes_written"] += written
+
+        jobs = [(None, name, f"/organizations/{org_id}{path}") for name, path in ORG_SECTIONS.items()]
+        jobs += _network_jobs(networks, switches)
+
+        # VPN exclusions come from one org-wide call, split per network.
+        try:
+            exclusions = meraki_api.get_all_pages(
+                f"/organizations/{org_id}/appliance/trafficShaping/vpnExclusions/byNetwork",
+                headers=headers, budget=budget, items_key="items")
+        except Exception as e:
+            manifest["errors"]["org/vpn_exclusions"] = str(e)
+            stats["errors"] += 1
+            exclusions = []
+        for item in exclusions:
+            if item.get("networkId") in manifest["networks"]:
+                store_section(item["networkId"], "vpn_exclusions",
+                              {k: item.get(k, []) for k in ("custom", "majorApplications")})
+
+        def fetch(job):
+            return _fetch_section(headers, job[2], budget)
+
+        for done, ((net_id, section, url), data, error) in enumerate(
+                meraki_api.parallel_map(fetch, jobs, max_workers=max_workers), 1):
+            if error:
+                manifest["errors"][f"{net_id or 'org'}/{section}"] = str(error)
+                stats["errors"] += 1
+            elif data is not None:
+                store_section(net_id, section, data)
+            if on_progress:
+                on_progress(done, len(jobs))
+
+    path = store.save_manifest(manifest)
+    return manifest, path, stats
+
+
+# ---------------- Diff ---------------- #
+def _errored(manifest, net_id, section):
+    """True if ``section`` could not be read when ``manifest`` was taken."""
+    errors = manifest.get("errors", {})
+    return (f"{net_id or 'org'}/{section}" in errors
+            or (net_id is not None and f"org/{section}" in errors))    # org-wide read split per network
+
+
+def diff_manifests(old, new):
+    """Section-level changes between two manifests of one org.
+
+    Sections that failed in either snapshot are unknown there and skipped.
+    """
+    rows = []
+
+    def compare(scope, net_id, name, before, after):
+        for section in sorted(set(before) | set(after)):
+            if _errored(old, net_id, section) or _errored(new, net_id, section):
+                continue
+            a, b = before.get(section), after.get(section)
+            if a != b:
+                change = "added" if a is None else "removed" if b is None else "changed"
+                rows.append({"scope": scope, "network_id": net_id or "", "network_name": name, "section": section,
+                             "change": change, "old": (a or "")[:12], "new": (b or "")[:12]})
+
+    compare("org", None, "", old["org"], new["org"])
+    for net_id in sorted(set(old["networks"]) | set(new["networks"])):
+        before = old["networks"].get(net_id, {})
+        after = new["networks"].get(net_id, {})
+        compare("network", net_id, after.get("name") or before.get("name", ""),
+                before.get("sections", {}), after.get("sections", {}))
+    return rows
+
+
+# ---------------- Menu ---------------- #
+def _show_snapshots(store, org_id):
+    paths = store.manifests(org_id)
+    table = Table(title=f"📸 Snapshots of org {org_id}", show_header=True, header_style="bold magenta")
+    for col in ("#", "Taken", "Networks", "Sections", "Errors"):
+        table.add_column(col)
+    for idx, path in enumerate(paths, 1):
+        manifest = store.load_manifest(path)
+        sections = len(manifest["org"]) + sum(len(n["sections"]) for n in manifest["networks"].values())
+        table.add_row(str(idx), manifest["taken"], str(len(manifest["networks"])), str(sections),
+                      str(len(manifest["errors"])))
+    console.print(table)
+    return paths
+
+
+def snapshot_menu(headers, org_id):
+    store = SnapshotStore()
+    while True:
+        console.print("\n[bold cyan]📸 Configuration Snapshots[/bold cyan]")
+        console.print("1. Take an org-wide snapshot")
+        console.print("2. List snapshots")
+        console.print("3. Compare two snapshots")
+        console.print("4. Prune old snapshots")
+        console.print("5. Back to Main Menu")
+        choice = Prompt.ask("Choose an option", choices=["1", "2", "3", "4", "5"])
+
+        if choice == "1":
+            with Progress(SpinnerColumn(), TextColumn("[bold blue]{task.description}"), BarColumn(),
+                          TextColumn("{task.completed}/{task.total} sections"), TimeElapsedColumn(),
+                          console=console) as progress:
+                task = progress.add_task("Capturing configuration", total=None)
+                try:
+                    manifest, path, stats = take_snapshot(
+                        headers, org_id, store, on_progress=lambda done, total: progress.update(
+                            task, completed=done, total=total))
+                except Exception as e:
+                    console.print(f"❌ Snapshot failed: {e}", style="red")
+                    continue
+            console.print(f"✅ {stats['sections']} sections from {len(manifest['networks'])} networks saved to "
+                          f"{path} ({stats['new_objects']} new objects, {stats['bytes_written'] / 1024:.1f} KiB "
+                          f"written).", style="green")
+            for ref, error in manifest["errors"].items():
+                console.print(f"⚠️ {ref}: {error}", style="yellow")
+
+        elif choice == "2":
+            _show_snapshots(store, org_id)
+
+        elif choice == "3":
+            paths = _show_snapshots(store, org_id)
+            if len(paths) < 2:
+                console.print("⚠️ Need at least two snapshots to compare.", style="yellow")
+                continue
+            old = int(Prompt.ask("Older snapshot #", default=str(len(paths) - 1)))
+            new = int(Prompt.ask("Newer snapshot #", default=str(len(paths))))
+            if not (1 <= old <= len(paths) and 1 <= new <= len(paths)):
+                console.print("❌ Invalid snapshot number.", style="red")
+                continue
+            rows = diff_manifests(store.load_manifest(paths[old - 1]), store.load_manifest(paths[new - 1]))
+            if not rows:
+                console.print("✅ No configuration changes between the two snapshots.", style="green")
+                continue
+            table = Table(title=f"🔍 {len(rows)} changed section(s)", show_header=True, header_style="bold magenta")
+            for col in ("Network", "Section", "Change"):
+                table.add_column(col)
+            for row in rows:
+                table.add_row(row["network_name"] or row["scope"], row["section"], row["change"])
+            console.print(table)
+            if Confirm.ask("📤 Export the changes?", default=False):
+                from report_writer import export_rows, ask_export_formats
+                export_rows(rows, "snapshot_diff", formats=ask_export_formats(), fieldnames=DIFF_FIELDS,
+                            total=len(rows))
+
+        elif choice == "4":
+            keep = int(Prompt.ask("Snapshots to keep", default="30"))
+            removed, freed = store.prune(org_id, max(keep, 1))
+            console.print(f"🧹 Removed {removed} unreferenced objects ({freed / 1024:.1f} KiB).", style="green")
+
+        elif choice == "5":
+            break
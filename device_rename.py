@@ -0,0 +1,288 @@
+"""Bulk device renaming from a naming template or a serial -> name mapping.
+
+New names are computed locally for every selected device (one paged device
+listing per org, no per-device reads), devices that already carry their new
+name are skipped, and the renames are sent as asynchronous action batches of
+up to ``BATCH_SIZE`` device updates, ``MAX_RUNNING_BATCHES`` at a time (the
+Dashboard's per-org limit for running batches).  A batch is all-or-nothing,
+so the devices of a failed batch are retried one PUT at a time to find the
+rejected ones; every selected device gets a row in the result report.
+
+Template fields::
+
+    {site}     site code: the network's ``site-XXX`` / ``site:XXX`` tag, else the network name
+    {floor}    the device's ``floor-N`` / ``floor:N`` tag (empty when missing)
+    {model}    model, e.g. MS225-48LP         {type}    MS, MR, MX, ...
+    {network}  network name                   {serial}  serial
+    {name}     current name                   {index}   1, 2, ... among devices given the same name otherwise
+
+``{index}`` counts devices in serial order, so ``{site}-{type}{index:02d}``
+gives BLR01-MR01, BLR01-MR02, BLR01-MS01, ...  Separators doubled by an
+empty field are collapsed.  Mapping files (CSV or the ``Names`` sheet of an
+Excel file) have ``serial`` and ``name`` columns.
+"""
+import re
+import string
+import time
+
+from rich.console import Console
+from rich.prompt import Prompt, Confirm
+from rich.table import Table
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+
+import bulk_input
+import dry_run
+import meraki_api
+import tracing
+
+console = Console()
+
+BATCH_SIZE = 100
+MAX_RUNNING_BATCHES = 5
+BATCH_POLL_SECONDS = 1.0
+BATCH_TIMEOUT = 300
+DEFAULT_TEMPLATE = "{site}-{type}{index:02d}"
+TEMPLATE_FIELDS = ("site", "floor", "model", "type", "network", "serial", "name", "index")
+RESULT_FIELDS = ["serial", "network", "model", "old_name", "new_name", "status", "batch", "error"]
+
+_TAG_PATTERNS = {"site": re.compile(r"site[-:](.+)", re.I), "floor": re.compile(r"floor[-:](.+)", re.I)}
+_DOUBLED_SEPARATORS = re.compile(r"([-_. ])\1+")
+
+
+# ---------------- Devices ---------------- #
+def collect_devices(headers, org_id, network_ids=None, types=None):
+    """Devices of the org (only ``network_ids`` / model ``types`` when given) and ``{network ID: network}``."""
+    networks = {n["id"]: n for n in meraki_api.get_all_pages(f"/organizations/{org_id}/networks", headers=headers)}
+    wanted = set(network_ids) if network_ids is not None else set(networks)
+    types = {t.upper() for t in types or ()}
+    devices = [d for d in meraki_api.get_all_pages(f"/organizations/{org_id}/devices", headers=headers)
+               if d.get("networkId") in wanted and (not types or str(d.get("model", ""))[:2].upper() in types)]
+    return devices, networks
+
+
+def _tag_value(tags, kind):
+    for tag in tags or ():
+        match = _TAG_PATTERNS[kind].fullmatch(tag)
+        if match:
+            return match.group(1)
+    return ""
+
+
+# ---------------- Naming ---------------- #
+def check_template(template):
+    """Raise ValueError if ``template`` uses an unknown field or is not a valid format string."""
+    try:
+        fields = [field for _, field, _, _ in string.Formatter().parse(template) if field is not None]
+    except ValueError as e:
+        raise ValueError(f"bad template {template!r}: {e}") from None
+    unknown = [f for f in fields if f.split(".")[0].split("[")[0] not in TEMPLATE_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"template fields must be among {', '.join('{' + f + '}' for f in TEMPLATE_FIELDS)}"
+                         + (f" (unknown: {', '.join(unknown)})" if unknown else ""))
+
+
+def _render(template, fields):
+    name = _DOUBLED_SEPARATORS.sub(r"\1", template.format(**fields))
+    return name.strip("-_. ")
+
+
+def template_names(devices, networks, template):
+    """``{serial: new name}`` for ``devices`` from ``template`` (see the module docstring)."""
+    check_template(template)
+    fields_of = {}
+    for device in devices:
+        network = networks.get(device.get("networkId"), {})
+        fields_of[device["serial"]] = {
+            "site": _tag_value(network.get("tags"), "site") or network.get("name", ""),
+            "floor": _tag_value(device.get("tags"), "floor"),
+            "model": device.get("model", ""),
+            "type": str(device.get("model", ""))[:2].upper(),
+            "network": network.get("name", ""),
+            "serial": device["serial"],
+            "name": device.get("name") or "",
+        }
+    counters = {}
+    names = {}
+    for serial in sorted(fields_of):
+        fields = fields_of[serial]
+        group = _render(template, {**fields, "index": 0})
+        counters[group] = counters.get(group, 0) + 1
+        names[serial] = _render(template, {**fields, "index": counters[group]})
+    return names
+
+
+def load_mapping(path):
+    """``{serial: new name}`` from a CSV / Excel mapping file."""
+    return {r["serial"]: str(r["name"]).strip() for r in bulk_input.load_records(path, "device_names")}
+
+
+def plan_renames(devices, networks, names):
+    """Result rows for the devices named in ``names``: status ``rename``, ``unchanged`` or ``skipped``.
+
+    Serials of ``names`` that are not among ``devices`` are reported as skipped.
+    """
+    by_name = {}
+    for serial, name in names.items():
+        by_name.setdefault(name, []).append(serial)
+    rows = []
+    found = set()
+    for device in sorted(devices, key=lambda d: d["serial"]):
+        serial = device["serial"]
+        if serial not in names:
+            continue
+        found.add(serial)
+        old, new = device.get("name") or "", names[serial]
+        row = {"serial": serial, "network": networks.get(device.get("networkId"), {}).get("name", ""),
+               "model": device.get("model", ""), "old_name": old, "new_name": new, "status": "rename",
+               "batch": "", "error": ""}
+        if not new:
+            row.update(status="skipped", error="empty name")
+        elif len(by_name[new]) > 1:
+            row.update(status="skipped", error=f"same name as {', '.join(s for s in by_name[new] if s != serial)}")
+        elif new == old:
+            row["status"] = "unchanged"
+        rows.append(row)
+    for serial in sorted(set(names) - found):
+        rows.append({"serial": serial, "network": "", "model": "", "old_name": "", "new_name": names[serial],
+                     "status": "skipped", "batch": "", "error": "not in the selected networks"})
+    return rows
+
+
+# ---------------- Submission ---------------- #
+def _wait_for_batch(headers, org_id, batch_id, budget):
+    deadline = time.monotonic() + BATCH_TIMEOUT
+    while True:
+        response = meraki_api.get(f"/organizations/{org_id}/actionBatches/{batch_id}", headers=headers,
+                                  budget=budget)
+        response.raise_for_status()
+        status = response.json().get("status", {})
+        if status.get("completed") or status.get("failed") or time.monotonic() > deadline:
+            return status
+        time.sleep(BATCH_POLL_SECONDS)
+
+
+def _rename_one(headers, row, budget):
+    response = meraki_api.put(f"/devices/{row['serial']}", headers=headers, json={"name": row["new_name"]},
+                              budget=budget)
+    if response.ok:
+        row["status"] = "renamed"
+    else:
+        row.update(status="failed", error=f"{response.status_code} {response.text[:200]}")
+
+
+def _run_batch(headers, org_id, chunk, budget):
+    actions = [{"resource": f"/devices/{row['serial']}", "operation": "update", "body": {"name": row["new_name"]}}
+               for row in chunk]
+    response = meraki_api.post(f"/organizations/{org_id}/actionBatches", headers=headers, budget=budget,
+                               json={"confirmed": True, "synchronous": False, "actions": actions})
+    if dry_run.enabled:
+        for row in chunk:
+            row["status"] = "planned"
+        return
+    if not response.ok:
+        batch_id, errors = "", [f"batch rejected: {response.status_code} {response.text[:200]}"]
+    else:
+        batch_id = response.json().get("id", "")
+        status = _wait_for_batch(headers, org_id, batch_id, budget)
+        if status.get("completed") and not status.get("failed"):
+            for row in chunk:
+                row.update(status="renamed", batch=batch_id)
+            return
+        if not status.get("failed"):
+            for row in chunk:
+                row.update(status="pending", batch=batch_id, error=f"batch still running after {BATCH_TIMEOUT}s")
+            return
+        errors = status.get("errors") or ["batch failed"]
+    # The batch was rolled back as a whole: find the failing devices one by one.
+    for row in chunk:
+        row["batch"] = batch_id
+        _rename_one(headers, row, budget)
+        if row["status"] == "failed":
+            row["error"] = f"{row['error']} (batch: {'; '.join(errors)[:200]})"
+
+
+def apply_renames(headers, org_id, rows, max_workers=MAX_RUNNING_BATCHES, on_batch=None):
+    """Send the ``rename`` rows as action batches; rows are updated in place and returned.
+
+    ``on_batch(size)`` fires as each batch finishes.
+    """
+    pending = [row for row in rows if row["status"] == "rename"]
+    chunks = [pending[i:i + BATCH_SIZE] for i in range(0, len(pending), BATCH_SIZE)]
+    budget = meraki_api.rate_budget(str(org_id))
+
+    def run(chunk):
+        with tracing.span("rename batch", cat="write", devices=len(chunk)):
+            _run_batch(headers, org_id, chunk, budget)
+
+    for chunk, _, error in meraki_api.parallel_map(run, chunks, max_workers=max_workers):
+        if error:
+            for row in chunk:
+                if row["status"] == "rename":
+                    row.update(status="failed", error=str(error))
+        if on_batch:
+            on_batch(len(chunk))
+    return rows
+
+
+# ---------------- Menu ---------------- #
+def _show_rows(rows, title, limit=50):
+    table = Table(title=title + (f" (first {limit})" if len(rows) > limit else ""), show_header=True,
+                  header_style="bold magenta")
+    for col in ("Serial", "Network", "Model", "Current name", "New name", "Status", "Error"):
+        table.add_column(col, overflow="fold")
+    styles = {"renamed": "green", "rename": "cyan", "planned": "cyan", "unchanged": "dim", "skipped": "yellow",
+              "pending": "yellow", "failed": "red"}
+    for row in rows[:limit]:
+        style = styles.get(row["status"], "")
+        table.add_row(row["serial"], row["network"], row["model"], row["old_name"], row["new_name"],
+                      f"[{style}]{row['status']}[/{style}]", row["error"])
+    console.print(table)
+
+
+def _counts(rows):
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    return ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+
+
+def bulk_rename_menu(headers, org_id, network_id):
+    from report_writer import export_rows, ask_export_formats
+
+    scope = Prompt.ask("Rename devices in [1] this network, [2] networks with a tag, [3] every network in the org",
+                       choices=["1", "2", "3"], default="1")
+    types = [t.strip() for t in Prompt.ask("Device types (e.g. MS,MR; 'all' for every type)",
+                                           default="all").split(",") if t.strip() and t.strip().lower() != "all"]
+    try:
+        with console.status("📡 Loading networks and devices..."):
+            network_ids = [network_id] if scope == "1" else None
+            devices, networks = collect_devices(headers, org_id, network_ids, types)
+        if scope == "2":
+            tag = Prompt.ask("Network tag").strip()
+            devices = [d for d in devices if tag in (networks.get(d.get("networkId"), {}).get("tags") or [])]
+        if not devices:
+            console.print("⚠️ No devices matched.", style="yellow")
+            return
+        if Prompt.ask("Names from [1] a naming template, [2] a CSV / Excel mapping (serial, name)",
+                      choices=["1", "2"], default="1") == "1":
+            console.print("Fields: " + ", ".join("{" + f + "}" for f in TEMPLATE_FIELDS), style="dim")
+            names = template_names(devices, networks, Prompt.ask("Template", default=DEFAULT_TEMPLATE))
+        else:
+            names = load_mapping(Prompt.ask("Mapping file"))
+    except (OSError, ValueError) as e:
+        console.print(f"❌ {e}", style="red")
+        return
+
+    rows = plan_renames(devices, networks, names)
+    todo = sum(1 for row in rows if row["status"] == "rename")
+    _show_rows([r for r in rows if r["status"] != "unchanged"], "🏷️ Planned renames")
+    console.print(f"📋 {len(rows)} device(s): {_counts(rows)}", style="cyan")
+    if todo and Confirm.ask(f"Rename {todo} device(s) in {-(-todo // BATCH_SIZE)} action batch(es)?", default=True):
+        with Progress(SpinnerColumn(), TextColumn("[bold blue]{task.description}"), BarColumn(),
+                      TextColumn("{task.completed}/{task.total}"), TimeElapsedColumn(), console=console) as progress:
+            task = progress.add_task("Renaming", total=todo)
+            apply_renames(headers, org_id, rows, on_batch=lambda n: progress.advance(task, n))
+        _show_rows([r for r in rows if r["status"] not in ("unchanged", "renamed")] or rows, "📋 Rename results")
+        console.print(f"📋 {_counts(rows)}", style="bold cyan")
+    if Confirm.ask("📤 Export the per-device report?", default=bool(todo)):
+        export_rows(rows, "device_renames", formats=ask_export_formats(), fieldnames=RESULT_FIELDS, total=len(rows))
@@ -2,37 +2,42 @@
 from rich.table import Table
 from rich.prompt import Prompt, Confirm
 from rich.progress import track
-from datetime import datetime, timezone
-from dateutil.relativedelta import relativedelta
-from dateutil.parser import isoparse
-import requests
-import pandas as pd
+from datetime import datetime, timezone, timedelta
+import meraki_api
+import tracing
 import os
 import logging
 
+from report_writer import export_rows, ask_export_formats, DEFAULT_FORMATS
+
 console = Console()
-BASE_URL = "https://api.meraki.com/api/v1"
+BASE_URL = meraki_api.BASE_URL
 OUTPUT_DIR = "output"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+logger = logging.getLogger("device_status")
 
-# Setup logging
-logging.basicConfig(
-    filename=os.path.join(OUTPUT_DIR, "device_status.log"),
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+def setup_logging():
+    """Attach the output/device_status.log handler on first use rather than at import."""
+    if logger.handlers:
+        return
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    handler = logging.FileHandler(os.path.join(OUTPUT_DIR, "device_status.log"))
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
 
+@tracing.traced(cat="fetch")
 def get_device_statuses(org_id, headers):
     url = f"{BASE_URL}/organizations/{org_id}/devices/statuses"
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return meraki_api.get_all_pages(url, headers=headers)
     except Exception as e:
-        logging.error(f"Failed to fetch device statuses: {e}")
+        logger.error(f"Failed to fetch device statuses: {e}")
         raise
 
 def calculate_last_reported_human(last_reported_str, status):
+    from dateutil.relativedelta import relativedelta
+    from dateutil.parser import isoparse
+
     if not last_reported_str:
         return "N/A", None
 
@@ -58,20 +63,31 @@ def calculate_last_reported_human(last_reported_str, status):
     else:
         return f"Offline for {hours} hours", hours
 
-def export_to_csv_and_excel(devices):
-    df = pd.DataFrame.from_records(devices)
-    csv_path = os.path.join(OUTPUT_DIR, "device_uptime_report.csv")
-    excel_path = os.path.join(OUTPUT_DIR, "device_uptime_report.xlsx")
-
+@tracing.traced(cat="export")
+def export_to_csv_and_excel(devices, formats=DEFAULT_FORMATS):
     try:
-        df.to_csv(csv_path, index=False)
-        df.to_excel(excel_path, index=False)
-        console.print(f"\n📁 [green]Exported to:[/green] {csv_path}")
-        console.print(f"📁 [green]Exported to:[/green] {excel_path}")
+        export_rows(devices, "device_uptime_report", formats=formats, total=len(devices),
+                    output_dir=OUTPUT_DIR, timestamp=False)
     except Exception as e:
-        logging.error(f"Failed to export reports: {e}")
+        logger.error(f"Failed to export reports: {e}")
         console.print(f"[red]❌ Failed to export reports: {e}[/red]")
 
+def enrich_device(device):
+    """Flatten one status record into a report row; also returns hours since last report."""
+    last_reported = device.get("lastReportedAt", "N/A")
+    status = device.get("status", "offline")
+    reported_str, hours = calculate_last_reported_human(last_reported, status)
+    row = {
+        "name": device.get("name", "N/A"),
+        "model": device.get("model", "N/A"),
+        "serial": device.get("serial", "N/A"),
+        "status": status,
+        "lastReportedAt": last_reported,
+        "uptime": reported_str
+    }
+    return row, hours
+
+@tracing.traced(cat="menu")
 def show_device_uptime(org_id, headers):
     console.clear()
     console.rule("[bold cyan]📡 Meraki Device Last Seen / Status Report")
@@ -82,6 +98,14 @@ def show_device_uptime(org_id, headers):
         console.print(f"[red]Failed to fetch device statuses: {e}[/red]")
         return
 
+    try:
+        from availability_store import record_status_snapshot
+
+        changes = record_status_snapshot(org_id, devices)
+        logger.info(f"Recorded availability snapshot for org {org_id}: {changes} status transitions")
+    except Exception as e:
+        logger.error(f"Failed to record availability snapshot: {e}")
+
     threshold_hours = float(Prompt.ask("⚠️ Highlight devices offline more than how many hours?", default="12"))
 
     table = Table(show_header=True, header_style="bold magenta")
@@ -94,47 +118,87 @@ def show_device_uptime(org_id, headers):
 
     enriched_devices = []
 
-    for device in track(devices, description="Processing devices..."):
-        name = device.get("name", "N/A")
-        model = device.get("model", "N/A")
-        serial = device.get("serial", "N/A")
-        last_reported = device.get("lastReportedAt", "N/A")
-        status = device.get("status", "offline")
+    with tracing.span("build status table", cat="transform", devices=len(devices)):
+        for device in track(devices, description="Processing devices..."):
+            row, hours = enrich_device(device)
+            enriched_devices.append(row)
+            name, model, serial, status = row["name"], row["model"], row["serial"], row["status"]
+            last_reported, reported_str = row["lastReportedAt"], row["uptime"]
+
+            # Style status cell if offline beyond threshold
+            if status == "offline" and hours and hours > threshold_hours:
+                status_display = f"[bold red]{status}[/bold red]"
+            else:
+                status_display = f"[green]{status}[/green]" if status == "online" else status
 
-        reported_str, hours = calculate_last_reported_human(last_reported, status)
+            table.add_row(name, model, serial, status_display, last_reported or "N/A", reported_str)
 
-        enriched_devices.append({
-            "name": name,
-            "model": model,
-            "serial": serial,
-            "status": status,
-            "lastReportedAt": last_reported,
-            "uptime": reported_str
-        })
+    console.print("\n[bold cyan]✅ Device Status Summary:[/bold cyan]\n")
+    with tracing.span("render table", cat="render"):
+        console.print(table)
 
-        # Style status cell if offline beyond threshold
-        if status == "offline" and hours and hours > threshold_hours:
-            status_display = f"[bold red]{status}[/bold red]"
-        else:
-            status_display = f"[green]{status}[/green]" if status == "online" else status
+    if Confirm.ask("📤 Export this report to Excel and CSV?", default=True):
+        export_to_csv_and_excel(enriched_devices, formats=ask_export_formats())
 
-        table.add_row(name, model, serial, status_display, last_reported or "N/A", reported_str)
+def show_availability_history(org_id):
+    console.clear()
+    console.rule("[bold cyan]📈 Device Availability History")
+
+    from availability_store import store_for_org
+
+    store = store_for_org(org_id)
+    if not store.devices:
+        console.print("[yellow]⚠️ No history yet. Each 'Show Device Last Reported Info' run records a snapshot.[/yellow]")
+        return
+
+    days = float(Prompt.ask("📆 Window: how many days back?", default="30"))
+    group_by = Prompt.ask("📊 Group by", choices=["device", "model", "network"], default="device")
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=days)
+
+    rows = store.availability(start, end, group_by=group_by)
+    rows.sort(key=lambda r: (r["availability_pct"] is None, r["availability_pct"] or 0))
+
+    table = Table(show_header=True, header_style="bold magenta",
+                  title=f"Availability {start:%Y-%m-%d %H:%M} → {end:%Y-%m-%d %H:%M} UTC")
+    table.add_column(group_by.capitalize(), style="cyan")
+    table.add_column("Availability %", justify="right")
+    table.add_column("Downtime (h)", justify="right")
+    table.add_column("Failures", justify="right")
+    table.add_column("MTBF (h)", justify="right")
+    table.add_column("Offline p50 / p90 / p99 (min)", justify="right")
+
+    def fmt(value):
+        return "—" if value is None else str(value)
+
+    for row in rows[:50]:
+        pct = row["availability_pct"]
+        pct_display = fmt(pct) if pct is None or pct >= 99 else f"[bold red]{pct}[/bold red]"
+        label = row[group_by] if group_by != "device" else f"{row['name'] or row['device']} ({row['device']})"
+        table.add_row(label, pct_display, fmt(row["downtime_hours"]), fmt(row["failures"]), fmt(row["mtbf_hours"]),
+                      " / ".join(fmt(row[f"offline_p{q}_minutes"]) for q in (50, 90, 99)))
 
-    console.print("\n[bold cyan]✅ Device Status Summary:[/bold cyan]\n")
     console.print(table)
+    if len(rows) > 50:
+        console.print(f"[dim]Showing the 50 least available of {len(rows)} {group_by}s.[/dim]")
 
-    if Confirm.ask("📤 Export this report to Excel and CSV?", default=True):
-        export_to_csv_and_excel(enriched_devices)
+    if Confirm.ask("📤 Export the full availability report?", default=False):
+        export_rows(rows, f"device_availability_by_{group_by}", formats=ask_export_formats(),
+                    total=len(rows), output_dir=OUTPUT_DIR)
 
 def device_status_menu(org_id, network_id, headers):
+    setup_logging()
     while True:
         console.rule("[bold blue]📡 Device Status Menu")
         console.print("[1] Show Device Last Reported Info")
-        console.print("[2] Back to Main Menu")
+        console.print("[2] Availability History (uptime %, MTBF, offline durations)")
+        console.print("[3] Back to Main Menu")
 
-        choice = Prompt.ask("Choose an option", choices=["1", "2"], default="1")
+        choice = Prompt.ask("Choose an option", choices=["1", "2", "3"], default="1")
 
         if choice == "1":
             show_device_uptime(org_id, headers)
         elif choice == "2":
+            show_availability_history(org_id)
+        elif choice == "3":
             break
@@ -0,0 +1,229 @@
+"""Global dry-run: reads go to the API, writes are only planned.
+
+When enabled, ``meraki_api.request`` hands every PUT / POST / DELETE to
+:func:`intercept` instead of sending it.  The current state of the target
+is read (a GET on the same URL, or the read listed in ``STATE_READERS``
+for write-only endpoints), a field-level diff against the payload is
+recorded, and a synthetic success response is returned so the calling code
+carries on as if the write had gone through (PUT echoes the merged object,
+POST returns the payload with a ``dry-run-N`` ID, DELETE returns 204).
+
+At exit the plan is printed with the number of writes, how many would
+change nothing, which ones were diffed without a known current state, and
+an estimated duration (observed API latency, but never faster than the
+per-org rate limit); it is also saved as JSON under ``output/dry_run/``.
+
+    python3 main.py --dry-run
+    python3 main.py --dry-run fanout --org 123456 --tag branch
+"""
+import atexit
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from rich.console import Console
+from rich.table import Table
+
+import api_metrics
+
+OUTPUT_DIR = Path(__file__).resolve().parent / "output" / "dry_run"
+MAX_SHOWN_CHANGES = 8
+MAX_SHOWN_CALLS = 200
+
+enabled = False
+plan = []
+
+_lock = threading.Lock()
+console = Console(stderr=True)
+
+
+def enable(report_at_exit=True):
+    global enabled
+    enabled = True
+    if report_at_exit:
+        atexit.register(report)
+
+
+# ---------------- Diff ---------------- #
+def flatten(value, prefix=""):
+    """``{"a": {"b": [1]}}`` -> ``{"a.b[0]": 1}``; empty containers are kept as leaves."""
+    if isinstance(value, dict) and value:
+        items = {}
+        for key, item in value.items():
+            items.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return items
+    if isinstance(value, list) and value:
+        items = {}
+        for i, item in enumerate(value):
+            items.update(flatten(item, f"{prefix}[{i}]"))
+        return items
+    return {prefix: value}
+
+
+def field_changes(current, payload):
+    """``(field, old, new)`` for every field of ``payload`` that differs from ``current``.
+
+    Only the top-level keys present in the payload are compared, so fields a
+    PUT leaves alone never show up; items dropped from a list show as ``new=None``.
+    """
+    current = current if isinstance(current, dict) else {}
+    changes = []
+    for key in payload:
+        old = flatten(current.get(key), key)
+        new = flatten(payload[key], key)
+        for field in sorted(set(old) | set(new)):
+            if field in new:
+                if str(old.get(field)) != str(new[field]):   # "80" and 80 are the same port
+                    changes.append((field, old.get(field), new[field]))
+            elif field != key:
+                changes.append((field, old[field], None))
+    return changes
+
+
+# ---------------- Current state ---------------- #
+def _vpn_exclusions_state(url, fetch):
+    """The network's entry of the org-wide ``vpnExclusions/byNetwork`` read (the PUT URL has no GET)."""
+    network_url = url.rsplit("/appliance/", 1)[0]
+    network_id = network_url.rsplit("/", 1)[-1]
+    response = fetch(network_url)
+    if not response.ok:
+        return response
+    org_id = response.json()["organizationId"]
+    base_url = network_url.rsplit("/networks/", 1)[0]
+    response = fetch(f"{base_url}/organizations/{org_id}/appliance/trafficShaping/vpnExclusions/byNetwork"
+                     f"?networkIds[]={network_id}&perPage=1000")
+    if not response.ok:
+        return response
+    for item in response.json().get("items", []):
+        if item.get("networkId") == network_id:
+            return _response("GET", url, 200, {k: item.get(k, []) for k in ("custom", "majorApplications")})
+    return _response("GET", url, 404, None)
+
+
+# Write endpoints whose URL has no GET: template -> reader(url, fetch) returning a response
+STATE_READERS = {
+    "/networks/{networkId}/appliance/trafficShaping/vpnExclusions": _vpn_exclusions_state,
+}
+
+
+# ---------------- Interception ---------------- #
+def _response(method, url, status, body):
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    response._content = json.dumps(body).encode() if body is not None else b""
+    response.encoding = "utf-8"
+    response.url = url
+    response.reason = "Dry run"
+    response.request = requests.Request(method, url).prepare()
+    return response
+
+
+def intercept(method, url, kwargs, fetch_current):
+    """Record a write instead of sending it; returns a synthetic response.
+
+    ``fetch_current(url=None)`` performs a GET of ``url`` (default: the target).
+    """
+    payload = kwargs.get("json")
+    endpoint = api_metrics.endpoint_template(url)
+    current = None
+    if method in ("PUT", "DELETE"):
+        try:
+            reader = STATE_READERS.get(endpoint)
+            response = reader(url, fetch_current) if reader else fetch_current()
+            if response.ok and response.content:
+                current = response.json()
+        except (requests.RequestException, ValueError):
+            pass
+
+    if method == "PUT":
+        changes = field_changes(current, payload or {})
+        status, body = 200, {**(current if isinstance(current, dict) else {}), **(payload or {})}
+    elif method == "POST":
+        changes = [(field, None, value) for field, value in sorted(flatten(payload or {}).items())]
+        status, body = 201, {**(payload or {})}
+    else:
+        changes = [(field, value, None) for field, value in sorted(flatten(current or {}).items())]
+        status, body = 204, None
+
+    with _lock:
+        entry = {"method": method, "url": url, "endpoint": endpoint,
+                 "known_state": current is not None or method == "POST", "changes": changes}
+        plan.append(entry)
+        if method == "POST" and isinstance(body, dict):
+            body.setdefault("id", f"dry-run-{len(plan)}")
+    summary = f"{len(changes)} field(s)" if changes else "no change"
+    if not entry["known_state"]:
+        summary += ", current state unknown"
+    console.print(f"🧪 [dry-run] {method} {url.split('/api/v1', 1)[-1]}: {summary}", style="dim")
+    return _response(method, url, status, body)
+
+
+# ---------------- Report ---------------- #
+def estimate(writes):
+    """Estimated seconds to send ``writes`` calls one after another."""
+    from meraki_api import ORG_RATE_LIMIT
+
+    stats = api_metrics.summary()
+    latency = stats["api_seconds"] / stats["requests"] if stats["requests"] else 0
+    return writes * max(latency, 1 / ORG_RATE_LIMIT)
+
+
+def report(path=None):
+    """Print the plan and save it as JSON; returns the JSON path (None if nothing was planned)."""
+    with _lock:
+        entries = list(plan)
+    if not entries:
+        if enabled:
+            console.print("🧪 Dry run: no writes were planned.", style="cyan")
+        return None
+
+    noop = [e for e in entries if not e["changes"]]
+    table = Table(title="🧪 Dry-run plan (nothing was sent)", show_header=True, header_style="bold magenta")
+    for col in ("#", "Call", "Target", "Field", "Current", "Planned"):
+        table.add_column(col, overflow="fold")
+    for idx, entry in enumerate(entries[:MAX_SHOWN_CALLS], 1):
+        target = entry["url"].split("/api/v1", 1)[-1]
+        if not entry["known_state"]:
+            target += " [yellow](current state unknown)[/yellow]"
+        if not entry["changes"]:
+            table.add_row(str(idx), entry["method"], target, "[dim]no change[/dim]", "", "")
+            continue
+        for n, (field, old, new) in enumerate(entry["changes"][:MAX_SHOWN_CHANGES]):
+            table.add_row(str(idx) if n == 0 else "", entry["method"] if n == 0 else "", target if n == 0 else "",
+                          field, "" if old is None else str(old), "" if new is None else str(new))
+        hidden = len(entry["changes"]) - MAX_SHOWN_CHANGES
+        if hidden > 0:
+            table.add_row("", "", "", f"[dim]... {hidden} more[/dim]", "", "")
+    console.print(table)
+    if len(entries) > MAX_SHOWN_CALLS:
+        console.print(f"... {len(entries) - MAX_SHOWN_CALLS} more call(s) in the saved plan.", style="dim")
+
+    by_method = {}
+    for entry in entries:
+        by_method[entry["method"]] = by_method.get(entry["method"], 0) + 1
+    seconds = estimate(len(entries))
+    console.print(f"📋 {len(entries)} write(s) planned ({', '.join(f'{n} {m}' for m, n in by_method.items())}), "
+                  f"{len(noop)} with no change; estimated {seconds:.1f}s to send.", style="bold cyan")
+    unknown = sum(not e["known_state"] for e in entries)
+    if unknown:
+        console.print(f"⚠️ {unknown} write(s) could not read the current state; their fields are all shown as new.",
+                      style="yellow")
+
+    path = Path(path or OUTPUT_DIR / f"plan_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"writes": len(entries), "noop": len(noop), "estimated_seconds": round(seconds, 1),
+                       "calls": entries}, f, indent=1, default=str)
+        os.replace(tmp, path)
+    except OSError as e:
+        console.print(f"⚠️ Could not save the plan: {e}", style="yellow")
+        return None
+    console.print(f"💾 Plan saved to {path}", style="cyan")
+    return path
@@ -0,0 +1,324 @@
+"""Static analysis of MX L3 / inbound firewall rule lists.
+
+Every rule is turned into interval sets (protocols, source/destination
+addresses, source/destination ports).  Rules are processed top-down and
+compared only with the rules that indexes on the source, destination and
+destination port fields say can overlap them: CIDRs are either nested or
+disjoint, so the candidates for a prefix are its ancestors (at most 33/129
+dict lookups) plus the prefixes starting inside it (a bisect over sorted
+starts); narrow port ranges are found by a bisect over their starts, so
+rules that differ only by port are not compared with each other.  Coverage
+is checked rule against rule: traffic covered only by several rules
+together is not reported.  Findings:
+
+* shadowed    – an earlier rule with the other policy matches everything this
+                rule matches, so it can never take effect
+* redundant   – an earlier rule with the same policy already matches it, or a
+                later same-policy rule covers it with nothing conflicting in between
+* conflicting – partially overlaps an earlier rule with the other policy, so
+                order decides the outcome for the shared traffic
+"""
+import bisect
+import ipaddress
+
+import meraki_api
+
+MAX_RULES = 1000
+PORT_SPAN = 256              # longer port ranges are kept in PortIndex.wide
+PROTOCOLS = ("tcp", "udp", "icmp", "icmp6")
+V6_OFFSET = 1 << 32          # IPv6 addresses live above the IPv4 space
+FULL_PORTS = ((0, 65535),)
+ANY = {"any", "", "*"}
+
+
+# ---------------- Parsing ---------------- #
+def _merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return tuple(merged)
+
+
+def _addr_interval(network):
+    offset = V6_OFFSET if network.version == 6 else 0
+    return (offset + int(network.network_address), offset + int(network.broadcast_address))
+
+
+class AddressSet:
+    """Addresses of one rule field: CIDR intervals plus opaque tokens (VLAN(...), OBJ(...), FQDNs)."""
+    __slots__ = ("any", "networks", "intervals", "tokens")
+
+    def __init__(self, text):
+        self.networks, self.tokens = [], set()
+        parts = [p.strip() for p in str(text if text is not None else "any").split(",")]
+        self.any = any(p.lower() in ANY for p in parts)
+        if not self.any:
+            for part in parts:
+                try:
+                    self.networks.append(ipaddress.ip_network(part, strict=False))
+                except ValueError:
+                    self.tokens.add(part.lower())
+        self.intervals = _merge(_addr_interval(n) for n in self.networks)
+
+    def covers(self, other):
+        if self.any:
+            return True
+        if other.any or not other.tokens <= self.tokens:
+            return False
+        return _contains(self.intervals, other.intervals)
+
+    def overlaps(self, other):
+        if self.any or other.any or self.tokens & other.tokens:
+            return True
+        if self.tokens or other.tokens:
+            return True  # unresolved references may overlap anything
+        return _intersects(self.intervals, other.intervals)
+
+
+def parse_ports(text):
+    text = str(text if text is not None else "any").strip().lower()
+    if text in ANY:
+        return FULL_PORTS
+    intervals = []
+    for part in text.split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = part.split("-", 1)
+            intervals.append((int(start), int(end)))
+        elif part:
+            intervals.append((int(part), int(part)))
+    return _merge(intervals)
+
+
+def _contains(outer, inner):
+    """Every interval of ``inner`` lies within some interval of ``outer`` (both merged)."""
+    i = 0
+    for start, end in inner:
+        while i < len(outer) and outer[i][1] < start:
+            i += 1
+        if i == len(outer) or outer[i][0] > start or outer[i][1] < end:
+            return False
+    return True
+
+
+def _intersects(a, b):
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i][1] < b[j][0]:
+            i += 1
+        elif b[j][1] < a[i][0]:
+            j += 1
+        else:
+            return True
+    return False
+
+
+class Rule:
+    __slots__ = ("index", "raw", "policy", "protocols", "src", "dst", "src_ports", "dst_ports", "error")
+
+    def __init__(self, index, raw):
+        self.index, self.raw, self.error = index, raw, None
+        self.policy = str(raw.get("policy", "")).lower()
+        protocol = str(raw.get("protocol", "any")).lower()
+        self.protocols = frozenset(PROTOCOLS) if protocol in ANY else frozenset([protocol])
+        self.src = AddressSet(raw.get("srcCidr"))
+        self.dst = AddressSet(raw.get("destCidr"))
+        try:
+            ported = bool(self.protocols & {"tcp", "udp"})
+            self.src_ports = parse_ports(raw.get("srcPort")) if ported else FULL_PORTS
+            self.dst_ports = parse_ports(raw.get("destPort")) if ported else FULL_PORTS
+        except ValueError as e:
+            self.src_ports = self.dst_ports = FULL_PORTS
+            self.error = f"unparseable port: {e}"
+
+    def covers(self, other):
+        return (other.protocols <= self.protocols and self.src.covers(other.src) and self.dst.covers(other.dst)
+                and _contains(self.src_ports, other.src_ports) and _contains(self.dst_ports, other.dst_ports))
+
+    def overlaps(self, other):
+        return (bool(self.protocols & other.protocols) and self.src.overlaps(other.src)
+                and self.dst.overlaps(other.dst) and _intersects(self.src_ports, other.src_ports)
+                and _intersects(self.dst_ports, other.dst_ports))
+
+
+def is_default_rule(rule):
+    return str(rule.get("comment", "")).lower() == "default rule"
+
+
+# ---------------- Index ---------------- #
+class PrefixIndex:
+    """Rules by one address field: exact-prefix dict for ancestors, sorted starts for descendants."""
+
+    def __init__(self, rules, field):
+        self.field = field
+        self.by_prefix = {}
+        self.opaque = []       # rules whose field has unresolved tokens or is 'any'
+        entries = []
+        for rule in rules:
+            addresses = getattr(rule, field)
+            if addresses.any or addresses.tokens:
+                self.opaque.append(rule.index)
+            for net in addresses.networks:
+                key = (net.version, net.prefixlen, int(net.network_address))
+                self.by_prefix.setdefault(key, []).append(rule.index)
+                entries.append((*_addr_interval(net), rule.index))
+        entries.sort()
+        self.starts = [e[0] for e in entries]
+        self.entries = entries
+
+    def covering(self, rule):
+        """Rules whose field could contain all of ``rule``'s: ancestors of its prefixes, plus
+        prefixes inside them (several of one rule's prefixes may add up to one of ``rule``'s)."""
+        found = set(self.opaque)
+        for net in getattr(rule, self.field).networks:
+            addr = int(net.network_address)
+            bits = net.max_prefixlen
+            for length in range(net.prefixlen + 1):
+                mask = ((1 << length) - 1) << (bits - length) if length else 0
+                found.update(self.by_prefix.get((net.version, length, addr & mask), ()))
+            start, end = _addr_interval(net)
+            lo = bisect.bisect_left(self.starts, start)
+            hi = bisect.bisect_right(self.starts, end)
+            found.update(e[2] for e in self.entries[lo:hi])
+        return found
+
+    def overlapping(self, rule):
+        """Rules whose field could share an address with ``rule``'s (None: every rule)."""
+        addresses = getattr(rule, self.field)
+        if addresses.any or addresses.tokens:
+            return None
+        return self.covering(rule)
+
+
+class PortIndex:
+    """Rules by destination port ranges: ranges up to ``PORT_SPAN`` ports by start, longer ones apart."""
+
+    def __init__(self, rules):
+        self.wide = set()      # 'any' and long ranges: candidates for every rule
+        entries = []
+        for rule in rules:
+            for start, end in rule.dst_ports:
+                if end - start >= PORT_SPAN:
+                    self.wide.add(rule.index)
+                else:
+                    entries.append((start, end, rule.index))
+        entries.sort()
+        self.starts = [e[0] for e in entries]
+        self.entries = entries
+
+    def overlapping(self, rule):
+        """Rules whose destination ports could share a port with ``rule``'s."""
+        found = set(self.wide)
+        for start, end in rule.dst_ports:
+            lo = bisect.bisect_left(self.starts, start - PORT_SPAN)
+            hi = bisect.bisect_right(self.starts, end)
+            found.update(e[2] for e in self.entries[lo:hi] if e[1] >= start)
+        return found
+
+    covering = overlapping     # a covering range overlaps too; Rule.covers decides
+
+
+def _candidates(rule, indexes, method):
+    sets = [s for s in (getattr(index, method)(rule) for index in indexes) if s is not None]
+    return set.intersection(*sets) if sets else None
+
+
+# ---------------- Analysis ---------------- #
+def analyze_rules(raw_rules):
+    """Return findings ``{"rule", "type", "other", "policy", "comment", "detail"}`` sorted by rule index."""
+    rules = [Rule(i, r) for i, r in enumerate(raw_rules) if not is_default_rule(r)]
+    by_index = {r.index: r for r in rules}
+    indexes = (PrefixIndex(rules, "dst"), PrefixIndex(rules, "src"), PortIndex(rules))
+    findings = []
+
+    def add(rule, kind, other, detail):
+        findings.append({"rule": rule.index, "type": kind, "other": other.index if other else None,
+                         "policy": rule.policy, "comment": rule.raw.get("comment", ""), "detail": detail})
+
+    if len(rules) > MAX_RULES:
+        findings.append({"rule": None, "type": "limit", "other": None, "policy": "", "comment": "",
+                         "detail": f"{len(rules)} rules exceed the {MAX_RULES}-rule limit"})
+
+    for rule in rules:
+        if rule.error:
+            add(rule, "invalid", None, rule.error)
+            continue
+        candidates = _candidates(rule, indexes, "overlapping")
+        earlier = sorted(i for i in (candidates if candidates is not None else by_index) if i < rule.index)
+
+        conflict = None
+        for i in earlier:
+            other = by_index[i]
+            if other.error:
+                continue
+            if other.covers(rule):
+                if other.policy == rule.policy:
+                    add(rule, "redundant", other, f"rule {i} ({other.policy}) already matches all of this traffic")
+                else:
+                    add(rule, "shadowed", other, f"rule {i} ({other.policy}) matches all of this traffic first")
+                break
+            if conflict is None and other.policy != rule.policy and other.overlaps(rule):
+                conflict = other
+        else:
+            if conflict is not None:
+                add(rule, "conflicting", conflict,
+                    f"partially overlaps rule {conflict.index} ({conflict.policy}); order decides shared traffic")
+
+    # A rule is also redundant when a later same-policy rule covers it and no
+    # rule in between could match the same traffic with the other policy.
+    flagged = {f["rule"] for f in findings}
+    for rule in rules:
+        if rule.index in flagged or rule.error:
+            continue
+        candidates = _candidates(rule, indexes, "covering")
+        for j in sorted(i for i in candidates if i > rule.index):
+            later = by_index[j]
+            if later.error or later.policy != rule.policy or not later.covers(rule):
+                continue
+            between = _candidates(rule, indexes, "overlapping")
+            between = between if between is not None else by_index
+            if not any(rule.index < k < j and by_index[k].policy != rule.policy and by_index[k].overlaps(rule)
+                       for k in between if k in by_index):
+                add(rule, "redundant", later, f"rule {j} ({later.policy}) also matches all of this traffic")
+            break
+
+    findings.sort(key=lambda f: (f["rule"] is not None, f["rule"] or 0))
+    return findings
+
+
+# ---------------- Multi-network report ---------------- #
+REPORT_FIELDS = ["network_id", "network_name", "rule_type", "rule", "type", "other", "policy", "comment", "detail"]
+
+
+def get_rules(headers, network_id, rule_type="l3"):
+    url = f"{meraki_api.BASE_URL}/networks/{network_id}/appliance/firewall/{rule_type}FirewallRules"
+    response = meraki_api.get(url, headers=headers)
+    response.raise_for_status()
+    return response.json().get("rules", [])
+
+
+def analyze_networks(headers, networks, rule_types=("l3",), max_workers=meraki_api.MAX_WORKERS):
+    """Fetch and analyze the rules of many networks in parallel.
+
+    ``networks`` are dicts with ``id`` (and optionally ``name``).
+    Returns ``(rows, errors)`` with one row per finding.
+    """
+    jobs = [(net, rule_type) for net in networks for rule_type in rule_types]
+    rows, errors = [], {}
+
+    def analyze(job):
+        net, rule_type = job
+        return analyze_rules(get_rules(headers, net["id"], rule_type))
+
+    for (net, rule_type), findings, error in meraki_api.parallel_map(analyze, jobs, max_workers=max_workers):
+        if error:
+            errors[(net["id"], rule_type)] = error
+            continue
+        for finding in findings:
+            rows.append({"network_id": net["id"], "network_name": net.get("name", ""), "rule_type": rule_type,
+                         **finding})
+    rows.sort(key=lambda r: (r["network_name"], r["network_id"], r["rule_type"], r["rule"] or 0))
+    return rows, errors
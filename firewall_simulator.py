@@ -0,0 +1,328 @@
+"""Compiled first-match evaluation of MX L3 / inbound firewall rules.
+
+A rule list is compiled once into one lookup table per flow field.  The
+boundaries of every rule's intervals split each field (source address,
+destination address, protocol, source port, destination port) into
+segments, and every segment stores a bitset of the rules that match it
+(one bit per rule, in rule order).  A flow's candidate rules are the AND of
+its five segment bitsets and the first matching rule is the lowest set
+bit, so a batch of flows is evaluated with a handful of numpy gathers per
+chunk instead of a Python loop over rules:
+
+    ruleset = compile_rules(rules)
+    flows = load_flows("flows.csv")            # src,dst,protocol,dport[,sport]
+    matches = ruleset.evaluate(flows)          # rule index per flow, -1 = default rule
+    allowed = ruleset.allowed(matches)
+
+Only IPv4 flows are evaluated; IPv6 CIDRs in rules are ignored.  Rule
+fields that reference VLAN(...) / OBJ(...) / GRP(...) or FQDNs only match
+once they are resolved through ``aliases`` (see :func:`policy_object_aliases`);
+unresolved ones are listed in ``CompiledRules.unresolved`` and never match.
+A flow no rule matches gets the policy of the list's "Default rule" (allow
+when the list has none).
+"""
+import ipaddress
+
+import numpy as np
+
+import meraki_api
+from firewall_analyzer import Rule, get_rules, is_default_rule, ANY
+
+PROTO_CODES = {"tcp": 0, "udp": 1, "icmp": 2, "icmp6": 3}
+OTHER_PROTO = 4                        # any protocol only "any" rules match
+IANA_PROTOCOLS = {"6": "tcp", "17": "udp", "1": "icmp", "58": "icmp6"}
+IPV4_SPACE = ((0, (1 << 32) - 1),)
+CHUNK = 65536
+
+
+# ---------------- Flows ---------------- #
+class Flows:
+    """Columnar batch of IPv4 flows (``sport`` is None when unknown)."""
+    __slots__ = ("src", "dst", "proto", "dport", "sport")
+
+    def __init__(self, src, dst, proto, dport, sport=None):
+        self.src, self.dst, self.proto, self.dport, self.sport = src, dst, proto, dport, sport
+
+    def __len__(self):
+        return len(self.src)
+
+    @classmethod
+    def from_columns(cls, src, dst, protocol, dport, sport=None):
+        """Build from sequences of dotted IPs, protocol names / numbers and ports."""
+        return cls(ipv4_to_int(src), ipv4_to_int(dst), protocol_codes(protocol), _ports(dport),
+                   None if sport is None else _ports(sport))
+
+
+def ipv4_to_int(values):
+    import pandas as pd
+
+    values = pd.Series(values, dtype="string").str.strip()
+    octets = values.str.split(".", n=3, expand=True)
+    if octets.shape[1] != 4:
+        raise ValueError("flow addresses must be dotted IPv4")
+    octets = octets.apply(pd.to_numeric, errors="coerce")
+    bad = octets.isna().any(axis=1) | (octets < 0).any(axis=1) | (octets > 255).any(axis=1)
+    if bad.any():
+        raise ValueError(f"invalid IPv4 address: {values[bad].iloc[0]!r}")
+    o = octets.to_numpy(dtype=np.int64)
+    return (o[:, 0] << 24) | (o[:, 1] << 16) | (o[:, 2] << 8) | o[:, 3]
+
+
+def protocol_codes(values):
+    import pandas as pd
+
+    names = pd.Series(values, dtype="string").str.strip().str.lower()
+    names = names.replace(IANA_PROTOCOLS)
+    return names.map(PROTO_CODES).fillna(OTHER_PROTO).to_numpy(dtype=np.int64)
+
+
+def _ports(values):
+    import pandas as pd
+
+    return pd.to_numeric(pd.Series(values), errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+
+
+def load_flows(path):
+    """Read flows from CSV (``src,dst,protocol,dport`` and optionally ``sport``)."""
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype=str)
+    missing = {"src", "dst", "protocol", "dport"} - set(df.columns)
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+    return Flows.from_columns(df["src"], df["dst"], df["protocol"], df["dport"],
+                              df["sport"] if "sport" in df.columns else None)
+
+
+def _split_endpoint(value):
+    # "10.0.0.5:51234" or plain "10.0.0.5"
+    host, _, port = str(value).partition(":")
+    return host, port
+
+
+def flows_from_events(events):
+    """Flows from appliance ``flows`` / firewall events carrying src and dst in ``eventData``."""
+    columns = {"src": [], "dst": [], "protocol": [], "dport": [], "sport": []}
+    for event in events:
+        data = event.get("eventData") or {}
+        if not data.get("src") or not data.get("dst"):
+            continue
+        src, sport = _split_endpoint(data["src"])
+        dst, dport = _split_endpoint(data["dst"])
+        columns["src"].append(src)
+        columns["dst"].append(dst)
+        columns["protocol"].append(data.get("protocol", "any"))
+        columns["dport"].append(data.get("dport") or dport or 0)
+        columns["sport"].append(data.get("sport") or sport or 0)
+    return Flows.from_columns(**columns)
+
+
+# ---------------- Compilation ---------------- #
+def _ipv4_intervals(addresses, aliases):
+    """IPv4 intervals of an AddressSet, plus the tokens that could not be resolved."""
+    if addresses.any:
+        return IPV4_SPACE, set()
+    intervals = [(int(n.network_address), int(n.broadcast_address)) for n in addresses.networks if n.version == 4]
+    unresolved = set()
+    for token in addresses.tokens:
+        if token not in aliases:
+            unresolved.add(token)
+            continue
+        for cidr in aliases[token]:
+            net = ipaddress.ip_network(cidr, strict=False)
+            if net.version == 4:
+                intervals.append((int(net.network_address), int(net.broadcast_address)))
+    return tuple(intervals), unresolved
+
+
+def _field_table(per_rule, words):
+    """Segment start points and a (segments, words) bitset table for one field."""
+    points = {0}
+    for intervals in per_rule:
+        for start, end in intervals:
+            points.add(start)
+            points.add(end + 1)
+    points = np.array(sorted(points), dtype=np.int64)
+    table = np.zeros((len(points), words), dtype=np.uint64)
+    for bit, intervals in enumerate(per_rule):
+        word, mask = bit >> 6, np.uint64(1 << (bit & 63))
+        for start, end in intervals:
+            lo, hi = np.searchsorted(points, (start, end + 1))
+            table[lo:hi, word] |= mask
+    return points, table
+
+
+class CompiledRules:
+    """A rule list compiled for vectorised first-match lookups."""
+
+    def __init__(self, raw_rules, aliases=None):
+        aliases = {k.lower(): v for k, v in (aliases or {}).items()}
+        self.rules = list(raw_rules)
+        self.unresolved = {}           # rule index -> unresolved tokens
+        self.skipped = {}              # rule index -> parse error
+        self.default_policy = "allow"
+        fields = {"src": [], "dst": [], "sport": [], "dport": [], "proto": []}
+        order, allow = [], []
+
+        for index, raw in enumerate(self.rules):
+            if is_default_rule(raw):
+                # no match = the default rule; its policy is the no-match decision
+                self.default_policy = "deny" if str(raw.get("policy", "")).lower() == "deny" else "allow"
+                continue
+            rule = Rule(index, raw)
+            src, src_missing = _ipv4_intervals(rule.src, aliases)
+            dst, dst_missing = _ipv4_intervals(rule.dst, aliases)
+            if src_missing | dst_missing:
+                self.unresolved[index] = sorted(src_missing | dst_missing)
+            if rule.error:
+                self.skipped[index] = rule.error
+                src = dst = ()         # can never match
+            codes = {PROTO_CODES.get(p, OTHER_PROTO) for p in rule.protocols}
+            if str(raw.get("protocol", "any")).lower() in ANY:
+                codes.add(OTHER_PROTO)
+            fields["src"].append(src)
+            fields["dst"].append(dst)
+            fields["sport"].append(rule.src_ports)
+            fields["dport"].append(rule.dst_ports)
+            fields["proto"].append(tuple((c, c) for c in codes))
+            order.append(index)
+            allow.append(rule.policy == "allow")
+
+        self.words = max(1, -(-len(order) // 64))
+        self.tables = {name: _field_table(per_rule, self.words) for name, per_rule in fields.items()}
+        self.order = np.array(order + [-1], dtype=np.int64)   # bit -> rule index, last = no match
+        # decision by rule index + 1, so -1 (no match) lands on the default rule's policy
+        self.decisions = np.ones(len(self.rules) + 1, dtype=bool)
+        self.decisions[0] = self.default_policy == "allow"
+        self.decisions[self.order[:-1] + 1] = allow
+
+    def __len__(self):
+        return len(self.order) - 1
+
+    def _lookup(self, name, values):
+        points, table = self.tables[name]
+        return table[np.searchsorted(points, values, side="right") - 1]
+
+    def _first_match(self, src, dst, proto, dport, sport):
+        bits = self._lookup("src", src)
+        bits &= self._lookup("dst", dst)
+        bits &= self._lookup("proto", proto)
+        bits &= self._lookup("dport", dport)
+        if sport is not None:
+            bits &= self._lookup("sport", sport)
+        nonzero = bits != 0
+        hit = nonzero.any(axis=1)
+        word = nonzero.argmax(axis=1)
+        value = bits[np.arange(len(bits)), word]
+        lowest = value & (~value + np.uint64(1))
+        lowest[~hit] = 1
+        bit = word * 64 + np.log2(lowest.astype(np.float64)).astype(np.int64)
+        bit[~hit] = len(self.order) - 1
+        return bit
+
+    def evaluate(self, flows, chunk=CHUNK):
+        """Index (into the original rule list) of the first matching rule per flow; -1 if none."""
+        bits = np.empty(len(flows), dtype=np.int64)
+        for lo in range(0, len(flows), chunk):
+            hi = lo + chunk
+            bits[lo:hi] = self._first_match(flows.src[lo:hi], flows.dst[lo:hi], flows.proto[lo:hi],
+                                            flows.dport[lo:hi], None if flows.sport is None else flows.sport[lo:hi])
+        return self.order[bits]
+
+    def allowed(self, matches):
+        """Boolean decision per flow for the indexes returned by :meth:`evaluate`."""
+        return self.decisions[matches + 1]
+
+    def hit_counts(self, matches):
+        """``{rule index: flows}`` (``-1`` counts flows that matched no rule)."""
+        indexes, counts = np.unique(matches, return_counts=True)
+        return dict(zip(indexes.tolist(), counts.tolist()))
+
+    def check(self, src, dst, protocol="tcp", dport=0, sport=None):
+        """Decide one flow: ``(rule index or -1, rule dict or None, "allow"/"deny")``."""
+        flows = Flows.from_columns([src], [dst], [protocol], [dport], None if sport is None else [sport])
+        index = int(self.evaluate(flows)[0])
+        if index < 0:
+            return -1, None, self.default_policy
+        return index, self.rules[index], "allow" if self.decisions[index + 1] else "deny"
+
+
+def compile_rules(raw_rules, aliases=None):
+    return CompiledRules(raw_rules, aliases)
+
+
+# ---------------- Policy changes ---------------- #
+def compare(current, proposed, flows):
+    """Decisions of two compiled rule sets over the same flows.
+
+    Returns totals plus one row per (current rule, proposed rule) pair whose
+    decision differs, most flows first.
+    """
+    old = current.evaluate(flows)
+    new = proposed.evaluate(flows)
+    old_allow, new_allow = current.allowed(old), proposed.allowed(new)
+    changed = old_allow != new_allow
+    pairs, counts = np.unique(np.stack([old[changed], new[changed]]), axis=1, return_counts=True)
+    transitions = [{"current_rule": int(a), "proposed_rule": int(b),
+                    "current": "allow" if current.decisions[a + 1] else "deny",
+                    "proposed": "allow" if proposed.decisions[b + 1] else "deny", "flows": int(n)}
+                   for (a, b), n in zip(pairs.T.tolist(), counts.tolist())]
+    transitions.sort(key=lambda t: -t["flows"])
+    return {
+        "flows": len(flows),
+        "allowed": int(old_allow.sum()),
+        "denied": int(len(flows) - old_allow.sum()),
+        "changed": int(changed.sum()),
+        "newly_denied": int((old_allow & ~new_allow).sum()),
+        "newly_allowed": int((~old_allow & new_allow).sum()),
+        "transitions": transitions,
+    }
+
+
+def policy_object_aliases(headers, org_id):
+    """``{"obj(<id>)": [cidr], "grp(<id>)": [cidrs]}`` for the org's CIDR policy objects."""
+    objects = meraki_api.get_all_pages(f"{meraki_api.BASE_URL}/organizations/{org_id}/policyObjects",
+                                       headers=headers)
+    response = meraki_api.get(f"{meraki_api.BASE_URL}/organizations/{org_id}/policyObjects/groups",
+                              headers=headers)
+    response.raise_for_status()
+    aliases = {f"obj({o['id']})": [o["cidr"]] for o in objects if o.get("cidr")}
+    for group in response.json():
+        aliases[f"grp({group['id']})"] = [cidr for oid in group.get("objectIds", [])
+                                          for cidr in aliases.get(f"obj({oid})", [])]
+    return aliases
+
+
+# ---------------- Multi-network ---------------- #
+SIMULATION_FIELDS = ["network_id", "network_name", "rule_type", "rules", "flows", "allowed", "denied",
+                     "changed", "newly_denied", "newly_allowed", "unresolved_rules"]
+
+
+def simulate_networks(headers, networks, flows, rule_type="l3", proposed_rules=None, aliases=None,
+                      max_workers=meraki_api.MAX_WORKERS):
+    """Replay ``flows`` against every network's live rules (and ``proposed_rules``, if given).
+
+    Rules are fetched in parallel; returns ``(rows, errors)`` with one row per network.
+    """
+    proposed = compile_rules(proposed_rules, aliases) if proposed_rules is not None else None
+
+    def simulate(net):
+        current = compile_rules(get_rules(headers, net["id"], rule_type), aliases)
+        row = {"network_id": net["id"], "network_name": net.get("name", ""), "rule_type": rule_type,
+               "rules": len(current), "unresolved_rules": len(current.unresolved)}
+        if proposed is None:
+            allowed = int(current.allowed(current.evaluate(flows)).sum())
+            row.update(flows=len(flows), allowed=allowed, denied=len(flows) - allowed)
+        else:
+            result = compare(current, proposed, flows)
+            row.update({k: v for k, v in result.items() if k != "transitions"})
+        return row
+
+    rows, errors = [], {}
+    for net, row, error in meraki_api.parallel_map(simulate, networks, max_workers=max_workers):
+        if error:
+            errors[net["id"]] = error
+        else:
+            rows.append(row)
+    rows.sort(key=lambda r: (r["network_name"], r["network_id"]))
+    return rows, errors
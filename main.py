@@ -1,4 +1,7 @@
-﻿import requests
+﻿import meraki_api
+import api_cassette
+import api_metrics
+import tracing
 import os
 import getpass
 import sys
@@ -11,21 +14,13 @@ from pathlib import Path
 # Add your home directory to path (only useful for srajiwate)
 sys.path.append("/home/srajiwate")
 
-from azure.identity import DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
-from pyfiglet import Figlet
-
-from switch_config import switch_config_menu
-from wireless_config import wireless_config_menu
-from appliance_config import appliance_config_menu
-from policy_objects import policy_object_menu
-from vpn_exclusion_menu import vpn_exclusion_menu
-from troubleshooting import troubleshooting_menu
-from vpn_s2s_menu import vpn_s2s_menu
-from device_status import device_status_menu
-from inventory_view import show_inventory
+
+from cli import add_headless_commands, run_headless
+
+# Menu modules (and their pandas / openai / azure dependencies) are imported
+# on first use inside main_menu() to keep time-to-first-prompt low.
 
 # Try to import user_vault_config safely
 get_vault_and_secret_names = None
@@ -87,6 +82,8 @@ def verify_integrity():
 
 
 def show_logo_and_confirm():
+    from pyfiglet import Figlet
+
     figlet = Figlet(font='slant')
     logo_text = figlet.renderText(EXPECTED_BANNER)
     console.print(logo_text, style="bold cyan")
@@ -99,7 +96,7 @@ def show_logo_and_confirm():
         exit()
 
 
-BASE_URL = "https://api.meraki.com/api/v1"
+BASE_URL = meraki_api.BASE_URL
 
 # === Vault & Logging ===
 def prompt_vault_details(use_vault=True):
@@ -122,12 +119,14 @@ def prompt_vault_details(use_vault=True):
 
 
 LOG_DIR = Path.home() / ".meraki_deploy"
-LOG_DIR.mkdir(mode=0o700, exist_ok=True)
 LOG_FILE = LOG_DIR / "meraki_wireless_deploy.log"
 
-logging.basicConfig(filename=str(LOG_FILE),
-                    level=logging.INFO,
-                    format='%(asctime)s - %(message)s')
+
+def setup_logging():
+    LOG_DIR.mkdir(mode=0o700, exist_ok=True)
+    logging.basicConfig(filename=str(LOG_FILE),
+                        level=logging.INFO,
+                        format='%(asctime)s - %(message)s')
 
 
 def log_event(message, style="green"):
@@ -139,6 +138,9 @@ def fetch_api_key(KEY_VAULT_NAME=None, SECRET_NAME=None):
     if not KEY_VAULT_NAME or not SECRET_NAME:
         return getpass.getpass("🔑 Enter your Meraki API Key: ")
     try:
+        from azure.identity import DefaultAzureCredential
+        from azure.keyvault.secrets import SecretClient
+
         kv_uri = f"https://{KEY_VAULT_NAME}.vault.azure.net"
         credential = DefaultAzureCredential()
         client = SecretClient(vault_url=kv_uri, credential=credential)
@@ -157,7 +159,7 @@ def get_headers(api_key):
 # === Org & Network Functions (unchanged) ===
 def choose_organization(headers):
     url = f"{BASE_URL}/organizations"
-    response = requests.get(url, headers=headers)
+    response = meraki_api.get(url, headers=headers)
     if response.status_code != 200:
         log_event("❌ Failed to fetch organizations.", style="red")
         return None
@@ -171,7 +173,7 @@ def choose_organization(headers):
 
 def get_networks(org_id, headers):
     url = f"{BASE_URL}/organizations/{org_id}/networks"
-    response = requests.get(url, headers=headers)
+    response = meraki_api.get(url, headers=headers)
     return response.json() if response.status_code == 200 else []
 
 
@@ -196,7 +198,7 @@ def choose_or_create_network(org_id, headers):
                    "productTypes": [t.strip() for t in types],
                    "tags": tags}
         url = f"{BASE_URL}/organizations/{org_id}/networks"
-        response = requests.post(url, headers=headers, json=payload)
+        response = meraki_api.post(url, headers=headers, json=payload)
         if response.status_code == 201:
             log_event(f"✅ Created network '{name}'", style="green")
             return response.json()['id']
@@ -209,7 +211,7 @@ def choose_or_create_network(org_id, headers):
 
 def get_claimed_serials(org_id, headers):
     url = f"{BASE_URL}/organizations/{org_id}/devices"
-    response = requests.get(url, headers=headers)
+    response = meraki_api.get(url, headers=headers)
     return [device["serial"] for device in response.json()] if response.status_code == 200 else []
 
 
@@ -222,7 +224,7 @@ def claim_devices(network_id, headers):
         return
     url = f"{BASE_URL}/networks/{network_id}/devices/claim"
     payload = {"serials": serials_to_claim}
-    response = requests.post(url, headers=headers, json=payload)
+    response = meraki_api.post(url, headers=headers, json=payload)
     if response.status_code in [200, 204]:
         log_event(f"✅ Claimed serials: {', '.join(serials_to_claim)}", style="green")
     else:
@@ -243,31 +245,56 @@ def main_menu():
         console.print("8. 🧪 Troubleshooting")
         console.print("9. 📶 Device Status")
         console.print("10. 🗂️ Inventory View")
-        console.print("11. ⬅️ Exit")
+        console.print("11. 🏢 Multi-Org Inventory & Status")
+        console.print("12. 🩺 API Diagnostics")
+        console.print("13. 📸 Configuration Snapshots")
+        console.print("14. 🏷️ Bulk Device Rename (template or CSV, action batches)")
+        console.print("15. ⬅️ Exit")
 
-        choice = Prompt.ask("Choose an action", choices=[str(i) for i in range(1, 12)])
+        choice = Prompt.ask("Choose an action", choices=[str(i) for i in range(1, 16)])
 
         if choice == "1":
             claim_devices(network_id, headers)
         elif choice == "2":
+            from switch_config import switch_config_menu
             switch_config_menu(network_id, headers)
         elif choice == "3":
+            from wireless_config import wireless_config_menu
             wireless_config_menu(network_id, headers)
         elif choice == "4":
+            from appliance_config import appliance_config_menu
             appliance_config_menu(network_id, headers)
         elif choice == "5":
+            from policy_objects import policy_object_menu
             policy_object_menu(BASE_URL, headers, network_id, org_id)
         elif choice == "6":
+            from vpn_exclusion_menu import vpn_exclusion_menu
             vpn_exclusion_menu(BASE_URL, headers, org_id)
         elif choice == "7":
+            from vpn_s2s_menu import vpn_s2s_menu
             vpn_s2s_menu(BASE_URL, headers, org_id, network_id)
         elif choice == "8":
+            from troubleshooting import troubleshooting_menu
             troubleshooting_menu(BASE_URL, headers, network_id)
         elif choice == "9":
+            from device_status import device_status_menu
             device_status_menu(org_id, network_id, headers)
         elif choice == "10":
+            from inventory_view import show_inventory
             show_inventory(headers, org_id)
         elif choice == "11":
+            from multi_org import multi_org_menu
+            multi_org_menu(headers)
+        elif choice == "12":
+            from api_metrics import diagnostics_menu
+            diagnostics_menu()
+        elif choice == "13":
+            from config_snapshot import snapshot_menu
+            snapshot_menu(headers, org_id)
+        elif choice == "14":
+            from device_rename import bulk_rename_menu
+            bulk_rename_menu(headers, org_id, network_id)
+        elif choice == "15":
             log_event("👋 Exiting deployment script.", style="cyan")
             break
 
@@ -276,15 +303,40 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--update-banner", action="store_true", help="Regenerate hashes (requires master password)")
     parser.add_argument("--no-vault", action="store_true", help="Skip Azure Key Vault and prompt API key manually")
+    parser.add_argument("--trace", metavar="FILE", help="Write a Chrome trace-event JSON of this run to FILE")
+    parser.add_argument("--dry-run", dest="dry_run_all", action="store_true",
+                        help="Run reads but only plan writes: print a field-level diff and call estimate, send nothing")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE", help="Save every API response to a compressed cassette file")
+    cassette.add_argument("--replay", metavar="CASSETTE", help="Answer API calls from a cassette (no network, no API key)")
+    add_headless_commands(parser)
     args = parser.parse_args()
+    setup_logging()
+    api_metrics.install_exit_report()
+    if args.trace:
+        tracing.enable(args.trace)
+    if args.dry_run_all:
+        import dry_run
+        dry_run.enable()
+    if args.record or args.replay:
+        api_cassette.configure("record" if args.record else "replay", args.record or args.replay)
 
     if args.update_banner:
         regenerate_banner_and_creator_hash()
 
+    if args.command:
+        sys.exit(run_headless(args))
+
     try:
         show_logo_and_confirm()
-        KEY_VAULT_NAME, SECRET_NAME = prompt_vault_details(use_vault=not args.no_vault)
-        api_key = fetch_api_key(KEY_VAULT_NAME, SECRET_NAME)
+        if args.dry_run_all:
+            console.print("🧪 Dry-run mode: reads are live, writes are only planned and nothing is sent.",
+                          style="bold yellow")
+        if api_cassette.mode == "replay":
+            api_key = "replay"
+        else:
+            KEY_VAULT_NAME, SECRET_NAME = prompt_vault_details(use_vault=not args.no_vault)
+            api_key = fetch_api_key(KEY_VAULT_NAME, SECRET_NAME)
         headers = get_headers(api_key)
         org_id = choose_organization(headers)
         if not org_id:
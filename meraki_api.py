@@ -0,0 +1,215 @@
+"""Shared HTTP layer for Dashboard API calls that need throughput.
+
+* pooled, per-thread ``requests`` sessions
+* token-bucket rate budgets (per organization, plus the per-source-IP cap)
+* automatic ``429`` / ``Retry-After`` back-off
+* ``Link: rel=next`` pagination
+* a small thread-pool helper for fan-out work
+* per-endpoint metrics for every attempt (see ``api_metrics``)
+* record / replay of responses (see ``api_cassette``)
+* dry-run planning of writes (see ``dry_run``)
+* trace spans per attempt (see ``tracing``)
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import api_cassette
+import api_metrics
+import dry_run
+import tracing
+
+BASE_URL = os.environ.get("MERAKI_BASE_URL", "https://api.meraki.com/api/v1").rstrip("/")
+
+# Dashboard limits: 10 requests/s per organization, 100 requests/s per source IP.
+ORG_RATE_LIMIT = 10
+GLOBAL_RATE_LIMIT = 100
+MAX_RETRIES = 5
+DEFAULT_TIMEOUT = 60
+MAX_WORKERS = 8
+
+
+# ---------------- Rate limiting ---------------- #
+class RateLimiter:
+    """Thread-safe token bucket: ``rate`` requests per second, bursts up to ``burst`` (at least 1)."""
+
+    def __init__(self, rate, burst=None):
+        if not rate > 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst or rate))    # below 1 no request could ever go out
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_global_limiter = RateLimiter(GLOBAL_RATE_LIMIT)
+_budgets = {}
+_budgets_lock = threading.Lock()
+
+
+def rate_budget(key, rate=ORG_RATE_LIMIT):
+    """Return the shared limiter for ``key`` (usually an org ID), creating it on first use."""
+    if key is None:
+        return None
+    with _budgets_lock:
+        limiter = _budgets.get(key)
+        if limiter is None or limiter.rate != rate:
+            limiter = _budgets[key] = RateLimiter(rate)
+        return limiter
+
+
+# ---------------- Sessions ---------------- #
+_local = threading.local()
+
+
+def _session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS * 2)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def absolute_url(url):
+    return url if url.startswith(("http://", "https://")) else f"{BASE_URL}/{url.lstrip('/')}"
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    return len(body) if isinstance(body, (bytes, bytearray)) else len(str(body).encode())
+
+
+def _retry_after(response, attempt):
+    try:
+        return max(float(response.headers.get("Retry-After", "")), 0.1)
+    except ValueError:
+        return min(2 ** attempt, 30)
+
+
+# ---------------- Requests ---------------- #
+def _send(method, url, headers, kwargs):
+    if api_cassette.mode == "replay":
+        return api_cassette.replay(method, url, kwargs)
+    response = _session().request(method, url, headers=headers, **kwargs)
+    if api_cassette.mode == "record":
+        api_cassette.record(method, url, kwargs, response)
+    return response
+
+
+def request(method, url, headers=None, budget=None, max_retries=MAX_RETRIES, **kwargs):
+    """Send one API request, honouring rate budgets and retrying 429s.
+
+    ``budget`` is a :class:`RateLimiter` or a key for :func:`rate_budget`.
+    Returns the final ``requests.Response``.
+    """
+    if budget is not None and not isinstance(budget, RateLimiter):
+        budget = rate_budget(budget)
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    url = absolute_url(url)
+    if dry_run.enabled and method.upper() != "GET":
+        return dry_run.intercept(method.upper(), url, kwargs,
+                                 lambda target=url: request("GET", target, headers=headers, budget=budget,
+                                                            max_retries=max_retries, timeout=kwargs["timeout"]))
+
+    replaying = api_cassette.mode == "replay"
+
+    for attempt in range(max_retries + 1):
+        if not replaying:
+            with tracing.span("rate limit wait", cat="wait"):
+                _global_limiter.acquire()
+                if budget:
+                    budget.acquire()
+        start = time.perf_counter()
+        try:
+            with tracing.span(f"{method} {api_metrics.endpoint_template(url)}", cat="http", attempt=attempt):
+                response = _send(method, url, headers, kwargs)
+        except requests.RequestException:
+            api_metrics.record(method, url, None, time.perf_counter() - start, retry=attempt > 0)
+            raise
+        api_metrics.record(method, url, response.status_code, time.perf_counter() - start, retry=attempt > 0,
+                           sent=_body_size(response.request.body), received=len(response.content))
+        if response.status_code != 429 or attempt == max_retries:
+            return response
+        if not replaying:
+            with tracing.span("429 back-off", cat="wait"):
+                time.sleep(_retry_after(response, attempt))
+    return response
+
+
+def get(url, headers=None, **kwargs):
+    return request("GET", url, headers=headers, **kwargs)
+
+
+def post(url, headers=None, **kwargs):
+    return request("POST", url, headers=headers, **kwargs)
+
+
+def put(url, headers=None, **kwargs):
+    return request("PUT", url, headers=headers, **kwargs)
+
+
+def delete(url, headers=None, **kwargs):
+    return request("DELETE", url, headers=headers, **kwargs)
+
+
+def get_all_pages(url, headers=None, params=None, per_page=1000, budget=None, items_key=None, max_pages=None):
+    """GET every page of a paginated endpoint and return the combined list.
+
+    Raises ``requests.HTTPError`` on a non-2xx page.  ``items_key`` is for
+    endpoints that wrap results in an object (e.g. ``{"items": [...]}``).
+    """
+    params = dict(params or {})
+    if per_page:
+        params.setdefault("perPage", per_page)
+
+    results = []
+    pages = 0
+    next_url = url
+    while next_url:
+        response = get(next_url, headers=headers, params=params, budget=budget)
+        response.raise_for_status()
+        body = response.json()
+        results.extend(body.get(items_key, []) if items_key else body)
+        pages += 1
+        if max_pages and pages >= max_pages:
+            break
+        next_url = response.links.get("next", {}).get("url")
+        params = None  # the next link already carries the query string
+    return results
+
+
+# ---------------- Fan-out ---------------- #
+def parallel_map(fn, items, max_workers=MAX_WORKERS):
+    """Run ``fn(item)`` concurrently; yields ``(item, result, error)`` as each finishes."""
+    items = list(items)
+    if not items:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        futures = {pool.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
@@ -0,0 +1,183 @@
+from rich.console import Console
+from rich.prompt import Prompt, Confirm
+from rich.table import Table
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+
+import meraki_api
+import tracing
+from report_writer import export_rows, ask_export_formats
+
+console = Console()
+
+REPORT_FIELDS = [
+    "org_id", "org_name", "network_id", "network_name", "serial", "name", "model", "product_type",
+    "status", "last_reported_at", "lan_ip", "public_ip", "firmware", "tags",
+]
+
+
+# ---------------- API Calls ---------------- #
+def list_organizations(headers):
+    return meraki_api.get_all_pages("/organizations", headers=headers)
+
+
+def get_org_networks(headers, org_id, budget):
+    return meraki_api.get_all_pages(f"/organizations/{org_id}/networks", headers=headers, budget=budget)
+
+
+def get_org_inventory(headers, org_id, budget):
+    return meraki_api.get_all_pages(f"/organizations/{org_id}/devices", headers=headers, budget=budget)
+
+
+def get_org_statuses(headers, org_id, budget):
+    return meraki_api.get_all_pages(f"/organizations/{org_id}/devices/statuses", headers=headers, budget=budget)
+
+
+# ---------------- Crawl ---------------- #
+def crawl_org(headers, org, include_status=True, rate=meraki_api.ORG_RATE_LIMIT):
+    """Fetch one org's networks, devices and (optionally) statuses; returns report rows."""
+    org_id = str(org["id"])
+    with tracing.span("crawl org", cat="fetch", org=org.get("name", org_id)):
+        return _crawl_org(headers, org, org_id, include_status, rate)
+
+
+def _crawl_org(headers, org, org_id, include_status, rate):
+    budget = meraki_api.rate_budget(org_id, rate)
+
+    networks = {n["id"]: n.get("name", "") for n in get_org_networks(headers, org_id, budget)}
+    devices = get_org_inventory(headers, org_id, budget)
+    statuses = {}
+    if include_status:
+        statuses = {s["serial"]: s for s in get_org_statuses(headers, org_id, budget)}
+
+    rows = []
+    for device in devices:
+        serial = device.get("serial", "")
+        status = statuses.get(serial, {})
+        net_id = device.get("networkId") or ""
+        rows.append({
+            "org_id": org_id,
+            "org_name": org.get("name", ""),
+            "network_id": net_id,
+            "network_name": networks.get(net_id, ""),
+            "serial": serial,
+            "name": device.get("name") or "",
+            "model": device.get("model", ""),
+            "product_type": device.get("productType", ""),
+            "status": status.get("status", "") if include_status else "",
+            "last_reported_at": status.get("lastReportedAt", "") or "",
+            "lan_ip": device.get("lanIp") or status.get("lanIp") or "",
+            "public_ip": status.get("publicIp", "") or "",
+            "firmware": device.get("firmware", ""),
+            "tags": ",".join(device.get("tags") or []),
+        })
+    return rows
+
+
+def crawl_organizations(headers, orgs, include_status=True, rate=meraki_api.ORG_RATE_LIMIT,
+                        max_workers=meraki_api.MAX_WORKERS, on_result=None):
+    """Crawl several orgs in parallel, each under its own rate budget.
+
+    Returns ``(rows, errors)`` where errors maps org ID to the exception.
+    ``on_result(org, rows, error)`` is called as each org finishes.
+    """
+    all_rows, errors = [], {}
+
+    def crawl(org):
+        return crawl_org(headers, org, include_status=include_status, rate=rate)
+
+    for org, rows, error in meraki_api.parallel_map(crawl, orgs, max_workers=max_workers):
+        if error:
+            errors[str(org["id"])] = error
+        else:
+            all_rows.extend(rows)
+        if on_result:
+            on_result(org, rows, error)
+    return all_rows, errors
+
+
+# ---------------- Selection ---------------- #
+def select_organizations(orgs, selection):
+    """Pick orgs by 'all', 1-based indexes/ranges ('1,3-5'), org IDs, or name substrings."""
+    selection = (selection or "").strip()
+    if not selection or selection.lower() == "all":
+        return list(orgs)
+
+    picked = []
+    for token in (t.strip() for t in selection.split(",")):
+        if not token:
+            continue
+        start, _, end = token.partition("-")
+        if end and start.strip().isdigit() and end.strip().isdigit():
+            start, end = int(start), int(end)
+            picked.extend(orgs[i - 1] for i in range(start, end + 1) if 1 <= i <= len(orgs))
+        elif token.isdigit() and 1 <= int(token) <= len(orgs):
+            picked.append(orgs[int(token) - 1])
+        else:
+            picked.extend(o for o in orgs if str(o["id"]) == token or token.lower() in o.get("name", "").lower())
+
+    seen, unique = set(), []
+    for org in picked:
+        if org["id"] not in seen:
+            seen.add(org["id"])
+            unique.append(org)
+    return unique
+
+
+# ---------------- Menu ---------------- #
+def multi_org_menu(headers):
+    console.rule("[bold cyan]🏢 Multi-Organization Inventory & Status")
+
+    try:
+        orgs = list_organizations(headers)
+    except Exception as e:
+        console.print(f"[red]❌ Failed to fetch organizations: {e}[/red]")
+        return
+
+    for idx, org in enumerate(orgs, 1):
+        console.print(f"{idx}. {org['name']} ({org['id']})")
+
+    selection = Prompt.ask("Select organizations ('all', numbers/ranges, IDs or name filters)", default="all")
+    selected = select_organizations(orgs, selection)
+    if not selected:
+        console.print("[yellow]⚠️ No organizations matched.[/yellow]")
+        return
+
+    include_status = Confirm.ask("📶 Include device statuses?", default=True)
+    rate = float(Prompt.ask("⏱️  Request budget per org (requests/second)", default=str(meraki_api.ORG_RATE_LIMIT)))
+    workers = int(Prompt.ask("🧵 Orgs to crawl in parallel", default=str(meraki_api.MAX_WORKERS)))
+    if rate <= 0 or workers < 1:
+        console.print("[red]❌ The request budget must be positive and at least one org crawled at a time.[/red]")
+        return
+
+    summary = {}
+
+    with Progress(SpinnerColumn(), TextColumn("[bold blue]{task.description}"), BarColumn(),
+                  TextColumn("{task.completed}/{task.total} orgs"), TimeElapsedColumn(), console=console) as progress:
+        task = progress.add_task("Crawling organizations", total=len(selected))
+
+        def on_result(org, rows, error):
+            summary[str(org["id"])] = (org, rows or [], error)
+            progress.advance(task)
+
+        rows, errors = crawl_organizations(headers, selected, include_status=include_status, rate=rate,
+                                           max_workers=workers, on_result=on_result)
+
+    table = Table(title="🏢 Organization Summary", show_header=True, header_style="bold magenta")
+    table.add_column("Organization", style="cyan")
+    table.add_column("Devices", justify="right")
+    table.add_column("Online", justify="right", style="green")
+    table.add_column("Offline", justify="right", style="red")
+    table.add_column("Result")
+    for org, org_rows, error in sorted(summary.values(), key=lambda item: item[0].get("name", "")):
+        online = sum(1 for r in org_rows if r["status"] == "online")
+        offline = sum(1 for r in org_rows if r["status"] == "offline")
+        result = f"[red]❌ {error}[/red]" if error else "[green]✅[/green]"
+        table.add_row(org.get("name", org["id"]), str(len(org_rows)), str(online), str(offline), result)
+    console.print(table)
+
+    if errors:
+        console.print(f"[yellow]⚠️ {len(errors)} organization(s) failed; their devices are not in the report.[/yellow]")
+
+    if rows and Confirm.ask("📤 Export the consolidated report?", default=True):
+        export_rows(rows, "multi_org_inventory", formats=ask_export_formats(), fieldnames=REPORT_FIELDS,
+                    total=len(rows))
@@ -1,5 +1,8 @@
-﻿import requests
-import yaml
+﻿import ipaddress
+import re
+
+import bulk_input
+import meraki_api
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from rich.table import Table
@@ -10,7 +13,7 @@ BULK_DIR = Path(__file__).resolve().parent / "data"
 
 def view_policy_object_groups(base_url, headers, organization_id):
     url = f"{base_url}/organizations/{organization_id}/policyObjects/groups"
-    response = requests.get(url, headers=headers)
+    response = meraki_api.get(url, headers=headers)
 
     if response.status_code == 404:
         console.print("[yellow]⚠️ No policy object groups exist.")
@@ -35,7 +38,7 @@ def view_policy_object_groups(base_url, headers, organization_id):
 
 def view_policy_objects(base_url, headers, organization_id):
     url = f"{base_url}/organizations/{organization_id}/policyObjects"
-    response = requests.get(url, headers=headers)
+    response = meraki_api.get(url, headers=headers)
 
     if response.ok:
         objects = response.json()
@@ -58,7 +61,7 @@ def view_policy_objects(base_url, headers, organization_id):
 # ---------------- Delete Policy Objects ---------------- #
 def delete_policy_objects(base_url, headers, org_id):
     url = f"{base_url}/organizations/{org_id}/policyObjects"
-    response = requests.get(url, headers=headers)
+    response = meraki_api.get(url, headers=headers)
 
     if response.status_code != 200:
         console.print(f"[red]❌ Failed to fetch policy objects: {response.text}[/red]")
@@ -102,7 +105,7 @@ def delete_policy_objects(base_url, headers, org_id):
         confirm = Confirm.ask(f"❗ Are you sure you want to delete object '{obj['name']}'?")
         if confirm:
             del_url = f"{base_url}/organizations/{org_id}/policyObjects/{obj['id']}"
-            del_response = requests.delete(del_url, headers=headers)
+            del_response = meraki_api.delete(del_url, headers=headers)
             if del_response.status_code == 204:
                 console.print(f"[green]✅ Deleted object: {obj['name']}[/green]")
             else:
@@ -110,7 +113,7 @@ def delete_policy_objects(base_url, headers, org_id):
 
 def delete_policy_object_group(base_url, headers, org_id):
     url = f"{base_url}/organizations/{org_id}/policyObjects/groups"
-    response = requests.get(url, headers=headers)
+    response = meraki_api.get(url, headers=headers)
 
     if response.status_code != 200:
         console.print(f"[red]❌ Failed to fetch policy object groups: {response.text}[/red]")
@@ -147,7 +150,7 @@ def delete_policy_object_group(base_url, headers, org_id):
         confirm = Confirm.ask(f"❗ Are you sure you want to delete group '{group['name']}'?")
         if confirm:
             del_url = f"{base_url}/organizations/{org_id}/policyObjects/groups/{group_id}"
-            del_response = requests.delete(del_url, headers=headers)
+            del_response = meraki_api.delete(del_url, headers=headers)
             if del_response.status_code == 204:
                 console.print(f"[green]✅ Successfully deleted group: {group['name']}[/green]")
             else:
@@ -161,50 +164,110 @@ def create_policy_objects_from_ip_yaml(base_url, headers, org_id):
         console.print(f"[red]❌ YAML file not found: {file_path}[/red]")
         return
 
-    with open(file_path, "r") as f:
-        data = yaml.safe_load(f)
-
-    ip_list = data.get("ips", [])
+    try:
+        ip_list = bulk_input.load_records(file_path, "policy_objects")
+    except ValueError as e:
+        console.print(f"[red]❌ {e}[/red]")
+        return
     if not ip_list:
         console.print("[red]❌ No IPs found in YAML file.[/red]")
         return
 
     base_name = Prompt.ask("📛 Enter base name for policy objects (e.g., Web-Server)")
-    created_ids = []
-
-    for ip in ip_list:
-        sanitized_ip = ip.replace('.', '-')
-        name = f"{base_name}-{sanitized_ip}"
-        payload = {
-            "name": name,
-            "category": "network",
-            "type": "cidr",
-            "cidr": f"{ip}/32"
-        }
-        url = f"{base_url}/organizations/{org_id}/policyObjects"
-        response = requests.post(url, headers=headers, json=payload)
+    object_ids = create_policy_objects(base_url, headers, org_id, ip_list, base_name)
+
+    if object_ids and Confirm.ask("📦 Add the objects to object group(s)?"):
+        create_policy_object_groups(base_url, headers, org_id, object_ids, base_name)
+
+def index_policy_objects(objects):
+    """``({cidr: object}, {name: object})`` for the org's policy objects (CIDRs normalized)."""
+    by_cidr, by_name = {}, {}
+    for obj in objects:
+        by_name[obj.get("name")] = obj
+        if obj.get("type") == "cidr" and obj.get("cidr"):
+            try:
+                by_cidr.setdefault(str(ipaddress.ip_network(obj["cidr"], strict=False)), obj)
+            except ValueError:
+                pass
+    return by_cidr, by_name
+
+def create_policy_objects(base_url, headers, org_id, ip_list, base_name):
+    """IDs of the objects for ``ip_list``: objects with the same CIDR are reused and only
+    the missing ones are created, concurrently under the org's rate budget."""
+    objects = meraki_api.get_all_pages(f"{base_url}/organizations/{org_id}/policyObjects", headers=headers)
+    by_cidr, by_name = index_policy_objects(objects)
+
+    object_ids, missing, reused = [], [], 0
+    for cidr in dict.fromkeys(str(ipaddress.ip_network(ip)) for ip in ip_list):
+        if cidr in by_cidr:
+            object_ids.append(by_cidr[cidr]["id"])
+            reused += 1
+            continue
+        name = f"{base_name}-{cidr.split('/')[0].replace('.', '-').replace(':', '-')}"
+        if name in by_name:
+            console.print(f"[red]❌ Name {name} is taken by {by_name[name].get('cidr')}; skipping {cidr}[/red]")
+            continue
+        missing.append({"name": name, "category": "network", "type": "cidr", "cidr": cidr})
 
-        if response.status_code == 201:
-            obj = response.json()
-            created_ids.append(obj["id"])
-            console.print(f"[green]✅ Created: {name}[/green]")
+    url = f"{base_url}/organizations/{org_id}/policyObjects"
+    budget = meraki_api.rate_budget(str(org_id))
+
+    def create(payload):
+        return meraki_api.post(url, headers=headers, json=payload, budget=budget)
+
+    failed = 0
+    for payload, response, error in meraki_api.parallel_map(create, missing):
+        if error is None and response.status_code == 201:
+            object_ids.append(response.json()["id"])
+            console.print(f"[green]✅ Created: {payload['name']}[/green]")
         else:
-            console.print(f"[red]❌ Failed to create {name}: {response.text}[/red]")
+            failed += 1
+            console.print(f"[red]❌ Failed to create {payload['name']}: {error or response.text}[/red]")
+
+    console.print(f"[cyan]📋 {reused} reused, {len(missing) - failed} created, {failed} failed.[/cyan]")
+    return object_ids
+
+def create_policy_object_groups(base_url, headers, org_id, object_ids, base_name):
+    """Put ``object_ids`` into the ``<base_name>_Group_<n>`` groups: objects already in one
+    are left alone, existing groups are filled up first, then new groups are created."""
+    max_per_group = 149
+    groups_url = f"{base_url}/organizations/{org_id}/policyObjects/groups"
+    pattern = re.compile(rf"{re.escape(base_name)}_Group_(\d+)")
+    groups = sorted((g for g in meraki_api.get_all_pages(groups_url, headers=headers)
+                     if pattern.fullmatch(g.get("name", ""))),
+                    key=lambda g: int(pattern.fullmatch(g["name"]).group(1)))
+    # object IDs are strings, group objectIds integers: compare them as strings
+    grouped = {str(obj_id) for group in groups for obj_id in group.get("objectIds", [])}
+    pending = [obj_id for obj_id in dict.fromkeys(map(str, object_ids)) if obj_id not in grouped]
+    if not pending:
+        console.print("[cyan]✅ All objects are already grouped.[/cyan]")
+        return
 
-    if created_ids and Confirm.ask("📦 Group created objects into object group(s)?"):
-        max_per_group = 149
-        group_chunks = [created_ids[i:i+max_per_group] for i in range(0, len(created_ids), max_per_group)]
+    for group in groups:
+        room = max_per_group - len(group.get("objectIds", []))
+        if room <= 0 or not pending:
+            continue
+        added, pending = pending[:room], pending[room:]
+        payload = {"objectIds": [str(obj_id) for obj_id in group.get("objectIds", [])] + added}
+        response = meraki_api.put(f"{groups_url}/{group['id']}", headers=headers, json=payload)
+        if response.ok:
+            console.print(f"[cyan]✅ Added {len(added)} object(s) to group: {group['name']}[/cyan]")
+        else:
+            console.print(f"[red]❌ Failed to extend group {group['name']}: {response.text}[/red]")
+            pending = added + pending       # left for the next group / a new one
 
-        for idx, chunk in enumerate(group_chunks, 1):
-            group_name = f"{base_name}_Group_{idx}"
-            payload = {"name": group_name, "objectIds": chunk}
-            group_url = f"{base_url}/organizations/{org_id}/policyObjects/groups"
-            response = requests.post(group_url, headers=headers, json=payload)
+    first_idx = int(pattern.fullmatch(groups[-1]["name"]).group(1)) + 1 if groups else 1
+    group_chunks = [pending[i:i+max_per_group] for i in range(0, len(pending), max_per_group)]
 
-            if response.status_code == 201:
-                console.print(f"[cyan]✅ Created group: {group_name}[/cyan]")
-            else:
-                console.print(f"[red]❌ Failed to create group {group_name}: {response.text}[/red]")
+    for idx, chunk in enumerate(group_chunks, first_idx):
+        group_name = f"{base_name}_Group_{idx}"
+        payload = {"name": group_name, "objectIds": chunk}
+        response = meraki_api.post(groups_url, headers=headers, json=payload)
+
+        if response.status_code == 201:
+            console.print(f"[cyan]✅ Created group: {group_name}[/cyan]")
+        else:
+            console.print(f"[red]❌ Failed to create group {group_name}: {response.text}[/red]")
 
 # ---------------- Menu ---------------- #
 def policy_object_menu(base_url, headers, network_id, org_id):
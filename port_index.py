@@ -0,0 +1,357 @@
+"""Org-wide switch port index for VLAN, mode, LLDP neighbor and client MAC lookups.
+
+Built from the org-level ``switch/ports/bySwitch`` (config) and
+``switch/ports/statuses/bySwitch`` (status / LLDP / CDP) endpoints plus the
+clients of every switch network, instead of walking ``/devices/{serial}/switch/ports``
+switch by switch.  The index is pickled under ``output/port_index/`` and
+refreshed incrementally: port config only for switches changed since the
+last sync (``configurationUpdatedAfter``); statuses are re-read when older
+than ``STATUS_MAX_AGE``.  Clients (one call per network) are only fetched
+for MAC lookups, when older than ``CLIENT_MAX_AGE``, and then only for the
+time since the last fetch.
+
+Lookups are dictionary hits, except "which ports carry VLAN n", which also
+checks every trunk's allowed-VLAN ranges held as numpy interval arrays, so
+each query takes well under a millisecond on tens of thousands of ports.
+"""
+import pickle
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from rich.console import Console
+from rich.prompt import Prompt, Confirm
+from rich.table import Table
+
+import meraki_api
+import tracing
+
+console = Console()
+
+INDEX_DIR = Path(__file__).resolve().parent / "output" / "port_index"
+INDEX_VERSION = 1
+STATUS_MAX_AGE = 300
+CLIENT_MAX_AGE = 900
+CLIENT_TIMESPAN = 86400            # first client fetch: the last day
+SYNC_SKEW = 120                    # seconds of overlap between incremental config syncs
+RESULT_FIELDS = ["switch", "serial", "network", "port", "name", "type", "vlan", "allowed_vlans", "voice_vlan",
+                 "enabled", "status", "neighbor", "client_mac", "client_ip", "client"]
+
+
+def normalize_mac(mac):
+    digits = re.sub(r"[^0-9a-f]", "", str(mac).lower())
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2)) if len(digits) == 12 else str(mac).lower()
+
+
+def vlan_ranges(value):
+    """Allowed-VLAN text -> ``[(low, high)]``; 'all' is 1-4094."""
+    text = str(value or "").replace(" ", "").lower()
+    if text in ("", "none"):
+        return []
+    if text == "all":
+        return [(1, 4094)]
+    ranges = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        if low.isdigit() and (high.isdigit() or not high):
+            ranges.append((int(low), int(high or low)))
+    return ranges
+
+
+def _neighbor(status):
+    for proto in ("lldp", "cdp"):
+        info = status.get(proto) or {}
+        name = info.get("systemName") or info.get("deviceId")
+        if name:
+            return f"{name} ({info.get('portId', '')})".replace(" ()", "")
+    return ""
+
+
+RAW_STATE = ("org_id", "switches", "ports", "status", "clients", "config_synced", "status_synced", "clients_synced")
+
+
+class PortIndex:
+    def __init__(self, org_id):
+        self.org_id = str(org_id)
+        self.switches = {}         # serial -> {"name", "model", "network_id", "network_name"}
+        self.ports = {}            # (serial, port id) -> port config
+        self.status = {}           # (serial, port id) -> port status
+        self.clients = {}          # mac -> client (recentDeviceSerial / switchport / ip / vlan / description)
+        self.config_synced = None  # ISO time for the next configurationUpdatedAfter
+        self.status_synced = 0.0
+        self.clients_synced = {}   # network id -> epoch of the last client fetch
+        self._built = False
+
+    # ---------------- Persistence ---------------- #
+    @staticmethod
+    def path_for(org_id):
+        return INDEX_DIR / f"{org_id}-v{INDEX_VERSION}.pickle"
+
+    @classmethod
+    def load(cls, org_id):
+        """The saved index of an org (lookup tables are rebuilt on first query), or an empty one."""
+        index = cls(org_id)
+        try:
+            with open(cls.path_for(org_id), "rb") as f:
+                index.__dict__.update(pickle.load(f))
+        except (OSError, pickle.PickleError, EOFError):
+            pass
+        return index
+
+    def save(self):
+        path = self.path_for(self.org_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump({k: getattr(self, k) for k in RAW_STATE}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+
+    # ---------------- Refresh ---------------- #
+    def refresh(self, headers, full=False, clients=False, max_workers=meraki_api.MAX_WORKERS):
+        """Bring the index up to date; returns ``{"switches", "statuses", "client_networks"}`` fetched.
+
+        ``clients`` also refreshes the client MAC table.
+        """
+        budget = meraki_api.rate_budget(self.org_id)
+        started = datetime.now(timezone.utc) - timedelta(seconds=SYNC_SKEW)
+        if full:
+            self.__init__(self.org_id)
+        counts = {"switches": 0, "statuses": 0, "client_networks": 0}
+
+        with tracing.span("port index refresh", cat="fetch", org=self.org_id):
+            params = {"configurationUpdatedAfter": self.config_synced} if self.config_synced else None
+            changed = meraki_api.get_all_pages(f"/organizations/{self.org_id}/switch/ports/bySwitch",
+                                               headers=headers, params=params, budget=budget)
+            serials = {switch["serial"] for switch in changed}
+            if serials and self.ports:
+                self.ports = {k: v for k, v in self.ports.items() if k[0] not in serials}
+            for switch in changed:
+                network = switch.get("network") or {}
+                self.switches[switch["serial"]] = {
+                    "name": switch.get("name") or switch["serial"], "model": switch.get("model", ""),
+                    "network_id": network.get("id", ""), "network_name": network.get("name", "")}
+                for port in switch.get("ports", []):
+                    self.ports[(switch["serial"], port["portId"])] = port
+            counts["switches"] = len(changed)
+            self.config_synced = started.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+            if full or time.time() - self.status_synced > STATUS_MAX_AGE:
+                self.status = {}
+                for switch in meraki_api.get_all_pages(
+                        f"/organizations/{self.org_id}/switch/ports/statuses/bySwitch",
+                        headers=headers, budget=budget, items_key="items"):
+                    for status in switch.get("ports", []):
+                        self.status[(switch["serial"], status["portId"])] = status
+                    counts["statuses"] += 1
+                self.status_synced = time.time()
+
+            if clients:
+                counts["client_networks"] = self.refresh_clients(headers, budget, max_workers)
+        self._built = False
+        self.save()
+        return counts
+
+    def refresh_clients(self, headers, budget=None, max_workers=meraki_api.MAX_WORKERS):
+        """Fetch clients of the switch networks not fetched in the last ``CLIENT_MAX_AGE`` seconds."""
+        now = time.time()
+        budget = budget or meraki_api.rate_budget(self.org_id)
+        networks = {s["network_id"] for s in self.switches.values()
+                    if s["network_id"] and now - self.clients_synced.get(s["network_id"], 0) > CLIENT_MAX_AGE}
+
+        def fetch(net_id):
+            last = self.clients_synced.get(net_id)
+            timespan = CLIENT_TIMESPAN if last is None else int(min(max(now - last + SYNC_SKEW, 300), 2592000))
+            return meraki_api.get_all_pages(f"/networks/{net_id}/clients", headers=headers,
+                                            params={"timespan": timespan}, budget=budget)
+
+        fetched = 0
+        for net_id, clients, error in meraki_api.parallel_map(fetch, sorted(networks), max_workers=max_workers):
+            if error:
+                continue
+            for client in clients:
+                if client.get("mac") and client.get("switchport"):
+                    self.clients[normalize_mac(client["mac"])] = client
+            self.clients_synced[net_id] = now
+            fetched += 1
+        return fetched
+
+    # ---------------- Lookups ---------------- #
+    def _build(self):
+        import numpy as np
+
+        self.by_vlan, self.by_mode, self.by_allowed, self.by_neighbor = {}, {}, {}, {}
+        lo, hi, keys = [], [], []
+        for key, port in self.ports.items():
+            mode = str(port.get("type", "")).lower()
+            self.by_mode.setdefault(mode, []).append(key)
+            if port.get("vlan") is not None:
+                self.by_vlan.setdefault(int(port["vlan"]), []).append(key)
+            if port.get("voiceVlan") is not None:
+                self.by_vlan.setdefault(int(port["voiceVlan"]), []).append(key)
+            if mode == "trunk":
+                ranges = vlan_ranges(port.get("allowedVlans"))
+                self.by_allowed.setdefault(tuple(ranges), []).append(key)
+                for low, high in ranges:
+                    lo.append(low)
+                    hi.append(high)
+                    keys.append(key)
+        for key, status in self.status.items():
+            neighbor = _neighbor(status)
+            if neighbor:
+                self.by_neighbor.setdefault(neighbor.lower(), []).append(key)
+        self.trunk_lo = np.array(lo, dtype=np.int32)
+        self.trunk_hi = np.array(hi, dtype=np.int32)
+        self.trunk_keys = keys
+        self._built = True
+
+    def _ensure_built(self):
+        if not self._built:
+            self._build()
+
+    def carrying_vlan(self, vlan):
+        """Access / voice ports on ``vlan`` plus trunks whose native or allowed VLANs include it."""
+        import numpy as np
+
+        self._ensure_built()
+        found = dict.fromkeys(self.by_vlan.get(int(vlan), ()))
+        for i in np.nonzero((self.trunk_lo <= int(vlan)) & (self.trunk_hi >= int(vlan)))[0]:
+            found[self.trunk_keys[i]] = None
+        return list(found)
+
+    def with_allowed(self, spec):
+        """Trunks whose allowed-VLAN list is exactly ``spec`` (e.g. '1,10-20')."""
+        self._ensure_built()
+        return list(self.by_allowed.get(tuple(vlan_ranges(spec)), ()))
+
+    def with_mode(self, mode):
+        self._ensure_built()
+        return list(self.by_mode.get(str(mode).lower(), ()))
+
+    def with_neighbor(self, text):
+        """Ports whose LLDP / CDP neighbor name contains ``text``."""
+        self._ensure_built()
+        text = str(text).lower()
+        return [key for name, keys in self.by_neighbor.items() if text in name for key in keys]
+
+    def client(self, mac):
+        """``(port key, client)`` where a client MAC was last seen, or ``(None, None)``."""
+        client = self.clients.get(normalize_mac(mac))
+        if not client:
+            return None, None
+        return (client.get("recentDeviceSerial"), str(client.get("switchport"))), client
+
+    def rows(self, keys, client=None):
+        clients_by_port = {}
+        for c in ([client] if client else []):
+            clients_by_port[(c.get("recentDeviceSerial"), str(c.get("switchport")))] = c
+        rows = []
+        for key in keys:
+            serial, port_id = key
+            port = self.ports.get(key, {})
+            switch = self.switches.get(serial, {})
+            status = self.status.get(key, {})
+            c = clients_by_port.get(key, {})
+            rows.append({
+                "switch": switch.get("name", serial), "serial": serial, "network": switch.get("network_name", ""),
+                "port": port_id, "name": port.get("name") or "", "type": port.get("type", ""),
+                "vlan": port.get("vlan"), "allowed_vlans": port.get("allowedVlans", "") if port.get("type") == "trunk" else "",
+                "voice_vlan": port.get("voiceVlan"), "enabled": port.get("enabled"),
+                "status": status.get("status", ""), "neighbor": _neighbor(status),
+                "client_mac": c.get("mac", ""), "client_ip": c.get("ip", ""), "client": c.get("description") or "",
+            })
+        rows.sort(key=lambda r: (r["switch"], int(r["port"]) if str(r["port"]).isdigit() else 0, str(r["port"])))
+        return rows
+
+
+def lookup(index, kind, value):
+    """Run one query; returns ``(rows, milliseconds)`` (time of the lookup itself)."""
+    index._ensure_built()
+    start = time.perf_counter()
+    client = None
+    if kind == "vlan":
+        keys = index.carrying_vlan(int(value))
+    elif kind == "allowed":
+        keys = index.with_allowed(value)
+    elif kind == "mode":
+        keys = index.with_mode(value)
+    elif kind == "neighbor":
+        keys = index.with_neighbor(value)
+    elif kind == "mac":
+        key, client = index.client(value)
+        keys = [key] if key else []
+    else:
+        raise ValueError(f"Unknown lookup: {kind}")
+    elapsed = (time.perf_counter() - start) * 1000
+    return index.rows(keys, client), elapsed
+
+
+# ---------------- Menu ---------------- #
+LOOKUPS = {
+    "1": ("vlan", "VLAN ID"),
+    "2": ("allowed", "Allowed VLAN list (e.g. 1,10-20 or all)"),
+    "3": ("mode", "Port mode (access / trunk)"),
+    "4": ("neighbor", "LLDP / CDP neighbor name contains"),
+    "5": ("mac", "Client MAC address"),
+}
+
+
+def _show_rows(rows, title):
+    table = Table(title=title, show_header=True, header_style="bold magenta")
+    for col in ("Switch", "Port", "Name", "Type", "VLAN", "Allowed", "Voice", "Status", "Neighbor", "Client"):
+        table.add_column(col)
+    for row in rows[:100]:
+        client = " ".join(str(v) for v in (row["client_mac"], row["client_ip"], row["client"]) if v)
+        table.add_row(row["switch"], str(row["port"]), row["name"], row["type"], str(row["vlan"] or ""),
+                      row["allowed_vlans"], str(row["voice_vlan"] or ""), row["status"], row["neighbor"], client)
+    console.print(table)
+    if len(rows) > 100:
+        console.print(f"... {len(rows) - 100} more port(s); export to see all.", style="dim")
+
+
+def port_lookup_menu(network_id, headers):
+    org_id = meraki_api.get(f"/networks/{network_id}", headers=headers).json().get("organizationId")
+    index = PortIndex.load(org_id)
+    full = not index.ports or Confirm.ask("Rebuild the port index from scratch?", default=False)
+    try:
+        with console.status("📡 Refreshing the org-wide port index..."):
+            counts = index.refresh(headers, full=full)
+    except Exception as e:
+        if not index.ports:
+            console.print(f"❌ Could not build the port index: {e}", style="red")
+            return
+        console.print(f"⚠️ Refresh failed, using the saved index: {e}", style="yellow")
+    else:
+        console.print(f"✅ {len(index.ports)} ports on {len(index.switches)} switches, {len(index.clients)} clients "
+                      f"({counts['switches']} switch(es) re-read).", style="green")
+
+    while True:
+        console.print("\n🔎 [bold magenta]Port Lookup[/bold magenta]:")
+        for key, (_, label) in LOOKUPS.items():
+            console.print(f"{key}. {label.split(' (')[0]}")
+        console.print("6. ⬅️ Back")
+        choice = Prompt.ask("Look up by", choices=list(LOOKUPS) + ["6"], default="6")
+        if choice == "6":
+            break
+        kind, label = LOOKUPS[choice]
+        value = Prompt.ask(label).strip()
+        if kind == "mac":
+            try:
+                with console.status("📡 Refreshing clients of the switch networks..."):
+                    index.refresh_clients(headers)
+                index.save()
+            except Exception as e:
+                console.print(f"⚠️ Client refresh failed, using saved clients: {e}", style="yellow")
+        try:
+            rows, ms = lookup(index, kind, value)
+        except ValueError as e:
+            console.print(f"❌ {e}", style="red")
+            continue
+        if not rows:
+            console.print(f"⚠️ No ports match ({ms:.2f} ms).", style="yellow")
+            continue
+        _show_rows(rows, f"🔌 {len(rows)} port(s) for {kind} {value} ({ms:.2f} ms)")
+        if len(rows) > 10 and Confirm.ask("📤 Export these ports?", default=False):
+            from report_writer import export_rows, ask_export_formats
+            export_rows(rows, f"ports_{kind}", formats=ask_export_formats(), fieldnames=RESULT_FIELDS,
+                        total=len(rows))
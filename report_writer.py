@@ -0,0 +1,271 @@
+"""Streaming report writer shared by every CSV/Excel export in the tool.
+
+Rows are consumed one at a time from any iterable and written straight to
+each sink, so memory stays flat no matter how large the report is:
+
+* CSV       - csv.DictWriter
+* XLSX      - openpyxl write-only workbook (rows spill to a temp file)
+* Parquet   - pyarrow, written in row-group batches (optional dependency)
+* JSONL.GZ  - gzip-compressed JSON lines
+"""
+import csv
+import gzip
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from rich.console import Console
+from rich.prompt import Prompt
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+
+import tracing
+
+console = Console()
+OUTPUT_DIR = Path(__file__).resolve().parent / "output"
+
+DEFAULT_FORMATS = ("csv", "xlsx")
+SUPPORTED_FORMATS = ("csv", "xlsx", "parquet", "jsonl.gz")
+
+XLSX_MAX_ROWS = 1_048_575  # Excel sheet limit minus the header row
+PARQUET_BATCH_ROWS = 50_000
+PROGRESS_EVERY = 500
+
+
+# ---------------- Sinks ---------------- #
+class _CsvSink:
+    def __init__(self, path, fieldnames):
+        self._fh = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._fh, fieldnames=fieldnames, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, row):
+        self._writer.writerow(row)
+
+    def close(self):
+        self._fh.close()
+
+
+class _XlsxSink:
+    def __init__(self, path, fieldnames, sheet_name="Report"):
+        from openpyxl import Workbook
+
+        self._path = path
+        self._fieldnames = fieldnames
+        self._sheet_name = sheet_name
+        self._wb = Workbook(write_only=True)
+        self._sheet_index = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self._sheet_index += 1
+        title = self._sheet_name if self._sheet_index == 1 else f"{self._sheet_name}_{self._sheet_index}"
+        self._ws = self._wb.create_sheet(title=title[:31])
+        self._ws.append(self._fieldnames)
+        self._rows = 0
+
+    def write(self, row):
+        if self._rows >= XLSX_MAX_ROWS:
+            self._new_sheet()
+        self._ws.append([_cell_value(row.get(f)) for f in self._fieldnames])
+        self._rows += 1
+
+    def close(self):
+        self._wb.save(self._path)
+
+
+class _ParquetSink:
+    def __init__(self, path, fieldnames):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export requires 'pyarrow' (pip install pyarrow)") from e
+
+        self._pa = pa
+        self._schema = pa.schema([(f, pa.string()) for f in fieldnames])
+        self._writer = pq.ParquetWriter(str(path), self._schema, compression="zstd")
+        self._fieldnames = fieldnames
+        self._batch = {f: [] for f in fieldnames}
+        self._pending = 0
+
+    def write(self, row):
+        for f in self._fieldnames:
+            value = row.get(f)
+            self._batch[f].append(None if value is None else str(value))
+        self._pending += 1
+        if self._pending >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            table = self._pa.Table.from_pydict(self._batch, schema=self._schema)
+            self._writer.write_table(table)
+            self._batch = {f: [] for f in self._fieldnames}
+            self._pending = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+class _JsonlGzSink:
+    def __init__(self, path, fieldnames):
+        self._fh = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+
+    def write(self, row):
+        self._fh.write(json.dumps(row, default=str))
+        self._fh.write("\n")
+
+    def close(self):
+        self._fh.close()
+
+
+_SINKS = {
+    "csv": _CsvSink,
+    "xlsx": _XlsxSink,
+    "parquet": _ParquetSink,
+    "jsonl.gz": _JsonlGzSink,
+}
+
+
+def _cell_value(value):
+    if value is None or isinstance(value, (str, int, float, bool, datetime)):
+        return value
+    return str(value)
+
+
+# ---------------- Writer ---------------- #
+def parse_formats(text):
+    formats = []
+    for part in (text or "").split(","):
+        fmt = part.strip().lower().lstrip(".")
+        if fmt == "jsonl":
+            fmt = "jsonl.gz"
+        if fmt and fmt not in formats:
+            if fmt not in SUPPORTED_FORMATS:
+                raise ValueError(f"Unsupported export format '{fmt}'. Choose from: {', '.join(SUPPORTED_FORMATS)}")
+            formats.append(fmt)
+    return tuple(formats) or DEFAULT_FORMATS
+
+
+def ask_export_formats(default=DEFAULT_FORMATS):
+    while True:
+        answer = Prompt.ask(f"🗂️  Export formats ({', '.join(SUPPORTED_FORMATS)})", default=",".join(default))
+        try:
+            return parse_formats(answer)
+        except ValueError as e:
+            console.print(f"[red]❌ {e}[/red]")
+
+
+def report_paths(basename, formats, output_dir=None, timestamp=True):
+    output_dir = Path(output_dir or OUTPUT_DIR)
+    if timestamp:
+        basename = f"{basename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    return {fmt: output_dir / f"{basename}.{fmt}" for fmt in formats}
+
+
+@tracing.traced(cat="export")
+def write_report(rows, basename, formats=DEFAULT_FORMATS, fieldnames=None, output_dir=None,
+                 timestamp=True, on_progress=None):
+    """Stream ``rows`` (an iterable of dicts) into every requested format.
+
+    Column order comes from ``fieldnames`` or, if omitted, the keys of the
+    first row. Returns a ``{format: path}`` mapping of the written files.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return {}
+    fieldnames = list(fieldnames or first.keys())
+
+    paths = report_paths(basename, formats, output_dir, timestamp)
+    next(iter(paths.values())).parent.mkdir(parents=True, exist_ok=True)
+
+    sinks = []
+    try:
+        for fmt, path in paths.items():
+            sinks.append(_SINKS[fmt](path, fieldnames))
+
+        count = 0
+        for row in _chain_first(first, rows):
+            for sink in sinks:
+                sink.write(row)
+            count += 1
+            if on_progress and count % PROGRESS_EVERY == 0:
+                on_progress(count)
+        if on_progress:
+            on_progress(count)
+    finally:
+        for sink in sinks:
+            sink.close()
+    return paths
+
+
+def _chain_first(first, rest):
+    yield first
+    yield from rest
+
+
+# ---------------- Background export ---------------- #
+class ExportJob:
+    """Runs :func:`write_report` on a worker thread and tracks its progress."""
+
+    def __init__(self, rows, basename, formats=DEFAULT_FORMATS, fieldnames=None, total=None,
+                 output_dir=None, timestamp=True):
+        self.basename = basename
+        self.formats = tuple(formats)
+        self.total = total
+        self.written = 0
+        self.paths = {}
+        self.error = None
+        self._kwargs = dict(rows=rows, basename=basename, formats=self.formats, fieldnames=fieldnames,
+                            output_dir=output_dir, timestamp=timestamp)
+        self._thread = threading.Thread(target=self._run, name=f"export-{basename}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.paths = write_report(on_progress=self._on_progress, **self._kwargs)
+        except Exception as e:
+            self.error = e
+
+    def _on_progress(self, count):
+        self.written = count
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def wait(self, show_progress=True):
+        """Block until the export finishes; re-raises any writer error."""
+        if show_progress:
+            columns = [SpinnerColumn(), TextColumn("[bold blue]{task.description}"),
+                       TextColumn("{task.completed:,} rows")]
+            if self.total:
+                columns.insert(2, BarColumn())
+            columns.append(TimeElapsedColumn())
+            with Progress(*columns, console=console, transient=True) as progress:
+                task = progress.add_task(f"💾 Exporting {', '.join(self.formats)}", total=self.total)
+                while self._thread.is_alive():
+                    progress.update(task, completed=self.written)
+                    time.sleep(0.1)
+                progress.update(task, completed=self.written)
+        self._thread.join()
+        if self.error:
+            raise self.error
+        return self.paths
+
+
+def export_rows(rows, basename, formats=DEFAULT_FORMATS, fieldnames=None, total=None,
+                output_dir=None, timestamp=True, show_progress=True):
+    """Export rows on a background thread, show progress, and report the written files."""
+    job = ExportJob(rows, basename, formats=formats, fieldnames=fieldnames, total=total,
+                    output_dir=output_dir, timestamp=timestamp).start()
+    paths = job.wait(show_progress=show_progress)
+    for path in paths.values():
+        console.print(f"📁 [green]Exported to:[/green] {path}")
+    return paths
@@ -0,0 +1,266 @@
+"""Declarative SSIDs (``data/ssids.yaml``) rolled out to many networks at once.
+
+Each SSID in the file is a number plus the Dashboard fields to enforce;
+fields left out are not touched.  Secrets are never written in the file:
+a PSK or RADIUS secret is a reference, ``{vault_secret: NAME}`` (Azure Key
+Vault, vault name from the file's ``vault:`` key or ``--vault``) or
+``{env: VAR}``, resolved once per run.  WPA3 SSIDs get 802.11w enabled
+unless the file says otherwise, as in the interactive SSID setup.
+
+Per network there is one GET of all SSIDs; every SSID is compared with its
+desired state and only differing fields are PUT, in parallel across
+networks under the org's rate budget.  Fields the API has to receive
+together (auth / encryption / secrets, IP mode / VLAN tagging) are sent as
+a group when one of them changes.  Secrets the API does not return (RADIUS
+secrets) cannot be compared and never cause a push on their own.
+"""
+import os
+from pathlib import Path
+
+import yaml
+from rich.console import Console
+from rich.prompt import Prompt, Confirm
+from rich.table import Table
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+
+import bulk_input
+import dry_run
+import meraki_api
+import tracing
+from config_snapshot import SECRET_FIELDS
+from wireless_config import WPA3_MODES
+
+console = Console()
+
+SSID_FILE = Path(__file__).resolve().parent / "data" / "ssids.yaml"
+SECRET_REFS = ("vault_secret", "env")
+FIELD_GROUPS = (
+    {"authMode", "encryptionMode", "wpaEncryptionMode", "psk", "dot11w", "radiusServers",
+     "radiusAccountingEnabled", "radiusAccountingServers"},
+    {"ipAssignmentMode", "useVlanTagging", "defaultVlanId", "vlanId"},
+)
+RESULT_FIELDS = ["network_id", "network", "number", "ssid", "status", "changed", "error"]
+
+
+# ---------------- Secrets ---------------- #
+def is_secret_ref(value):
+    return isinstance(value, dict) and len(value) == 1 and next(iter(value)) in SECRET_REFS
+
+
+def literal_secrets(value, path=""):
+    """Paths of secret fields in ``value`` holding a literal instead of a reference."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            here = f"{path}.{key}" if path else str(key)
+            if key in SECRET_FIELDS and item is not None and not is_secret_ref(item):
+                yield here
+            elif not is_secret_ref(item):
+                yield from literal_secrets(item, here)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from literal_secrets(item, f"{path}[{i}]")
+
+
+def secret_fetcher(vault=None):
+    """``fetch(ref) -> value`` for secret references; each secret is read once."""
+    cache, client = {}, []
+
+    def fetch(ref):
+        kind, name = next(iter(ref.items()))
+        if (kind, name) in cache:
+            return cache[(kind, name)]
+        if kind == "env":
+            value = os.environ.get(name)
+            if not value:
+                raise ValueError(f"environment variable {name} is not set")
+        else:
+            if not vault:
+                raise ValueError(f"secret {name!r} needs a Key Vault: set 'vault:' in the SSID file or pass --vault")
+            if not client:
+                from azure.identity import DefaultAzureCredential
+                from azure.keyvault.secrets import SecretClient
+
+                client.append(SecretClient(vault_url=f"https://{vault}.vault.azure.net",
+                                           credential=DefaultAzureCredential()))
+            value = client[0].get_secret(name).value
+        cache[(kind, name)] = value
+        return value
+    return fetch
+
+
+def _resolve(value, fetch):
+    if is_secret_ref(value):
+        return fetch(value)
+    if isinstance(value, dict):
+        return {k: _resolve(v, fetch) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, fetch) for v in value]
+    return value
+
+
+# ---------------- Desired state ---------------- #
+def file_vault(path):
+    """The ``vault:`` key of an SSID file (None if absent)."""
+    with open(path, "rb") as f:
+        document = yaml.load(f, Loader=bulk_input.Loader)
+    return document.get("vault") if isinstance(document, dict) else None
+
+
+def compile_ssids(records, fetch):
+    """``{number: payload}`` with secrets resolved and 802.11w set for WPA3."""
+    payloads = {}
+    for record in records:
+        payload = _resolve({k: v for k, v in record.items() if k != "number"}, fetch)
+        if payload.get("wpaEncryptionMode") in WPA3_MODES and "dot11w" not in payload:
+            payload["dot11w"] = {"enabled": True, "required": False}
+        payloads[int(record["number"])] = payload
+    return payloads
+
+
+def load_ssids(path=SSID_FILE, vault=None):
+    """Validated, compiled SSIDs of ``path`` (see :func:`compile_ssids`)."""
+    records = bulk_input.load_records(path, "ssids")
+    return compile_ssids(records, secret_fetcher(vault or file_vault(path)))
+
+
+# ---------------- Diff ---------------- #
+def _same(current, desired):
+    if isinstance(desired, dict):
+        return isinstance(current, dict) and all(
+            _same(current.get(k), v) for k, v in desired.items() if k not in SECRET_FIELDS or k in current)
+    if isinstance(desired, list):
+        return (isinstance(current, list) and len(current) == len(desired)
+                and all(_same(c, d) for c, d in zip(current, desired)))
+    return current == desired or str(current) == str(desired)
+
+
+def changed_fields(current, desired):
+    """Top-level fields of ``desired`` that differ from ``current`` (unreadable secrets are skipped)."""
+    current = current or {}
+    return [k for k, v in desired.items()
+            if (k not in SECRET_FIELDS or k in current) and not _same(current.get(k), v)]
+
+
+def update_payload(desired, changed):
+    """The changed fields plus the rest of any field group they belong to."""
+    keys = set(changed)
+    for group in FIELD_GROUPS:
+        if keys & group:
+            keys |= group
+    return {k: v for k, v in desired.items() if k in keys}
+
+
+# ---------------- Deployment ---------------- #
+def deploy_network(headers, network_id, payloads, budget=None):
+    """Bring one network's SSIDs to ``payloads``; returns ``[{number, ssid, status, changed, error}]``."""
+    response = meraki_api.get(f"/networks/{network_id}/wireless/ssids", headers=headers, budget=budget)
+    response.raise_for_status()
+    current = {int(s["number"]): s for s in response.json()}
+    results = []
+    for number, desired in sorted(payloads.items()):
+        changed = changed_fields(current.get(number), desired)
+        result = {"number": number, "ssid": desired.get("name") or current.get(number, {}).get("name", ""),
+                  "status": "compliant", "changed": ", ".join(changed), "error": ""}
+        if changed:
+            response = meraki_api.put(f"/networks/{network_id}/wireless/ssids/{number}", headers=headers,
+                                      json=update_payload(desired, changed), budget=budget)
+            if not response.ok:
+                result.update(status="failed", error=f"{response.status_code} {response.text[:200]}")
+            else:
+                result["status"] = "planned" if dry_run.enabled else "updated"
+        results.append(result)
+    return results
+
+
+def deploy(headers, networks, payloads, org_id=None, max_workers=meraki_api.MAX_WORKERS, on_network=None):
+    """Deploy ``payloads`` to ``networks`` in parallel; returns rows (see ``RESULT_FIELDS``)."""
+    budget = meraki_api.rate_budget(str(org_id)) if org_id else None
+    rows = []
+
+    def run(network):
+        with tracing.span("deploy ssids", cat="write", network=network["id"]):
+            return deploy_network(headers, network["id"], payloads, budget)
+
+    for network, results, error in meraki_api.parallel_map(run, networks, max_workers=max_workers):
+        base = {"network_id": network["id"], "network": network.get("name", network["id"])}
+        if error:
+            results = [{"number": number, "ssid": payload.get("name", ""), "status": "failed", "changed": "",
+                        "error": str(error)} for number, payload in sorted(payloads.items())]
+        rows.extend({**base, **result} for result in results)
+        if on_network:
+            on_network(network)
+    return rows
+
+
+def compliance_summary(rows):
+    """``{(number, ssid): {status: count}}`` plus the number of networks without a failure."""
+    by_ssid = {}
+    failed_networks = set()
+    for row in rows:
+        counts = by_ssid.setdefault((row["number"], row["ssid"]), {})
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+        if row["status"] == "failed":
+            failed_networks.add(row["network_id"])
+    networks = {row["network_id"] for row in rows}
+    return by_ssid, len(networks - failed_networks), len(networks)
+
+
+def show_summary(rows):
+    by_ssid, ok, total = compliance_summary(rows)
+    table = Table(title="📶 SSID compliance", show_header=True, header_style="bold magenta")
+    for col in ("#", "SSID", "Already compliant", "Updated", "Failed"):
+        table.add_column(col)
+    for (number, ssid), counts in sorted(by_ssid.items()):
+        table.add_row(str(number), ssid, str(counts.get("compliant", 0)),
+                      str(counts.get("updated", 0) + counts.get("planned", 0)),
+                      f"[red]{counts['failed']}[/red]" if counts.get("failed") else "0")
+    console.print(table)
+    style = "green" if ok == total else "yellow"
+    console.print(f"📋 {ok}/{total} network(s) compliant with every SSID in the file.", style=f"bold {style}")
+    for row in rows:
+        if row["status"] == "failed":
+            console.print(f"❌ {row['network']} SSID {row['number']}: {row['error']}", style="red")
+
+
+# ---------------- Menu ---------------- #
+def ssid_deploy_menu(network_id, headers):
+    from report_writer import export_rows, ask_export_formats
+
+    path = Prompt.ask("SSID file", default=str(SSID_FILE))
+    try:
+        payloads = load_ssids(path, vault=file_vault(path) or Prompt.ask("Azure Key Vault name (blank: none)",
+                                                                         default="") or None)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        console.print(f"❌ {e}", style="red")
+        return
+    except Exception as e:       # Key Vault / credential errors
+        console.print(f"❌ Could not read secrets: {e}", style="red")
+        return
+    if not payloads:
+        console.print(f"⚠️ No SSIDs in {path}.", style="yellow")
+        return
+    console.print("SSIDs: " + ", ".join(f"{n} ({p.get('name', '')})" for n, p in sorted(payloads.items())))
+
+    network = meraki_api.get(f"/networks/{network_id}", headers=headers).json()
+    org_id = network.get("organizationId")
+    scope = Prompt.ask("Deploy to [1] this network, [2] networks with a tag, [3] listed network IDs",
+                       choices=["1", "2", "3"], default="1")
+    if scope == "1":
+        networks = [network]
+    elif scope == "2":
+        tag = Prompt.ask("Network tag").strip()
+        networks = [n for n in meraki_api.get_all_pages(f"/organizations/{org_id}/networks", headers=headers)
+                    if tag in (n.get("tags") or []) and "wireless" in n.get("productTypes", [])]
+    else:
+        networks = [{"id": i.strip(), "name": i.strip()} for i in Prompt.ask("Network IDs (comma-separated)").split(",")
+                    if i.strip()]
+    if not networks or not Confirm.ask(f"Deploy {len(payloads)} SSID(s) to {len(networks)} network(s)?", default=True):
+        return
+
+    with Progress(SpinnerColumn(), TextColumn("[bold blue]{task.description}"), BarColumn(),
+                  TextColumn("{task.completed}/{task.total}"), TimeElapsedColumn(), console=console) as progress:
+        task = progress.add_task("Networks", total=len(networks))
+        rows = deploy(headers, networks, payloads, org_id=org_id, on_network=lambda n: progress.advance(task))
+    show_summary(rows)
+    if Confirm.ask("📤 Export the per-network results?", default=len(networks) > 1):
+        export_rows(rows, "ssid_deployment", formats=ask_export_formats(), fieldnames=RESULT_FIELDS, total=len(rows))
@@ -1,14 +1,18 @@
 ﻿from rich.console import Console
 from rich.prompt import Prompt
-import requests
+import meraki_api
 
-BASE_URL = "https://api.meraki.com/api/v1"
+BASE_URL = meraki_api.BASE_URL
 console = Console()
 
+# Returned by GET .../switch/ports but rejected (or ignored) on update.
+READ_ONLY_PORT_FIELDS = {"portId", "linkNegotiationCapabilities", "mirror", "module", "schedule",
+                         "stackwiseVirtual", "profile", "dot3az"}
+
 
 def rename_switches(network_id, headers):
     url = f"{BASE_URL}/networks/{network_id}/devices"
-    devices = requests.get(url, headers=headers).json()
+    devices = meraki_api.get(url, headers=headers).json()
     switches = [d for d in devices if d.get("model", "").startswith("MS")]
 
     for switch in switches:
@@ -17,53 +21,115 @@ def rename_switches(network_id, headers):
         if Prompt.ask("Rename this switch?", choices=["yes", "no"], default="no") == "yes":
             new_name = Prompt.ask("Enter new name")
             url = f"{BASE_URL}/devices/{serial}"
-            response = requests.put(url, headers=headers, json={"name": new_name})
+            response = meraki_api.put(url, headers=headers, json={"name": new_name})
             if response.status_code == 200:
                 console.print(f"? Renamed {serial} to '{new_name}'", style="green")
 
 
-def expand_port_list(port_input):
-    ports = []
+def parse_port_spec(port_input):
+    """'1-3,5' -> frozenset({'1', '2', '3', '5'}); parse once, then test membership."""
+    ports = set()
     for part in port_input.split(","):
-        if "-" in part:
-            start, end = map(int, part.strip().split("-"))
-            ports.extend([str(i) for i in range(start, end + 1)])
-        elif part.strip().isdigit():
-            ports.append(part.strip())
-    return ports
-
-
-def apply_port_config(serial, headers, config):
-    ports_url = f"{BASE_URL}/devices/{serial}/switch/ports"
-    current_ports = requests.get(ports_url, headers=headers).json()
-
-    for port in current_ports:
-        port_id = port['portId']
-        if port_id in config.get("access", {}):
-            vlan = config["access"][port_id]
-            payload = {**port, "portMode": "access", "vlan": vlan, "type": "access"}
-        elif port_id in config.get("trunk", {}):
-            trunk_cfg = config["trunk"][port_id]
-            payload = {
-                **port,
-                "portMode": "trunk",
-                "vlan": trunk_cfg["native"],
-                "nativeVlan": trunk_cfg["native"],
-                "allowedVlans": trunk_cfg["allowed"],
-                "type": "trunk"
-            }
+        part = part.strip()
+        start, _, end = part.partition("-")
+        if start.strip().isdigit() and end.strip().isdigit():
+            ports.update(str(i) for i in range(int(start), int(end) + 1))
+        elif part.isdigit():
+            ports.add(part)
+    return frozenset(ports)
+
+
+def expand_port_list(port_input):
+    return sorted(parse_port_spec(port_input), key=int)
+
+
+def _vlan_list(value):
+    """'1, 3-5' -> {1, 3, 4, 5}; anything else ('all', None) is compared as text."""
+    text = str(value).replace(" ", "").lower()
+    try:
+        vlans = set()
+        for part in text.split(","):
+            start, _, end = part.partition("-")
+            vlans.update(range(int(start), int(end or start) + 1))
+        return vlans
+    except ValueError:
+        return text
+
+
+def desired_port_state(port_id, config):
+    """Requested fields for one port from an ``{"access": ..., "trunk": ...}`` config (None if untouched)."""
+    if port_id in config.get("access", {}):
+        return {"type": "access", "vlan": int(config["access"][port_id])}
+    if port_id in config.get("trunk", {}):
+        trunk_cfg = config["trunk"][port_id]
+        return {"type": "trunk", "vlan": int(trunk_cfg["native"]), "allowedVlans": trunk_cfg["allowed"]}
+    return None
+
+
+def port_changes(port, desired):
+    """Only the writable fields of ``desired`` that differ from the port's current config."""
+    changes = {}
+    for field, value in desired.items():
+        if field in READ_ONLY_PORT_FIELDS:
+            continue
+        current = port.get(field)
+        if field == "allowedVlans":
+            same = _vlan_list(current) == _vlan_list(value)
+        elif field in ("vlan", "voiceVlan"):
+            same = str(current) == str(value)
         else:
+            same = current == value
+        if not same:
+            changes[field] = value
+    return changes
+
+
+def plan_ports(ports, desired_by_port):
+    """``(port_id, changes)`` for every port in ``desired_by_port`` that is not already compliant."""
+    plan = []
+    for port in ports:
+        desired = desired_by_port.get(port["portId"])
+        if desired is None:
             continue
+        changes = port_changes(port, desired)
+        if changes:
+            plan.append((port["portId"], changes))
+    return plan
 
+
+def plan_port_updates(ports, config):
+    desired = {port["portId"]: desired_port_state(port["portId"], config) for port in ports}
+    return plan_ports(ports, {k: v for k, v in desired.items() if v is not None})
+
+
+def apply_port_config(serial, headers, config, ports=None):
+    """Bring the switch's ports to ``config``, sending only changed fields; returns ``(updated, unchanged, failed)``."""
+    if ports is None:
+        ports_url = f"{BASE_URL}/devices/{serial}/switch/ports"
+        ports = meraki_api.get(ports_url, headers=headers).json()
+
+    targeted = sum(1 for port in ports if desired_port_state(port["portId"], config) is not None)
+    plan = plan_port_updates(ports, config)
+    updated = failed = 0
+    for port_id, changes in plan:
         update_url = f"{BASE_URL}/devices/{serial}/switch/ports/{port_id}"
-        r = requests.put(update_url, headers=headers, json=payload)
-        msg = f"? Port {port_id} updated" if r.status_code == 200 else f"? Failed: {r.text}"
-        console.print(msg, style="green" if r.status_code == 200 else "red")
+        r = meraki_api.put(update_url, headers=headers, json=changes)
+        if r.status_code == 200:
+            updated += 1
+            fields = ", ".join(f"{k}={v}" for k, v in changes.items())
+            console.print(f"✅ Port {port_id} updated ({fields})", style="green")
+        else:
+            failed += 1
+            console.print(f"❌ Port {port_id} failed: {r.text}", style="red")
+    unchanged = targeted - len(plan)
+    if unchanged:
+        console.print(f"⏭️ {unchanged} port(s) already compliant, skipped.", style="cyan")
+    return updated, unchanged, failed
 
 
 def configure_ports(network_id, headers):
     url = f"{BASE_URL}/networks/{network_id}/devices"
-    devices = requests.get(url, headers=headers).json()
+    devices = meraki_api.get(url, headers=headers).json()
     switches = [d for d in devices if d.get("model", "").startswith("MS")]
 
     configured = False
@@ -84,40 +150,28 @@ def configure_ports(network_id, headers):
             continue
 
         ports_url = f"{BASE_URL}/devices/{serial}/switch/ports"
-        ports = requests.get(ports_url, headers=headers).json()
+        ports = meraki_api.get(ports_url, headers=headers).json()
+        port_ids = {port['portId'] for port in ports}
 
         config_map = {"access": {}, "trunk": {}}
 
         access_ports = Prompt.ask("Access port numbers (e.g. 1-3,5)", default="").strip()
         if access_ports:
             vlan_id = int(Prompt.ask("VLAN ID for access ports"))
-            for port in ports:
-                if port['portId'] in expand_port_list(access_ports):
-                    update_url = f"{BASE_URL}/devices/{serial}/switch/ports/{port['portId']}"
-                    payload = {**port, "portMode": "access", "vlan": vlan_id, "type": "access"}
-                    r = requests.put(update_url, headers=headers, json=payload)
-                    console.print(f"?? Port {port['portId']} -> Access VLAN {vlan_id}" if r.status_code == 200 else f"? Failed: {r.text}", style="green" if r.status_code == 200 else "red")
-                    config_map["access"][port['portId']] = vlan_id
+            for port_id in expand_port_list(access_ports):
+                if port_id in port_ids:
+                    config_map["access"][port_id] = vlan_id
 
         trunk_ports = Prompt.ask("Trunk port numbers (e.g. 2-4,8)", default="").strip()
         if trunk_ports:
             native_vlan = int(Prompt.ask("Native VLAN"))
             allowed_vlans = Prompt.ask("Allowed VLANs (e.g. 1,10-20)").strip()
-            for port in ports:
-                if port['portId'] in expand_port_list(trunk_ports):
-                    update_url = f"{BASE_URL}/devices/{serial}/switch/ports/{port['portId']}"
-                    payload = {
-                        **port,
-                        "portMode": "trunk",
-                        "vlan": native_vlan,
-                        "nativeVlan": native_vlan,
-                        "allowedVlans": allowed_vlans,
-                        "type": "trunk"
-                    }
-                    r = requests.put(update_url, headers=headers, json=payload)
-                    console.print(f"?? Port {port['portId']} -> Trunk VLAN {native_vlan}" if r.status_code == 200 else f"? Failed: {r.text}", style="green" if r.status_code == 200 else "red")
-                    config_map["trunk"][port['portId']] = {"native": native_vlan, "allowed": allowed_vlans}
+            for port_id in expand_port_list(trunk_ports):
+                if port_id in port_ids:
+                    config_map["access"].pop(port_id, None)
+                    config_map["trunk"][port_id] = {"native": native_vlan, "allowed": allowed_vlans}
 
+        apply_port_config(serial, headers, config_map, ports=ports)
         saved_config = config_map
         configured = True
 
@@ -127,11 +181,19 @@ def switch_config_menu(network_id, headers):
         console.print("\n📶 [bold magenta]Switch Configuration[/bold magenta]:")
         console.print("1. 📡 Rename Switches")
         console.print("2. 🔐 Configure Switch Ports")
-        console.print("3. ⬅️ Back to Main Menu")
-        choice = Prompt.ask("Select an option", choices=["1", "2", "3"], default="3")
+        console.print("3. 🧩 Provision Ports from a Profile (many switches in parallel)")
+        console.print("4. 🔎 Port Lookup (org-wide: VLAN, mode, LLDP neighbor, client MAC)")
+        console.print("5. ⬅️ Back to Main Menu")
+        choice = Prompt.ask("Select an option", choices=["1", "2", "3", "4", "5"], default="5")
         if choice == "1":
             rename_switches(network_id, headers)
         elif choice == "2":
             configure_ports(network_id, headers)
         elif choice == "3":
+            from switch_provisioning import provisioning_menu
+            provisioning_menu(network_id, headers)
+        elif choice == "4":
+            from port_index import port_lookup_menu
+            port_lookup_menu(network_id, headers)
+        elif choice == "5":
             break
@@ -0,0 +1,221 @@
+"""Provision switch ports from a named profile on many switches at once.
+
+A profile (``data/port_profiles.yaml``) is a list of port-range entries;
+each entry's port spec is parsed once into a set and the whole profile is
+compiled into one ``port ID -> desired fields`` table (later entries win).
+Switches, and every member of the selected stacks, then run concurrently
+through ``meraki_api`` under the org's rate budget: one GET of the ports
+per switch and one PUT per port that is not already compliant, carrying
+only the changed fields.
+"""
+import threading
+from pathlib import Path
+
+from rich.console import Console
+from rich.prompt import Prompt, Confirm
+from rich.table import Table
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+
+import bulk_input
+import meraki_api
+import tracing
+from switch_config import parse_port_spec, plan_ports
+
+console = Console()
+
+PROFILE_FILE = Path(__file__).resolve().parent / "data" / "port_profiles.yaml"
+RESULT_FIELDS = ["serial", "name", "targeted", "updated", "unchanged", "failed", "error"]
+
+
+# ---------------- Profiles ---------------- #
+def load_profiles(path=PROFILE_FILE):
+    """``{profile name: [entry, ...]}`` from a validated profile file."""
+    profiles = {}
+    for entry in bulk_input.load_records(path, "port_profiles"):
+        profiles.setdefault(str(entry["profile"]), []).append(entry)
+    return profiles
+
+
+def _entry_fields(entry):
+    if str(entry["type"]).lower() == "trunk":
+        fields = {"type": "trunk", "vlan": entry["vlan"], "allowedVlans": entry.get("allowed") or "all"}
+    else:
+        fields = {"type": "access", "vlan": entry["vlan"]}
+        if entry.get("voice_vlan") is not None:
+            fields["voiceVlan"] = entry["voice_vlan"]
+    if entry.get("name"):
+        fields["name"] = entry["name"]
+    return fields
+
+
+def compile_profile(entries):
+    """One ``port ID -> desired fields`` table for a profile's entries."""
+    table = {}
+    for entry in entries:
+        fields = _entry_fields(entry)
+        for port_id in parse_port_spec(str(entry["ports"])):
+            table[port_id] = dict(fields)
+    return table
+
+
+# ---------------- Targets ---------------- #
+def get_switches(headers, network_id):
+    devices = meraki_api.get(f"/networks/{network_id}/devices", headers=headers).json()
+    return [d for d in devices if d.get("model", "").startswith("MS")]
+
+
+def get_stacks(headers, network_id):
+    response = meraki_api.get(f"/networks/{network_id}/switch/stacks", headers=headers)
+    return response.json() if response.ok else []
+
+
+def select_switches(switches, stacks, selection):
+    """Pick by 'all', 1-based numbers / ranges, serials, names, or stack names (all members)."""
+    selection = (selection or "").strip()
+    if not selection or selection.lower() == "all":
+        return list(switches)
+    by_serial = {s["serial"]: s for s in switches}
+    picked = []
+    for token in (t.strip() for t in selection.split(",")):
+        if not token:
+            continue
+        start, _, end = token.partition("-")
+        if start.isdigit() and (end.isdigit() or not end):
+            picked.extend(switches[i - 1] for i in range(int(start), int(end or start) + 1)
+                          if 1 <= i <= len(switches))
+            continue
+        for stack in stacks:
+            if stack.get("name", "").lower() == token.lower() or stack.get("id") == token:
+                picked.extend(by_serial[s] for s in stack.get("serials", []) if s in by_serial)
+        picked.extend(s for s in switches if token in (s["serial"], s.get("name")))
+    seen = set()
+    return [s for s in picked if not (s["serial"] in seen or seen.add(s["serial"]))]
+
+
+# ---------------- Provisioning ---------------- #
+def provision_switch(headers, serial, table, budget=None, on_planned=None, on_port=None):
+    """Apply a compiled profile to one switch; returns ``{targeted, updated, unchanged, failed, errors}``."""
+    response = meraki_api.get(f"/devices/{serial}/switch/ports", headers=headers, budget=budget)
+    response.raise_for_status()
+    ports = response.json()
+    targeted = sum(1 for port in ports if port["portId"] in table)
+    plan = plan_ports(ports, table)
+    if on_planned:
+        on_planned(len(plan))
+    result = {"targeted": targeted, "updated": 0, "unchanged": targeted - len(plan), "failed": 0, "errors": []}
+    for port_id, changes in plan:
+        response = meraki_api.put(f"/devices/{serial}/switch/ports/{port_id}", headers=headers, json=changes,
+                                  budget=budget)
+        if response.ok:
+            result["updated"] += 1
+        else:
+            result["failed"] += 1
+            result["errors"].append(f"port {port_id}: {response.status_code} {response.text[:120]}")
+        if on_port:
+            on_port()
+    return result
+
+
+def provision(headers, switches, table, org_id=None, max_workers=meraki_api.MAX_WORKERS, on_planned=None,
+              on_port=None, on_result=None):
+    """Provision ``switches`` in parallel; returns result rows (see ``RESULT_FIELDS``).
+
+    ``on_planned(writes)`` fires once a switch knows how many ports it will
+    update, ``on_port()`` after each port write and ``on_result(switch, row)``
+    when a switch is done.
+    """
+    budget = meraki_api.rate_budget(str(org_id)) if org_id else None
+    rows = []
+
+    def run(switch):
+        with tracing.span("provision switch", cat="write", serial=switch["serial"]):
+            return provision_switch(headers, switch["serial"], table, budget, on_planned, on_port)
+
+    for switch, result, error in meraki_api.parallel_map(run, switches, max_workers=max_workers):
+        row = {"serial": switch["serial"], "name": switch.get("name") or switch["serial"]}
+        if error:
+            row.update(targeted=0, updated=0, unchanged=0, failed=0, error=str(error))
+        else:
+            row.update({k: result[k] for k in ("targeted", "updated", "unchanged", "failed")},
+                       error="; ".join(result["errors"]))
+        rows.append(row)
+        if on_result:
+            on_result(switch, row)
+    return rows
+
+
+# ---------------- Menu ---------------- #
+def _show_profile(name, table):
+    by_fields = {}
+    for port_id, fields in table.items():
+        by_fields.setdefault(tuple(sorted(fields.items())), []).append(port_id)
+    summary = Table(title=f"🧩 Profile '{name}'", show_header=True, header_style="bold magenta")
+    summary.add_column("Ports")
+    summary.add_column("Settings")
+    for fields, port_ids in by_fields.items():
+        summary.add_row(f"{len(port_ids)} ({', '.join(sorted(port_ids, key=int)[:6])}{', ...' if len(port_ids) > 6 else ''})",
+                        ", ".join(f"{k}={v}" for k, v in fields))
+    console.print(summary)
+
+
+def provisioning_menu(network_id, headers):
+    try:
+        profiles = load_profiles()
+    except (OSError, ValueError) as e:
+        console.print(f"❌ Could not load {PROFILE_FILE.name}: {e}", style="red")
+        return
+    if not profiles:
+        console.print(f"⚠️ No profiles in {PROFILE_FILE.name}.", style="yellow")
+        return
+    names = list(profiles)
+    for idx, name in enumerate(names, 1):
+        console.print(f"{idx}. {name} ({len(profiles[name])} port range(s))")
+    name = names[int(Prompt.ask("Profile", choices=[str(i) for i in range(1, len(names) + 1)], default="1")) - 1]
+    table = compile_profile(profiles[name])
+    _show_profile(name, table)
+
+    switches = get_switches(headers, network_id)
+    if not switches:
+        console.print("⚠️ No switches in this network.", style="yellow")
+        return
+    stacks = get_stacks(headers, network_id)
+    stack_of = {serial: stack.get("name", stack.get("id")) for stack in stacks for serial in stack.get("serials", [])}
+    listing = Table(title="🔀 Switches", show_header=True, header_style="bold magenta")
+    for col in ("#", "Name", "Serial", "Model", "Stack"):
+        listing.add_column(col)
+    for idx, switch in enumerate(switches, 1):
+        listing.add_row(str(idx), switch.get("name") or "", switch["serial"], switch.get("model", ""),
+                        stack_of.get(switch["serial"], ""))
+    console.print(listing)
+    selected = select_switches(switches, stacks, Prompt.ask(
+        "Switches ('all', numbers/ranges, serials, names or stack names)", default="all"))
+    if not selected:
+        console.print("⚠️ No switches matched.", style="yellow")
+        return
+    if not Confirm.ask(f"Apply '{name}' to {len(selected)} switch(es)?", default=True):
+        return
+
+    org_id = meraki_api.get(f"/networks/{network_id}", headers=headers).json().get("organizationId")
+    lock = threading.Lock()
+
+    def add_planned(writes):
+        with lock:   # workers report concurrently; the total is read-modify-write
+            progress.update(port_task, total=progress.tasks[port_task].total + writes)
+
+    with Progress(SpinnerColumn(), TextColumn("[bold blue]{task.description}"), BarColumn(),
+                  TextColumn("{task.completed}/{task.total}"), TimeElapsedColumn(), console=console) as progress:
+        switch_task = progress.add_task("Switches", total=len(selected))
+        port_task = progress.add_task("Port updates", total=0)
+        rows = provision(headers, selected, table, org_id=org_id,
+                         on_planned=add_planned,
+                         on_port=lambda: progress.advance(port_task),
+                         on_result=lambda switch, row: progress.advance(switch_task))
+
+    results = Table(title="📋 Provisioning results", show_header=True, header_style="bold magenta")
+    for col in ("Switch", "Serial", "Targeted", "Updated", "Unchanged", "Failed", "Error"):
+        results.add_column(col)
+    for row in sorted(rows, key=lambda r: r["name"]):
+        style = "red" if row["failed"] or row["error"] else "green"
+        results.add_row(row["name"], row["serial"], str(row["targeted"]), str(row["updated"]),
+                        str(row["unchanged"]), f"[{style}]{row['failed']}[/{style}]", row["error"])
+    console.print(results)
@@ -0,0 +1,131 @@
+"""Wall-clock tracing of menu operations, written as Chrome trace-event JSON.
+
+Wrap work in nested spans; every Dashboard API attempt made through
+``meraki_api`` becomes a span of its own (category ``http``):
+
+    with tracing.span("show_inventory", cat="menu"):
+        with tracing.span("render table", cat="render", network=net["name"]):
+            ...
+
+Tracing is off unless ``main.py --trace FILE`` or ``$MERAKI_TRACE`` is set;
+spans are then a single attribute check.  Open the file in
+``chrome://tracing`` or https://ui.perfetto.dev.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+_enabled = False
+_path = None
+_events = []
+_threads = {}
+_lock = threading.Lock()
+_epoch = time.perf_counter()
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name, cat, args):
+        self.name, self.cat, self.args = name, cat, args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        tid = threading.get_ident()
+        event = {
+            "name": self.name, "cat": self.cat, "ph": "X", "pid": os.getpid(), "tid": tid,
+            "ts": round((self.start - _epoch) * 1e6, 1), "dur": round((end - self.start) * 1e6, 1),
+        }
+        if self.args:
+            event["args"] = {k: str(v) for k, v in self.args.items()}
+        with _lock:
+            _events.append(event)
+            if tid not in _threads:
+                _threads[tid] = threading.current_thread().name
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enabled():
+    return _enabled
+
+
+def span(name, cat="app", **args):
+    """Context manager timing ``name``; free when tracing is off."""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name, cat, args)
+
+
+def traced(name=None, cat="app"):
+    """Decorator form of :func:`span` (not for generators)."""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(label, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def sleep(seconds):
+    """``time.sleep`` that shows up in the trace."""
+    with span(f"sleep({seconds:g})", cat="sleep"):
+        time.sleep(seconds)
+
+
+# ---------------- Output ---------------- #
+def enable(path):
+    """Start collecting spans; they are written to ``path`` at exit."""
+    global _enabled, _path
+    first = _path is None
+    _enabled, _path = True, path
+    if first:
+        atexit.register(write)
+
+
+def write(path=None):
+    path = path or _path
+    if not path:
+        return None
+    with _lock:
+        events = list(_events)
+        threads = dict(_threads)
+    pid = os.getpid()
+    meta = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "SR-MerakiMate"}}]
+    meta += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+              "args": {"name": name}} for tid, name in threads.items()]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+    return path
+
+
+if os.environ.get("MERAKI_TRACE"):
+    enable(os.environ["MERAKI_TRACE"])
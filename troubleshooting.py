@@ -1,11 +1,12 @@
 ﻿import requests
+import meraki_api
+import tracing
 import os
 import json
 from datetime import datetime, timedelta
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from rich.table import Table
-import openai
 import yaml  # For offline YAML support
 from pathlib import Path
 
@@ -14,7 +15,6 @@ from pathlib import Path
 
 console = Console()
 OUTPUT_DIR = "output"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 
 def generate_ai_prompt(logs, event_type):
@@ -140,7 +140,8 @@ def analyze_logs_with_ai(logs, event_type, auto_analyze=False):
 
 
 # ------------------------ Fetch Event Logs ------------------------ #
-def fetch_events(base_url, headers, network_id, days, product_type):
+@tracing.traced(cat="fetch")
+def fetch_events(base_url, headers, network_id, days, product_type, verbose=True):
     end_time = datetime.utcnow()
     start_time = end_time - timedelta(days=int(days))
     url = f"{base_url}/networks/{network_id}/events"
@@ -154,15 +155,18 @@ def fetch_events(base_url, headers, network_id, days, product_type):
     if product_type != "all":
         params["productType"] = product_type
 
-    console.print(f"\n📡 Fetching logs from: [bold green]{params['t0']}[/] to [bold green]{params['t1']}[/]...")
-    console.print(f"📦 Product Type Filter: [bold yellow]{product_type}[/]")
+    if verbose:
+        console.print(f"\n📡 Fetching logs from: [bold green]{params['t0']}[/] to [bold green]{params['t1']}[/]...")
+        console.print(f"📦 Product Type Filter: [bold yellow]{product_type}[/]")
 
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = meraki_api.get(url, headers=headers, params=params)
         response.raise_for_status()
         events = response.json().get("events", [])
         return events, params['t0'], params['t1']
     except requests.RequestException as e:
+        if not verbose:
+            raise
         console.print(f"❌ Failed to fetch events: {e}")
         return [], None, None
 
@@ -171,6 +175,7 @@ def get_unique_event_types(events):
     return sorted(set(event.get("type", "unknown") for event in events))
 
 # ------------------------ Filter by Type and Keyword ------------------------ #
+@tracing.traced(cat="transform")
 def filter_events(events, selected_type, keyword_input=None):
     keywords = [k.strip().lower() for k in keyword_input.split(",") if k.strip()] if keyword_input else []
     filtered = []
@@ -197,6 +202,7 @@ def display_logs_table(logs, page_size=10):
         if page < pages - 1 and not Confirm.ask(f"\n➡️ Show next {page_size} entries?"):
             break
 
+@tracing.traced(cat="render")
 def render_table(logs, event_type):
     table = Table(show_header=True, header_style="bold cyan")
     table.add_column("Time", width=18)
@@ -301,8 +307,10 @@ def render_table(logs, event_type):
     console.print(table)
 
 # ------------------------ Export Logs ------------------------ #
+@tracing.traced(cat="export")
 def export_logs(logs):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     filename = f"{OUTPUT_DIR}/filtered_events_{timestamp}.json"
     with open(filename, "w") as f:
         json.dump(logs, f, indent=2)
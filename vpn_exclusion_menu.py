@@ -1,9 +1,6 @@
 ﻿# vpn_exclusion_menu.py
 from rich.console import Console
 from rich.prompt import Prompt
-import subprocess
-import os
-import sys
 
 console = Console()
 
@@ -23,18 +20,32 @@ def vpn_exclusion_menu(base_url, headers, org_id):
         elif choice == "3":
             break
 
+# The scripts run in this process so that --dry-run (and tracing / metrics) cover their writes.
+def _run_script(main):
+    try:
+        main()
+    except KeyboardInterrupt:
+        console.print("\n⚠️ Operation cancelled by user.", style="yellow")
+        return False
+    except Exception as e:
+        console.print(f"❌ {e}", style="red")
+        return False
+    return True
+
 def run_vpn_push():
+    from vpn_exclusion_push import main
+
     console.print("\n📤 Running VPN Exclusion Push Script...", style="cyan")
-    result = os.system("python3 vpn_exclusion_push.py")
-    if result != 0:
+    if not _run_script(main):
         console.print("❌ Push script failed!", style="red")
     else:
         console.print("✅ Push completed successfully.", style="green")
 
 def run_vpn_removal():
+    from vpn_exclusion_remove import main
+
     console.print("\n🧹 Running VPN Exclusion Removal Script...", style="cyan")
-    result = os.system("python3 vpn_exclusion_remove.py")
-    if result != 0:
+    if not _run_script(main):
         console.print("❌ Removal script failed!", style="red")
     else:
         console.print("✅ Removal completed successfully.", style="green")
@@ -1,9 +1,7 @@
 from pathlib import Path
-import requests
-import pandas as pd
+import bulk_input
+import meraki_api
 import json
-from azure.identity import DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
 import logging
 import sys
 import os
@@ -14,18 +12,28 @@ KEYS_TO_CHECK = ["protocol", "destination", "port"]
 BACKUP_DIR = "vpn_exclusion_backups"
 
 # === LOGGING SETUP ===
-logging.basicConfig(
-    filename='vpn_exclusion_audit.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s'
-)
+LOG_FILE = 'vpn_exclusion_audit.log'
+logger = logging.getLogger(Path(__file__).stem)
+
+def setup_logging():
+    # Configured on first use so importing this module has no side effects
+    if logger.handlers:
+        return
+    handler = logging.FileHandler(LOG_FILE)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
 
 def log_event(message):
-    logging.info(message)
+    setup_logging()
+    logger.info(message)
     print(message)
 
 # === FETCH API KEY FROM AZURE KEY VAULT ===
 def fetch_api_key(key_vault_name, secret_name):
+    from azure.identity import DefaultAzureCredential
+    from azure.keyvault.secrets import SecretClient
+
     kv_uri = f"https://{key_vault_name}.vault.azure.net"
     credential = DefaultAzureCredential()
     client = SecretClient(vault_url=kv_uri, credential=credential)
@@ -33,14 +41,17 @@ def fetch_api_key(key_vault_name, secret_name):
 
 # === HELPER FUNCTIONS ===
 def read_excel_data(file_path):
-    df_orgs = pd.read_excel(file_path, sheet_name='Organizations')
-    df_ips = pd.read_excel(file_path, sheet_name='IPList')
+    import pandas as pd
+
+    # Validated up front: a bad row fails here with its row number, not mid-push
+    df_orgs = pd.DataFrame(bulk_input.load_records(file_path, "vpn_orgs"), columns=["OrganizationId"])
+    df_ips = pd.DataFrame(bulk_input.load_records(file_path, "vpn_ips"), columns=["IP"])
     return df_orgs, df_ips
 
 def get_existing_exclusions(org_id, api_key):
-    url = f"https://api.meraki.com/api/v1/organizations/{org_id}/appliance/trafficShaping/vpnExclusions/byNetwork"
+    url = f"{meraki_api.BASE_URL}/organizations/{org_id}/appliance/trafficShaping/vpnExclusions/byNetwork"
     headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
-    response = requests.get(url, headers=headers)
+    response = meraki_api.get(url, headers=headers)
     response.raise_for_status()
     return response.json().get("items", [])
 
@@ -68,9 +79,24 @@ def prompt_user_selection(network_list, org_id):
             print("? Invalid selection. Skipping organization.")
             return None
 
+def _rule_key(entry):
+    return tuple(entry.get(k) for k in KEYS_TO_CHECK)
+
+def find_duplicates(existing, new_entries):
+    seen = {_rule_key(e) for e in existing}
+    return [e for e in new_entries if _rule_key(e) in seen]
+
+def merge_exclusions(existing, new_entries, overwrite_duplicates=False):
+    """Merge new rules into existing ones without creating duplicate entries."""
+    new_keys = {_rule_key(e) for e in new_entries}
+    if overwrite_duplicates:
+        return [e for e in existing if _rule_key(e) not in new_keys] + new_entries
+    seen = {_rule_key(e) for e in existing}
+    return existing + [e for e in new_entries if _rule_key(e) not in seen]
+
 def merge_and_handle_duplicates(existing, new_entries):
-    seen = {tuple(e.get(k) for k in KEYS_TO_CHECK) for e in existing}
-    duplicates = [e for e in new_entries if tuple(e.get(k) for k in KEYS_TO_CHECK) in seen]
+    duplicates = find_duplicates(existing, new_entries)
+    overwrite = False
 
     if duplicates:
         print("\n?? Duplicate entries detected:")
@@ -78,10 +104,15 @@ def merge_and_handle_duplicates(existing, new_entries):
             print(f" - {d}")
 
         confirm = input("Do you want to overwrite existing duplicates? (yes/no): ").strip().lower()
-        if confirm != "yes":
-            new_entries = [e for e in new_entries if tuple(e.get(k) for k in KEYS_TO_CHECK) not in seen]
+        overwrite = confirm == "yes"
+
+    return merge_exclusions(existing, new_entries, overwrite_duplicates=overwrite)
 
-    return existing + new_entries
+def build_custom_rules(ips):
+    return [
+        {"protocol": "any", "destination": str(ip).strip(), "port": "any"}
+        for ip in ips
+    ]
 
 def backup_config(network_id, custom, major):
     os.makedirs(BACKUP_DIR, exist_ok=True)
@@ -94,15 +125,45 @@ def backup_config(network_id, custom, major):
     log_event(f"? Backup saved: {backup_file}")
 
 def update_exclusion(network_id, custom, major, api_key):
-    url = f"https://api.meraki.com/api/v1/networks/{network_id}/appliance/trafficShaping/vpnExclusions"
+    url = f"{meraki_api.BASE_URL}/networks/{network_id}/appliance/trafficShaping/vpnExclusions"
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
     payload = {"custom": custom, "majorApplications": major}
 
-    response = requests.put(url, headers=headers, json=payload)
+    response = meraki_api.put(url, headers=headers, json=payload)
     if response.status_code == 200:
         log_event(f"? Updated VPN exclusions for {network_id}")
     else:
         log_event(f"? Failed to update {network_id}: {response.status_code} - {response.text}")
+    return response
+
+def push_exclusions(org_id, api_key, new_custom_rules, network_ids=None, overwrite_duplicates=False):
+    """Non-interactive push: merge ``new_custom_rules`` into every (or each selected) network."""
+    results = []
+    for net in get_existing_exclusions(org_id, api_key):
+        net_id = net["networkId"]
+        if network_ids is not None and net_id not in network_ids:
+            continue
+
+        existing_custom = net.get("custom", [])
+        existing_apps = net.get("majorApplications", [])
+        updated_custom = merge_exclusions(existing_custom, new_custom_rules, overwrite_duplicates)
+        if sorted(map(repr, updated_custom)) == sorted(map(repr, existing_custom)):   # order aside, nothing new
+            results.append({"organizationId": org_id, "networkId": net_id, "networkName": net.get("networkName"),
+                            "added": 0, "ok": True, "status": "unchanged", "error": None})
+            continue
+
+        backup_config(net_id, existing_custom, existing_apps)
+        response = update_exclusion(net_id, updated_custom, existing_apps, api_key)
+        results.append({
+            "organizationId": org_id,
+            "networkId": net_id,
+            "networkName": net.get("networkName"),
+            "added": len(updated_custom) - len(existing_custom),
+            "ok": response.status_code == 200,
+            "status": response.status_code,
+            "error": None if response.status_code == 200 else response.text
+        })
+    return results
 
 # === MAIN ===
 def main():
@@ -121,10 +182,7 @@ def main():
     input_file = data_dir / "vpn_exclusion_input.xlsx"
     orgs_df, ips_df = read_excel_data(input_file)
 
-    new_custom_rules = [
-        {"protocol": "any", "destination": str(ip).strip(), "port": "any"}
-        for ip in ips_df["IP"]
-    ]
+    new_custom_rules = build_custom_rules(ips_df["IP"])
 
     for _, row in orgs_df.iterrows():
         org_id = str(row["OrganizationId"])
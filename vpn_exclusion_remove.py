@@ -1,9 +1,7 @@
 from pathlib import Path
-import requests
-import pandas as pd
+import bulk_input
+import meraki_api
 import json
-from azure.identity import DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
 import logging
 import sys
 import os
@@ -15,18 +13,28 @@ EXPORT_DIR = "vpn_exclusion_exports"
 REMOVAL_KEYS = ["destination"]  # Only match on destination now
 
 # === LOGGING SETUP ===
-logging.basicConfig(
-    filename='vpn_exclusion_removal.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s'
-)
+LOG_FILE = 'vpn_exclusion_removal.log'
+logger = logging.getLogger(Path(__file__).stem)
+
+def setup_logging():
+    # Configured on first use so importing this module has no side effects
+    if logger.handlers:
+        return
+    handler = logging.FileHandler(LOG_FILE)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
 
 def log_event(message):
-    logging.info(message)
+    setup_logging()
+    logger.info(message)
     print(message)
 
 # === FETCH API KEY FROM AZURE KEY VAULT ===
 def fetch_api_key(key_vault_name, secret_name):
+    from azure.identity import DefaultAzureCredential
+    from azure.keyvault.secrets import SecretClient
+
     kv_uri = f"https://{key_vault_name}.vault.azure.net"
     credential = DefaultAzureCredential()
     client = SecretClient(vault_url=kv_uri, credential=credential)
@@ -45,6 +53,8 @@ def backup_config(network_id, custom, major):
 
 # === EXPORT FUNCTION ===
 def export_to_excel(network_name, network_id, custom, major):
+    import pandas as pd
+
     os.makedirs(EXPORT_DIR, exist_ok=True)
     writer = pd.ExcelWriter(
         os.path.join(EXPORT_DIR, f"{network_name}_{network_id}_export.xlsx")
@@ -56,29 +66,78 @@ def export_to_excel(network_name, network_id, custom, major):
 
 # === READ INPUT ===
 def read_input_file(path):
-    df_ip = pd.read_excel(path, sheet_name='IPList')
-    df_apps = pd.read_excel(path, sheet_name='AppList') if 'AppList' in pd.ExcelFile(path).sheet_names else pd.DataFrame()
+    import pandas as pd
+
+    df_ip = pd.DataFrame(bulk_input.load_records(path, "vpn_removals"), columns=["destination"])
+    df_apps = pd.DataFrame(bulk_input.load_records(path, "vpn_apps"))
     return df_ip, df_apps
 
-def remove_matching_entries(existing, to_remove_list):
-    to_remove_set = set(str(row['destination']).strip() for _, row in to_remove_list.iterrows())
+def remove_destinations(existing, destinations):
+    to_remove_set = {str(d).strip() for d in destinations}
     new_entries = [entry for entry in existing if str(entry.get("destination")) not in to_remove_set]
     removed_count = len(existing) - len(new_entries)
     return new_entries, removed_count
 
+def remove_matching_entries(existing, to_remove_list):
+    return remove_destinations(existing, (row['destination'] for _, row in to_remove_list.iterrows()))
+
 def update_exclusion(network_id, custom, major, api_key):
-    url = f"https://api.meraki.com/api/v1/networks/{network_id}/appliance/trafficShaping/vpnExclusions"
+    url = f"{meraki_api.BASE_URL}/networks/{network_id}/appliance/trafficShaping/vpnExclusions"
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
     payload = {"custom": custom, "majorApplications": major}
 
-    response = requests.put(url, headers=headers, json=payload)
+    response = meraki_api.put(url, headers=headers, json=payload)
     if response.status_code == 200:
         log_event(f"? Updated VPN exclusions for {network_id}")
     else:
         log_event(f"? Failed to update {network_id}: {response.status_code} - {response.text}")
+    return response
+
+def get_exclusions_by_network(org_id, api_key):
+    url = f"{meraki_api.BASE_URL}/organizations/{org_id}/appliance/trafficShaping/vpnExclusions/byNetwork"
+    headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
+    response = meraki_api.get(url, headers=headers)
+    response.raise_for_status()
+    return response.json().get("items", [])
+
+def remove_exclusions(org_id, api_key, destinations=(), app_ids=(), network_ids=None):
+    """Non-interactive removal of custom destinations / major application IDs."""
+    app_ids = {str(a).strip() for a in app_ids}
+    results = []
+    for net in get_exclusions_by_network(org_id, api_key):
+        net_id = net.get("networkId")
+        if network_ids and net_id not in network_ids:
+            continue
+
+        custom = net.get("custom", [])
+        major = net.get("majorApplications", [])
+        backup_config(net_id, custom, major)
+
+        custom_new, removed_ips = remove_destinations(custom, destinations)
+        major_new = [entry for entry in major if str(entry.get("id")) not in app_ids]
+        removed_apps = len(major) - len(major_new)
+        if not removed_ips and not removed_apps:
+            results.append({"organizationId": org_id, "networkId": net_id, "networkName": net.get("networkName"),
+                            "removedCustom": 0, "removedApps": 0, "ok": True, "status": None, "error": None})
+            continue
+
+        response = update_exclusion(net_id, custom_new, major_new, api_key)
+        results.append({
+            "organizationId": org_id,
+            "networkId": net_id,
+            "networkName": net.get("networkName"),
+            "removedCustom": removed_ips,
+            "removedApps": removed_apps,
+            "ok": response.status_code == 200,
+            "status": response.status_code,
+            "error": None if response.status_code == 200 else response.text
+        })
+    return results
 
 # === MAIN ===
 def main():
+    import pandas as pd
+
     # Try to import vault details from main.py
     try:
         from .main import prompt_vault_details
@@ -92,17 +151,13 @@ def main():
 
     data_dir = Path(__file__).resolve().parent / "data"
     input_file = data_dir / "vpn_exclusion_removal_input.xlsx"
-    orgs_df = pd.read_excel(input_file, sheet_name="Organizations")
+    orgs_df = pd.DataFrame(bulk_input.load_records(input_file, "vpn_orgs"), columns=["OrganizationId"])
 
     for _, row in orgs_df.iterrows():
         org_id = str(row["OrganizationId"])
         log_event(f"\n--- Processing Org {org_id} ---")
 
-        url = f"https://api.meraki.com/api/v1/organizations/{org_id}/appliance/trafficShaping/vpnExclusions/byNetwork"
-        headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        networks = response.json().get("items", [])
+        networks = get_exclusions_by_network(org_id, api_key)
 
         if not networks:
             log_event(f"?? No networks found for Org {org_id}")
@@ -3,6 +3,8 @@ from rich.prompt import Prompt
 from rich.table import Table
 import requests
 
+import meraki_api
+
 console = Console()
 
 def vpn_s2s_menu(base_url, headers, org_id, network_id):
@@ -42,12 +44,12 @@ def has_write_access(base_url, headers, org_id) -> bool:
         "cidr": "192.0.2.1/32"   # TEST-NET IP
     }
     try:
-        response = requests.post(test_url, headers=headers, json=test_payload)
+        response = meraki_api.post(test_url, headers=headers, json=test_payload)
         if response.status_code == 201:
             # Clean up created object
             obj_id = response.json().get("id")
             if obj_id:
-                requests.delete(f"{test_url}/{obj_id}", headers=headers)
+                meraki_api.delete(f"{test_url}/{obj_id}", headers=headers)
             return True
     except requests.RequestException:
         pass
@@ -58,7 +60,7 @@ def has_write_access(base_url, headers, org_id) -> bool:
 def view_third_party_vpn_peers(base_url, headers, org_id):
     url = f"{base_url}/organizations/{org_id}/appliance/vpn/thirdPartyVPNPeers"
     try:
-        response = requests.get(url, headers=headers)
+        response = meraki_api.get(url, headers=headers)
         response.raise_for_status()
         vpn_peers = response.json().get("peers", [])
 
@@ -104,7 +106,7 @@ def view_third_party_vpn_peers(base_url, headers, org_id):
 def view_network_site_to_site_vpn(base_url, headers, network_id):
     url = f"{base_url}/networks/{network_id}/appliance/vpn/siteToSiteVpn"
     try:
-        response = requests.get(url, headers=headers)
+        response = meraki_api.get(url, headers=headers)
         response.raise_for_status()
         data = response.json()
 
@@ -1,14 +1,16 @@
 ﻿from rich.console import Console
 from rich.prompt import Prompt
-import requests
+import meraki_api
 import getpass
 
 console = Console()
-BASE_URL = "https://api.meraki.com/api/v1"
+BASE_URL = meraki_api.BASE_URL
+# WPA3 modes require 802.11w (management frame protection)
+WPA3_MODES = ("WPA3 Transition Mode", "WPA3 only", "WPA3 192-bit Security")
 
 def rename_access_points(network_id, headers):
     url = f"{BASE_URL}/networks/{network_id}/devices"
-    devices = requests.get(url, headers=headers).json()
+    devices = meraki_api.get(url, headers=headers).json()
     aps = [d for d in devices if d.get("model", "").startswith("MR")]
     for ap in aps:
         serial = ap["serial"]
@@ -19,7 +21,12 @@ def rename_access_points(network_id, headers):
 
 def rename_device(serial, name, headers):
     url = f"{BASE_URL}/devices/{serial}"
-    requests.put(url, headers=headers, json={"name": name})
+    response = meraki_api.put(url, headers=headers, json={"name": name})
+    if response.ok:
+        console.print(f"✅ Renamed {serial} to '{name}'", style="green")
+    else:
+        console.print(f"❌ Failed to rename {serial}: {response.status_code} {response.text}", style="red")
+    return response.ok
 
 def configure_ssids(network_id, headers):
     num = int(Prompt.ask("How many SSIDs to configure?", default="1"))
@@ -59,7 +66,7 @@ def configure_ssids(network_id, headers):
         }
 
         # Enable WPA3-required fields if applicable
-        if selected_wpa_mode in ["WPA3 Transition Mode", "WPA3 only", "WPA3 192-bit Security"]:
+        if selected_wpa_mode in WPA3_MODES:
             payload["dot11w"] = {"enabled": True, "required": False}
         else:
             payload["dot11w"] = {"enabled": False, "required": False}
@@ -100,7 +107,7 @@ def configure_ssids(network_id, headers):
                 payload["useVlanTagging"] = False
 
         url = f"{BASE_URL}/networks/{network_id}/wireless/ssids/{ssid_number}"
-        response = requests.put(url, headers=headers, json=payload)
+        response = meraki_api.put(url, headers=headers, json=payload)
 
         if response.status_code == 200:
             console.print(f"✅ SSID '{name}' configured successfully.", style="green")
@@ -112,11 +119,19 @@ def wireless_config_menu(network_id, headers):
         console.print("\n📶 [bold magenta]Wireless Configuration[/bold magenta]:")
         console.print("1. 📡 Rename Access Points")
         console.print("2. 🔐 Configure SSIDs")
-        console.print("3. ⬅️  Back to Main Menu")
-        choice = Prompt.ask("Select an option", choices=["1", "2", "3"], default="3")
+        console.print("3. 🚀 Deploy SSIDs from YAML (many networks)")
+        console.print("4. 📋 Org-wide SSID Compliance Report")
+        console.print("5. ⬅️  Back to Main Menu")
+        choice = Prompt.ask("Select an option", choices=["1", "2", "3", "4", "5"], default="5")
         if choice == "1":
             rename_access_points(network_id, headers)
         elif choice == "2":
             configure_ssids(network_id, headers)
         elif choice == "3":
+            from ssid_deploy import ssid_deploy_menu
+            ssid_deploy_menu(network_id, headers)
+        elif choice == "4":
+            from wireless_report import ssid_compliance_menu
+            ssid_compliance_menu(network_id, headers)
+        elif choice == "5":
             break
@@ -0,0 +1,150 @@
+"""Org-wide SSID compliance report.
+
+One crawl: every wireless network of the org costs a single GET of its
+SSID list, fetched concurrently under the org's rate budget (1,000
+networks take about 100 s at the Dashboard's 10 calls/s).  Every enabled
+SSID becomes one row with its auth mode, WPA mode, 802.11w, IP mode, VLAN
+tagging, band selection and minimum bitrate, checked against ``BASELINE``:
+
+* error   - WPA3 without 802.11w (the pairing the SSID setup enforces),
+            WPA1 still allowed, open SSID without a splash page
+* warning - bridged SSID without VLAN tagging, band selection or minimum
+            bitrate other than the baseline's
+
+:func:`compliance_rows` yields rows as each network comes back.
+"""
+from rich.console import Console
+from rich.prompt import Confirm
+from rich.table import Table
+from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+
+import meraki_api
+import tracing
+from wireless_config import WPA3_MODES
+
+console = Console()
+
+BASELINE = {
+    "band_selection": "Dual band operation with Band Steering",
+    "min_bitrate": 12,
+    "legacy_wpa_modes": ("WPA1 only", "WPA1 and WPA2"),
+}
+REPORT_FIELDS = ["network_id", "network", "number", "ssid", "auth_mode", "encryption", "wpa_mode", "dot11w",
+                 "ip_mode", "vlan_tagging", "vlan", "band_selection", "min_bitrate", "severity", "findings"]
+SEVERITY_ORDER = {"error": 0, "warning": 1, "ok": 2}
+
+
+# ---------------- Checks ---------------- #
+def ssid_findings(ssid, baseline=BASELINE):
+    """``[(severity, message)]`` for one SSID."""
+    findings = []
+    wpa_mode = ssid.get("wpaEncryptionMode")
+    auth_mode = ssid.get("authMode", "open")
+    if wpa_mode in WPA3_MODES and not (ssid.get("dot11w") or {}).get("enabled"):
+        findings.append(("error", f"{wpa_mode} without 802.11w"))
+    if auth_mode not in ("open", "open-with-radius") and wpa_mode in baseline["legacy_wpa_modes"]:
+        findings.append(("error", f"legacy {wpa_mode}"))
+    if auth_mode == "open" and ssid.get("splashPage", "None") == "None":
+        findings.append(("error", "open SSID without a splash page"))
+    if ssid.get("ipAssignmentMode") == "Bridge mode" and not ssid.get("useVlanTagging"):
+        findings.append(("warning", "bridged without VLAN tagging"))
+    band = ssid.get("bandSelection")
+    if band and baseline.get("band_selection") and band != baseline["band_selection"]:
+        findings.append(("warning", f"band selection '{band}'"))
+    bitrate = ssid.get("minBitrate")
+    if bitrate is not None and baseline.get("min_bitrate") and float(bitrate) < baseline["min_bitrate"]:
+        findings.append(("warning", f"minimum bitrate {bitrate} Mbps"))
+    return findings
+
+
+def ssid_row(network, ssid, baseline=BASELINE):
+    findings = ssid_findings(ssid, baseline)
+    severity = min((s for s, _ in findings), key=SEVERITY_ORDER.get, default="ok")
+    return {"network_id": network["id"], "network": network.get("name", network["id"]),
+            "number": ssid.get("number"), "ssid": ssid.get("name", ""), "auth_mode": ssid.get("authMode", ""),
+            "encryption": ssid.get("encryptionMode", ""), "wpa_mode": ssid.get("wpaEncryptionMode", ""),
+            "dot11w": bool((ssid.get("dot11w") or {}).get("enabled")), "ip_mode": ssid.get("ipAssignmentMode", ""),
+            "vlan_tagging": bool(ssid.get("useVlanTagging")), "vlan": ssid.get("defaultVlanId", ""),
+            "band_selection": ssid.get("bandSelection", ""), "min_bitrate": ssid.get("minBitrate", ""),
+            "severity": severity, "findings": "; ".join(message for _, message in findings)}
+
+
+# ---------------- Crawl ---------------- #
+def wireless_networks(headers, org_id):
+    return [n for n in meraki_api.get_all_pages(f"/organizations/{org_id}/networks", headers=headers)
+            if "wireless" in n.get("productTypes", [])]
+
+
+def compliance_rows(headers, org_id, networks, baseline=BASELINE, max_workers=meraki_api.MAX_WORKERS,
+                    on_network=None, errors=None):
+    """Yield a row per enabled SSID of ``networks`` as each network's SSIDs arrive.
+
+    Networks whose SSIDs could not be read go to ``errors`` (``{network ID: error}``).
+    """
+    budget = meraki_api.rate_budget(str(org_id))
+
+    def fetch(network):
+        with tracing.span("fetch ssids", cat="api", network=network["id"]):
+            response = meraki_api.get(f"/networks/{network['id']}/wireless/ssids", headers=headers, budget=budget)
+            response.raise_for_status()
+            return response.json()
+
+    for network, ssids, error in meraki_api.parallel_map(fetch, networks, max_workers=max_workers):
+        if error:
+            if errors is not None:
+                errors[network["id"]] = error
+        else:
+            for ssid in ssids:
+                if ssid.get("enabled"):
+                    yield ssid_row(network, ssid, baseline)
+        if on_network:
+            on_network(network)
+
+
+def summarize(rows):
+    """``{(ssid name, severity): count}`` and ``{finding: count}``."""
+    by_ssid, by_finding = {}, {}
+    for row in rows:
+        key = (row["ssid"], row["severity"])
+        by_ssid[key] = by_ssid.get(key, 0) + 1
+        for finding in filter(None, row["findings"].split("; ")):
+            by_finding[finding] = by_finding.get(finding, 0) + 1
+    return by_ssid, by_finding
+
+
+# ---------------- Menu ---------------- #
+def show_summary(rows, errors=None):
+    by_ssid, by_finding = summarize(rows)
+    table = Table(title="📶 SSID compliance by SSID name", show_header=True, header_style="bold magenta")
+    for col in ("SSID", "OK", "Warnings", "Errors"):
+        table.add_column(col)
+    for name in sorted({name for name, _ in by_ssid}):
+        errors_count = by_ssid.get((name, "error"), 0)
+        table.add_row(name, str(by_ssid.get((name, "ok"), 0)), str(by_ssid.get((name, "warning"), 0)),
+                      f"[red]{errors_count}[/red]" if errors_count else "0")
+    console.print(table)
+    for finding, count in sorted(by_finding.items(), key=lambda item: -item[1]):
+        console.print(f"  • {finding}: {count}")
+    for network_id, error in (errors or {}).items():
+        console.print(f"❌ {network_id}: {error}", style="red")
+
+
+def ssid_compliance_menu(network_id, headers):
+    from report_writer import export_rows, ask_export_formats
+
+    org_id = meraki_api.get(f"/networks/{network_id}", headers=headers).json().get("organizationId")
+    with console.status("📡 Listing wireless networks..."):
+        networks = wireless_networks(headers, org_id)
+    if not networks:
+        console.print("⚠️ No wireless networks in this organization.", style="yellow")
+        return
+    errors, rows = {}, []
+    with Progress(SpinnerColumn(), TextColumn("[bold blue]{task.description}"), BarColumn(),
+                  TextColumn("{task.completed}/{task.total}"), TimeElapsedColumn(), console=console) as progress:
+        task = progress.add_task("Wireless networks", total=len(networks))
+        rows.extend(compliance_rows(headers, org_id, networks, errors=errors,
+                                    on_network=lambda n: progress.advance(task)))
+    rows.sort(key=lambda r: (SEVERITY_ORDER[r["severity"]], r["network"], r["number"]))
+    show_summary(rows, errors)
+    if rows and Confirm.ask("📤 Export the SSID report?", default=True):
+        export_rows(rows, "ssid_compliance", formats=ask_export_formats(), fieldnames=REPORT_FIELDS, total=len(rows))